@@ -1,98 +1,151 @@
 
-from flask import Flask, send_from_directory, send_file, request, jsonify, render_template_string
+from flask import Flask, Blueprint, Response, current_app, send_from_directory, send_file, request, jsonify, render_template_string
 from flask_cors import CORS
+from werkzeug.middleware.proxy_fix import ProxyFix
+from sqlalchemy.orm import undefer
 from datetime import datetime
 import os
 import sys
 import re
+from urllib.parse import quote
 
 
 # Aggiungi la directory app alla path per poter importare il modulo models
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
-from python.models import db, ScheduledPost
+from python.models import db, ScheduledPost, init_schema
+from python.history_indexer import history_indexer
 from python.publisher import publisher
 from python.meta_generator import meta_generator
-
-app = Flask(__name__)
-CORS(app)  # Abilita CORS per tutte le routes
-
-# Configurazione database
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///steemee.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-# Inizializzazione del database
-with app.app_context():
-    db.create_all()
+from python.rpc_proxy import rpc_proxy
+from python.steem_client import steem_client
+from python.chain_state import chain_state
+from python.feed_snapshots import feed_snapshots, is_valid_feed
+from python.search_index import search_index, build_match_query, SearchTimeout, MIN_QUERY_LENGTH
+from python.rate_limiter import rate_limiter
+from python.sitemap import sitemap_builder
+from python.feeds import feed_cache, FEED_TTL
+from python.post_renderer import post_renderer, inline_json, SSR_ENABLED
+from python.precache import precache_manifest
+from python.cur8_stats import cur8_stats, STATS_TTL as CUR8_STATS_TTL, FIRST_SYNC_RETRY as CUR8_FIRST_SYNC_RETRY
+from python.notifications import notification_store, MAX_INITIAL_ROWS as MAX_NOTIFICATIONS, \
+    MIN_SYNC_INTERVAL, MIN_REFRESH_INTERVAL
+from python.previews import preview_cache, parse_post_ref, MAX_PREVIEWS, PREVIEW_TTL
+
+bp = Blueprint('main', __name__)
+
+
+def create_app(config=None):
+    """Crea l'app Flask senza toccare database né nodi RPC: lo schema viene creato alla
+    prima richiesta e il client RPC si configura alla prima chiamata"""
+    # INSTANCE_PATH: cartella di database, indice di ricerca e sitemap (default ./instance)
+    app = Flask(__name__, instance_path=os.environ.get('INSTANCE_PATH') or None)
+    CORS(app)  # Abilita CORS per tutte le routes
+
+    # Configurazione database
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///steemee.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # URL canonico per sitemap, feed, anteprime e meta tag: mai dall'header Host, che il
+    # client può scegliere
+    app.config['SITE_URL'] = os.environ.get('SITE_URL', 'https://cur8.fun').rstrip('/')
+    if config:
+        app.config.update(config)
+    # Dietro nginx: IP reale del client da X-Forwarded-For (serve al rate limiter)
+    proxy_count = int(os.environ.get('PROXY_COUNT', '0'))
+    if proxy_count:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxy_count, x_proto=proxy_count, x_host=proxy_count)
+    db.init_app(app)
+    search_index.init_app(app)
+    sitemap_builder.init_app(app)
+    publisher.init_app(app)
+
+    app.register_blueprint(bp)
+    return app
+
+@bp.before_app_request
+def ensure_schema():
+    init_schema(current_app)
 
 # Serve static files from the start directory (e.g., /start/style.css)
-@app.route('/start/<path:filename>')
+@bp.route('/start/<path:filename>')
 def start_static(filename):
     return send_from_directory('start', filename)
 # Serve static files
-@app.route('/assets/<path:filename>')
+@bp.route('/assets/<path:filename>')
 def assets(filename):
     return send_from_directory('assets', filename)
 
 # Serve JavaScript modules with correct MIME type
-@app.route('/<path:filename>.js')
+@bp.route('/<path:filename>.js')
 def javascript_files(filename):
     import os
-    js_path = os.path.join(app.root_path, f"{filename}.js")
+    js_path = os.path.join(current_app.root_path, f"{filename}.js")
     if not os.path.isfile(js_path):
         return "File not found", 404
     return send_file(js_path, mimetype='application/javascript')
 
 # Serve specific root files
-@app.route('/manifest.json')
+@bp.route('/manifest.json')
 def manifest():
     return send_file('manifest.json', mimetype='application/json')
 
-@app.route('/sw.js')
+@bp.route('/sw.js')
 def service_worker():
-    return send_file('sw.js', mimetype='application/javascript')
-
-@app.route('/favicon.ico')
+    # La versione del manifest dentro lo script: cambia un file, cambia il service worker
+    with open(os.path.join(current_app.root_path, 'sw.js'), encoding='utf-8') as f:
+        script = f.read()
+    version = precache_manifest.get()['version']
+    script = script.replace("const PRECACHE_VERSION = 'dev';", f"const PRECACHE_VERSION = '{version}';", 1)
+    response = Response(script, mimetype='application/javascript')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/precache-manifest.json')
+def service_worker_precache_manifest():
+    response = jsonify(precache_manifest.get())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@bp.route('/favicon.ico')
 def favicon():
     return send_file('favicon.ico')
 
 # Serve files from specific directories with correct MIME types
-@app.route('/components/<path:filename>')
+@bp.route('/components/<path:filename>')
 def components(filename):
     if filename.endswith('.js'):
         return send_file(f'components/{filename}', mimetype='application/javascript')
     return send_from_directory('components', filename)
 
 # Serve the start page
-@app.route('/start')
+@bp.route('/start')
 def serve_start_page():
     return send_file('start/index_start.html')
 
-@app.route('/services/<path:filename>')
+@bp.route('/services/<path:filename>')
 def services(filename):
     if filename.endswith('.js'):
         return send_file(f'services/{filename}', mimetype='application/javascript')
     return send_from_directory('services', filename)
 
-@app.route('/utils/<path:filename>')
+@bp.route('/utils/<path:filename>')
 def utils(filename):
     if filename.endswith('.js'):
         return send_file(f'utils/{filename}', mimetype='application/javascript')
     return send_from_directory('utils', filename)
 
-@app.route('/views/<path:filename>')
+@bp.route('/views/<path:filename>')
 def views(filename):
     if filename.endswith('.js'):
         return send_file(f'views/{filename}', mimetype='application/javascript')
     return send_from_directory('views', filename)
 
-@app.route('/models/<path:filename>')
+@bp.route('/models/<path:filename>')
 def models(filename):
     if filename.endswith('.js'):
         return send_file(f'models/{filename}', mimetype='application/javascript')
     return send_from_directory('models', filename)
 
-@app.route('/controllers/<path:filename>')
+@bp.route('/controllers/<path:filename>')
 def controllers(filename):
     if filename.endswith('.js'):
         return send_file(f'controllers/{filename}', mimetype='application/javascript')
@@ -100,10 +153,19 @@ def controllers(filename):
 
 
 
-def get_base_url(request):
-    """Ottieni l'URL base corretto per l'ambiente"""
-    # Usa l'URL della request
-    return request.host_url.rstrip('/')
+def client_allowed(cost=1):
+    """Admission control per le route che generano chiamate RPC (token bucket per IP e tipo di client)"""
+    return rate_limiter.allow(request.remote_addr, request.user_agent.string, cost)
+
+def rate_limited_response():
+    response = jsonify({"error": "Too many requests"})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(rate_limiter.retry_after(request.user_agent.string))
+    return response
+
+def get_site_url():
+    """URL canonico del sito (SITE_URL), indipendente dalla richiesta"""
+    return current_app.config['SITE_URL']
 
 # Helper function per determinare il tipo di contenuto
 def get_content_type_from_path(path):
@@ -137,12 +199,22 @@ def get_content_type_from_path(path):
     
     return 'default', {}
 
-def render_index_with_meta(meta_tags_html):
-    """Renderizza index.html con meta tag dinamici"""
+def render_index_with_meta(meta_tags_html, post=None):
+    """Renderizza index.html con meta tag dinamici; con un post, anche il suo HTML
+    pre-renderizzato e il JSON per la SPA (che così non rifà get_content)"""
     try:
         with open('index.html', 'r', encoding='utf-8') as f:
             content = f.read()
         
+        if post and SSR_ENABLED:
+            content = content.replace(
+                '<!-- Content will be inserted here by the router -->',
+                post_renderer.render(post), 1
+            ).replace(
+                '</body>',
+                f'<script type="application/json" id="initial-post">{inline_json(post)}</script>\n</body>', 1
+            )
+        
         # Sostituisci i meta tag esistenti con quelli dinamici
         # Trova la posizione dei meta tag statici e sostituiscili
         meta_start = content.find('<!-- Social Media Sharing Preview Metadata -->')
@@ -176,29 +248,37 @@ def render_index_with_meta(meta_tags_html):
 
 
 # Serve la landing page solo su / e /start
-@app.route('/')
+@bp.route('/')
 def serve_landing():
     return send_file('start/index_start.html')
 
 # Serve la SPA/PWA per tutti i path non gestiti da route statiche
-@app.route('/<path:path>')
+@bp.route('/<path:path>')
 def serve_spa(path):
     # Determina il tipo di contenuto dal path
     content_type, params = get_content_type_from_path(path)
     
     # Se è un post, genera meta tag dinamici per l'anteprima
-    if content_type == 'post':
+    # (oltre il limite del client si serve la SPA senza chiamate upstream)
+    if content_type == 'post' and client_allowed():
         try:
             print(f"[DEBUG] Generating meta tags for post: @{params['author']}/{params['permlink']}")
             
             # Genera i meta tag per il post
-            base_url = get_base_url(request)
+            base_url = get_site_url()
             current_url = f"{base_url}/{path}"
             
+            # Un solo get_content per meta tag, HTML pre-renderizzato e JSON inline; dal proxy,
+            # così le richieste contemporanee per lo stesso post ne fanno una sola upstream
+            post = rpc_proxy.call('condenser_api.get_content', [params['author'], params['permlink']])
+            if not post or post.get('id', 0) == 0:
+                post = None
+            
             meta_data = meta_generator.generate_post_meta(
                 author=params['author'],
                 permlink=params['permlink'],
-                base_url=base_url
+                base_url=base_url,
+                post=post or {}
             )
             
             if meta_data:
@@ -207,9 +287,11 @@ def serve_spa(path):
                 
                 # Genera l'HTML dei meta tag
                 meta_tags_html = meta_generator.generate_meta_tags_html(meta_data)
+                if post:
+                    meta_tags_html += '\n    ' + oembed_discovery_link(base_url, current_url)
                 
                 print(f"[DEBUG] Generated meta tags for @{params['author']}/{params['permlink']}")
-                return render_index_with_meta(meta_tags_html)
+                return render_index_with_meta(meta_tags_html, post)
             else:
                 print(f"[DEBUG] No meta tags generated for @{params['author']}/{params['permlink']}, falling back to default")
                 
@@ -220,15 +302,16 @@ def serve_spa(path):
     return send_file('index.html')
 
 # API per i post schedulati
-@app.route('/api/scheduled_posts', methods=['GET'])
+@bp.route('/api/scheduled_posts', methods=['GET'])
 def get_scheduled_posts():
     username = request.args.get('username')
     if not username:
         return jsonify({"error": "Username required"}), 400
-    posts = ScheduledPost.query.filter_by(username=username).all()
+    # Il corpo serve nella risposta: caricato nella stessa query invece che riga per riga
+    posts = ScheduledPost.query.options(undefer(ScheduledPost.body)).filter_by(username=username).all()
     return jsonify([p.to_dict() for p in posts])
 
-@app.route('/api/scheduled_posts', methods=['POST'])
+@bp.route('/api/scheduled_posts', methods=['POST'])
 def create_scheduled_post():
     try:
         data = request.json
@@ -272,12 +355,12 @@ def create_scheduled_post():
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/scheduled_posts/<int:post_id>', methods=['GET'])
+@bp.route('/api/scheduled_posts/<int:post_id>', methods=['GET'])
 def get_scheduled_post(post_id):
     post = ScheduledPost.query.get_or_404(post_id)
     return jsonify(post.to_dict())
 
-@app.route('/api/scheduled_posts/<int:post_id>', methods=['PUT'])
+@bp.route('/api/scheduled_posts/<int:post_id>', methods=['PUT'])
 def update_scheduled_post(post_id):
     try:
         post = ScheduledPost.query.get_or_404(post_id)
@@ -305,7 +388,7 @@ def update_scheduled_post(post_id):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-@app.route('/api/scheduled_posts/<int:post_id>', methods=['DELETE'])
+@bp.route('/api/scheduled_posts/<int:post_id>', methods=['DELETE'])
 def delete_scheduled_post(post_id):
     try:
         post = ScheduledPost.query.get_or_404(post_id)
@@ -316,16 +399,13 @@ def delete_scheduled_post(post_id):
         db.session.rollback()
         return jsonify({"error": str(e)}), 500
 
-# Initialize publisher with app context
-publisher.init_app(app)
-
 # API endpoints for publisher management
-@app.route('/api/publisher/status', methods=['GET'])
+@bp.route('/api/publisher/status', methods=['GET'])
 def get_publisher_status():
     """Get the current status of the publisher service"""
     return jsonify(publisher.get_status())
 
-@app.route('/api/publisher/retry-failed', methods=['POST'])
+@bp.route('/api/publisher/retry-failed', methods=['POST'])
 def retry_failed_posts():
     """Retry all failed posts"""
     retry_count = publisher.retry_failed_posts()
@@ -334,8 +414,342 @@ def retry_failed_posts():
         "message": f"Marked {retry_count} posts for retry"
     })
 
+# Proxy JSON-RPC con cache per la SPA (singolo e batch)
+@bp.route('/rpc', methods=['POST'])
+def rpc():
+    payload = request.get_json(silent=True)
+    if payload is None:
+        return jsonify({"jsonrpc": "2.0", "error": {"code": -32700, "message": "Parse error"}, "id": None}), 400
+    # Un gettone per ogni chiamata che andrebbe ai nodi: le risposte dalla cache sono gratis
+    cost = rpc_proxy.upstream_cost(payload)
+    if cost and not client_allowed(cost):
+        # La SPA passa al nodo successivo della lista
+        return rate_limited_response()
+    return jsonify(rpc_proxy.handle(payload))
+
+@bp.route('/api/rpc/stats', methods=['GET'])
+def get_rpc_stats():
+    """Hit ratio e dimensione della cache del proxy RPC, hedging verso i nodi, rate limiting"""
+    stats = rpc_proxy.get_stats()
+    stats['upstream'] = steem_client.get_stats()
+    stats['admission'] = rate_limiter.get_stats()
+    stats['previews'] = dict(preview_cache.stats)
+    stats['notifications'] = notification_store.get_stats()
+    return jsonify(stats)
+
+# Stato della chain in push (SSE): un poller lato server per tutti i client
+@bp.route('/api/chain/stream', methods=['GET'])
+def chain_state_stream():
+    subscriber = chain_state.subscribe()
+    if subscriber is None:
+        return jsonify({"error": "Too many subscribers"}), 503
+    return Response(
+        chain_state.stream(subscriber),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@bp.route('/api/chain/state', methods=['GET'])
+def get_chain_state():
+    """Ultimo stato noto della chain (per client senza EventSource)"""
+    return jsonify(chain_state.state)
+
+@bp.route('/api/chain/status', methods=['GET'])
+def get_chain_state_status():
+    return jsonify(chain_state.get_status())
+
+# Prima pagina dei feed ordinati, servita da snapshot precalcolati
+@bp.route('/api/feed/<sort>', defaults={'tag': ''}, methods=['GET'])
+@bp.route('/api/feed/<sort>/<tag>', methods=['GET'])
+def get_feed_snapshot(sort, tag):
+    sort, tag = sort.lower(), tag.lower().strip()
+    if not is_valid_feed(sort, tag):
+        return jsonify({"error": f"Invalid feed: {sort}/{tag}"}), 400
+
+    snapshot = feed_snapshots.peek(sort, tag)
+    if snapshot is None:
+        if not client_allowed():
+            return rate_limited_response()
+        snapshot = feed_snapshots.get(sort, tag)
+    if snapshot is None:
+        return jsonify({"error": "Feed temporarily unavailable"}), 502
+
+    if request.if_none_match.contains(snapshot.etag):
+        response = Response(status=304)
+    elif 'gzip' in request.accept_encodings:
+        response = Response(snapshot.gzipped, mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = Response(snapshot.body, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.headers['Vary'] = 'Accept-Encoding'
+    response.headers['Cache-Control'] = f"public, max-age={min(30, feed_snapshots.interval)}"
+    return response
+
+@bp.route('/api/feed/status', methods=['GET'])
+def get_feed_snapshot_status():
+    return jsonify(feed_snapshots.get_status())
+
+# Cronologia account indicizzata localmente (solo le operazioni nuove vanno upstream)
+ACCOUNT_NAME_PATTERN = re.compile(r'^[a-z0-9][a-z0-9.-]{1,15}$')
+
+@bp.route('/api/history/<account>', methods=['GET'])
+def get_account_history(account):
+    account = account.lower().lstrip('@')
+    if not ACCOUNT_NAME_PATTERN.match(account):
+        return jsonify({"error": "Invalid account name"}), 400
+    if not client_allowed():
+        return rate_limited_response()
+
+    from_index = request.args.get('from', -1, type=int)
+    limit = max(1, min(request.args.get('limit', 100, type=int), 1000))
+    op_types = [t for t in request.args.get('types', '').split(',') if t]
+    try:
+        start = datetime.fromisoformat(request.args['start']) if request.args.get('start') else None
+        end = datetime.fromisoformat(request.args['end']) if request.args.get('end') else None
+    except ValueError:
+        return jsonify({"error": "Invalid date format"}), 400
+
+    history_indexer.sync(account)
+    if from_index >= 0:
+        history_indexer.backfill(account, max(0, from_index - limit))
+
+    state = history_indexer.get_state(account)
+    if state is None:
+        return jsonify({"error": "Account history unavailable"}), 502
+    if from_index >= 0 and max(0, from_index - limit + 1) < state['oldest_index']:
+        # Pagina più vecchia dell'indice e backfill non riuscito: con [] la SPA crederebbe
+        # finita la cronologia, con 502 passa a steem-js
+        return jsonify({"error": "Older account history unavailable"}), 502
+
+    body = history_indexer.query(
+        account, from_index, limit, op_types, start, end, min_index=state['oldest_index']
+    )
+    response = Response(body, mimetype='application/json')
+    response.headers['X-History-Newest-Index'] = str(state['newest_index'])
+    response.headers['X-History-Oldest-Index'] = str(state['oldest_index'])
+    return response
+
+# Ricerca full-text sui post indicizzati localmente
+@bp.route('/api/search', methods=['GET'])
+def search_posts():
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "Query required"}), 400
+    if build_match_query(query) is None:
+        return jsonify({"error": f"Query too short (min {MIN_QUERY_LENGTH} characters)"}), 400
+    if not client_allowed():
+        return rate_limited_response()
+    limit = max(1, min(request.args.get('limit', 20, type=int), 100))
+    try:
+        results, next_cursor = search_index.search(query, limit, request.args.get('cursor'))
+    except SearchTimeout:
+        return jsonify({"error": "Search timed out", "timeout": True}), 503
+    return jsonify({"results": results, "next_cursor": next_cursor})
+
+# Notifiche SteemWorld salvate sul server: stesso percorso e formato cols/rows dell'API originale
+@bp.route('/api/notifications/<account>/<status>/<int:limit>/<int:offset>', methods=['GET'])
+def get_notifications(account, status, limit, offset):
+    account = account.lower()
+    if not ACCOUNT_NAME_PATTERN.match(account):
+        return jsonify({"code": 400, "error": "Invalid account name"}), 400
+    if status not in ('all', 'new'):
+        return jsonify({"code": 400, "error": "status must be 'all' or 'new'"}), 400
+    limit = max(1, min(limit, MAX_NOTIFICATIONS))
+
+    # Oltre il limite del client si servono le notifiche già salvate
+    min_interval = MIN_REFRESH_INTERVAL if request.args.get('refresh') == '1' else MIN_SYNC_INTERVAL
+    if notification_store.needs_sync(account, min_interval) and client_allowed():
+        notification_store.sync(account, min_interval)
+
+    state = notification_store.get_state(account)
+    if state is None:
+        return jsonify({"code": 502, "error": "Notifications temporarily unavailable"}), 502
+    result = notification_store.query(account, status, limit, offset)
+    result['unread'] = state[0]
+    response = jsonify({"code": 0, "result": result})
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+# Statistiche della dashboard Cur8, aggregate in modo incrementale sul server
+@bp.route('/api/stats/cur8', methods=['GET'])
+def get_cur8_stats():
+    stats = cur8_stats.get_stats()
+    if stats is None:
+        # Prima importazione in corso: la dashboard intanto calcola dagli ultimi post
+        response = jsonify({"error": "Cur8 statistics are being imported", "syncing": True})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(CUR8_FIRST_SYNC_RETRY)
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+    response = jsonify(stats)
+    response.headers['Cache-Control'] = f"public, max-age={CUR8_STATS_TTL}"
+    return response
+
+# Sitemap per i motori di ricerca: indice + file da SHARD_SIZE URL, generati in streaming
+def sitemap_response(chunks, max_age):
+    if chunks is None:
+        return "Sitemap not found", 404
+    response = Response(chunks, mimetype='application/xml')
+    response.headers['Cache-Control'] = f"public, max-age={max_age}"
+    return response
+
+@bp.route('/sitemap.xml')
+def sitemap_index():
+    return sitemap_response(sitemap_builder.sitemap_index(get_site_url()), 300)
+
+@bp.route('/sitemap-<int:n>.xml')
+def sitemap_posts(n):
+    return sitemap_response(sitemap_builder.posts(n, get_site_url()), 300)
+
+@bp.route('/sitemap-profiles-<int:n>.xml')
+def sitemap_profiles(n):
+    return sitemap_response(sitemap_builder.profiles(n, get_site_url()), 3600)
+
+@bp.route('/sitemap-communities.xml')
+def sitemap_communities():
+    return sitemap_response(sitemap_builder.communities(get_site_url()), 3600)
+
+@bp.route('/robots.txt')
+def robots_txt():
+    body = f"User-agent: *\nAllow: /\nSitemap: {get_site_url()}/sitemap.xml\n"
+    return Response(body, mimetype='text/plain')
+
+# Feed RSS/Atom per autore, tag e community (?format=atom per Atom)
+TAG_PATTERN = re.compile(r'^[a-z0-9][a-z0-9-]{0,31}$')
+COMMUNITY_PATTERN = re.compile(r'^hive-\d{1,10}$')
+
+def feed_response(kind, name):
+    fmt = 'atom' if request.args.get('format') == 'atom' else 'rss'
+    feed = feed_cache.peek(kind, name, fmt)
+    if feed is None:
+        if not client_allowed():
+            return rate_limited_response()
+        feed = feed_cache.get(kind, name, fmt, get_site_url())
+    if feed is None:
+        return "Feed temporarily unavailable", 502
+
+    mimetype = 'application/atom+xml' if fmt == 'atom' else 'application/rss+xml'
+    response = Response(feed.body, mimetype=mimetype)
+    response.set_etag(feed.etag)
+    if feed.last_modified:
+        response.last_modified = feed.last_modified
+    response.headers['Cache-Control'] = f"public, max-age={FEED_TTL}"
+    # If-None-Match / If-Modified-Since -> 304 senza corpo
+    return response.make_conditional(request)
+
+@bp.route('/@<account>/feed.xml')
+def author_feed(account):
+    account = account.lower()
+    if not ACCOUNT_NAME_PATTERN.match(account):
+        return "Invalid account name", 400
+    return feed_response('author', account)
+
+@bp.route('/tag/<tag>/feed.xml')
+def tag_feed(tag):
+    tag = tag.lower()
+    if not TAG_PATTERN.match(tag):
+        return "Invalid tag", 400
+    return feed_response('tag', tag)
+
+@bp.route('/community/<name>/feed.xml')
+def community_feed(name):
+    name = name.lower()
+    if not COMMUNITY_PATTERN.match(name):
+        return "Invalid community", 400
+    return feed_response('community', name)
+
+# Anteprime dei post: link card della SPA (batch) e oEmbed per i siti esterni
+def oembed_discovery_link(base_url, post_url):
+    href = f"{base_url}/oembed?url={quote(post_url, safe='')}&format=json"
+    return f'<link rel="alternate" type="application/json+oembed" href="{meta_generator.escape_html(href)}" title="oEmbed" />'
+
+@bp.route('/api/previews', methods=['POST'])
+def get_previews():
+    data = request.get_json(silent=True) or {}
+    urls = data.get('urls')
+    if not isinstance(urls, list) or not urls:
+        return jsonify({"error": "urls must be a non-empty list"}), 400
+    if len(urls) > MAX_PREVIEWS:
+        return jsonify({"error": f"Too many urls (max {MAX_PREVIEWS})"}), 400
+
+    base_url = get_site_url()
+    refs = {url: parse_post_ref(url) for url in urls}
+    valid = [ref for ref in refs.values() if ref]
+    # Un token per ogni post da scaricare: il batch get_content costa upstream quanto i post
+    missing = len(set(valid)) - len(preview_cache.peek_many(valid))
+    if missing and not client_allowed(missing):
+        return rate_limited_response()
+    previews = preview_cache.get_many(valid, base_url)
+
+    results = {}
+    for url, ref in refs.items():
+        preview = previews.get(ref) if ref else None
+        if preview:
+            preview = dict(preview, url=f"{base_url}/@{ref[0]}/{ref[1]}")
+        results[url] = preview
+    response = jsonify({"previews": results})
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Dimensioni dell'embed (oEmbed: width/height interi, mai oltre maxwidth/maxheight)
+OEMBED_WIDTH = 550
+OEMBED_MIN_WIDTH = 200
+OEMBED_HEIGHT = 240
+OEMBED_MIN_HEIGHT = 120
+
+@bp.route('/oembed', methods=['GET'])
+def oembed():
+    ref = parse_post_ref(request.args.get('url', ''))
+    if ref is None:
+        return jsonify({"error": "url must point to a post (/@author/permlink)"}), 404
+    if request.args.get('format', 'json') != 'json':
+        return jsonify({"error": "Only format=json is supported"}), 501
+
+    width = min(request.args.get('maxwidth', OEMBED_WIDTH, type=int), OEMBED_WIDTH)
+    height = min(request.args.get('maxheight', OEMBED_HEIGHT, type=int), OEMBED_HEIGHT)
+    if width < OEMBED_MIN_WIDTH or height < OEMBED_MIN_HEIGHT:
+        return jsonify({"error": f"Embed needs at least {OEMBED_MIN_WIDTH}x{OEMBED_MIN_HEIGHT} pixels"}), 501
+
+    base_url = get_site_url()
+    if not preview_cache.peek_many([ref]) and not client_allowed():
+        return rate_limited_response()
+    preview = preview_cache.get(ref[0], ref[1], base_url)
+    if preview is None:
+        return jsonify({"error": "Post not found"}), 404
+
+    post_url = f"{base_url}/@{ref[0]}/{ref[1]}"
+    escape = meta_generator.escape_html
+    html = (
+        f'<blockquote class="cur8-embed" style="box-sizing:border-box;width:{width}px;'
+        f'max-width:100%;height:{height}px;overflow:hidden">'
+        f'<p><a href="{escape(post_url)}">{escape(preview["title"])}</a></p>'
+        f'<p>{escape(preview["description"])}</p>'
+        f'<p>&mdash; <a href="{escape(base_url)}/@{escape(ref[0])}">@{escape(ref[0])}</a> on cur8.fun</p>'
+        '</blockquote>'
+    )
+    result = {
+        "version": "1.0",
+        "type": "rich",
+        "title": preview['title'],
+        "author_name": ref[0],
+        "author_url": f"{base_url}/@{ref[0]}",
+        "provider_name": "cur8.fun",
+        "provider_url": base_url,
+        "cache_age": PREVIEW_TTL,
+        "html": html,
+        "width": width,
+        "height": height,
+    }
+    if preview['image']:
+        result["thumbnail_url"] = preview['image']
+    response = jsonify(result)
+    response.headers['Cache-Control'] = f"public, max-age={PREVIEW_TTL}"
+    return response
+
 # Start publisher service in development
 if __name__ == '__main__':
+    app = create_app()
     publisher.start()
     try:
         app.run(debug=True, threaded=True)
@@ -0,0 +1,42 @@
+"""
+Lock e istante dell'ultima sincronizzazione per account, con memoria limitata
+
+Gli indici per account (cronologia, notifiche) accettano qualsiasi nome valido: un
+dizionario con un lock per account crescerebbe senza limiti. I lock sono quindi un
+numero fisso, scelto dall'hash del nome (due account possono condividerne uno e
+sincronizzarsi uno dopo l'altro), e gli istanti di sincronizzazione un LRU.
+"""
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+LOCK_STRIPES = 64
+MAX_TRACKED_ACCOUNTS = 10000
+
+
+class AccountSyncState:
+    def __init__(self, stripes=LOCK_STRIPES, max_accounts=MAX_TRACKED_ACCOUNTS):
+        self.max_accounts = max_accounts
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        self._last_sync = OrderedDict()  # account -> time.time() dell'ultima sincronizzazione
+        self._guard = threading.Lock()
+
+    def lock_for(self, account):
+        return self._locks[zlib.crc32(account.encode('utf-8')) % len(self._locks)]
+
+    def last_sync(self, account):
+        """Istante dell'ultima sincronizzazione, 0 se mai fatta (o dimenticata)"""
+        with self._guard:
+            return self._last_sync.get(account, 0)
+
+    def mark_synced(self, account, when=None):
+        with self._guard:
+            self._last_sync[account] = time.time() if when is None else when
+            self._last_sync.move_to_end(account)
+            while len(self._last_sync) > self.max_accounts:
+                self._last_sync.popitem(last=False)
+
+    def __len__(self):
+        with self._guard:
+            return len(self._last_sync)
@@ -0,0 +1,175 @@
+"""
+Push dello stato della chain ai client tramite Server-Sent Events
+
+Un solo poller lato server legge proprietà globali, reward fund e prezzo mediano
+circa ad ogni blocco e invia ai client connessi solo i campi cambiati. Ogni client
+ha una coda con i frame già serializzati: il fan-out non ricodifica nulla.
+
+Ogni stream resta in attesa sulla propria coda. In produzione (wsgi.py con worker
+gunicorn gevent) threading e queue sono patchati e ogni client inattivo costa un
+greenlet; con thread veri (server di sviluppo) il numero di client viene limitato.
+"""
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+
+from python.concurrency import cooperative_threads
+from python.rpc_proxy import rpc_proxy
+
+logger = logging.getLogger(__name__)
+
+# chiave nello stato -> (metodo, parametri)
+SOURCES = {
+    'props': ('condenser_api.get_dynamic_global_properties', []),
+    'reward_fund': ('condenser_api.get_reward_fund', ['post']),
+    'median_price': ('condenser_api.get_current_median_history_price', []),
+}
+
+MAX_GREEN_SUBSCRIBERS = 10000   # worker gevent: un greenlet per client
+MAX_THREAD_SUBSCRIBERS = 64     # un thread del server per client
+
+
+def diff_fields(old, new):
+    """Campi di primo livello di new diversi da old"""
+    if not isinstance(old, dict) or not isinstance(new, dict):
+        return new if old != new else None
+    changed = {k: v for k, v in new.items() if old.get(k) != v}
+    return changed or None
+
+
+def format_event(event, data, event_id=None):
+    """Serializza un evento SSE"""
+    frame = f"event: {event}\n"
+    if event_id is not None:
+        frame += f"id: {event_id}\n"
+    return frame + f"data: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class ChainStateBroadcaster:
+    def __init__(self, interval=3, keepalive=15, queue_size=32, max_subscribers=None):
+        self.interval = interval
+        self.keepalive = keepalive
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.state = {}
+        self.running = False
+        self._thread = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Avvia il poller (idempotente)"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+        logger.info("Chain state broadcaster started")
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def subscribe(self):
+        """Registra un nuovo client; restituisce la sua coda o None se al limite"""
+        self.start()
+        limit = self.max_subscribers or (
+            MAX_GREEN_SUBSCRIBERS if cooperative_threads() else MAX_THREAD_SUBSCRIBERS
+        )
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if len(self._subscribers) >= limit:
+                return None
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber):
+        """Generatore dei frame SSE per un client"""
+        try:
+            yield f"retry: {int(self.interval * 1000)}\n\n"
+            state = self.state
+            if state:
+                yield format_event('snapshot', state, self._event_id())
+            while self.running:
+                try:
+                    yield subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    with self._lock:
+                        if subscriber not in self._subscribers:
+                            return
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def get_status(self):
+        with self._lock:
+            subscribers = len(self._subscribers)
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'subscribers': subscribers,
+            'head_block_number': self._event_id()
+        }
+
+    def _event_id(self):
+        return self.state.get('props', {}).get('head_block_number')
+
+    def _run(self):
+        while self.running:
+            started = time.time()
+            with self._lock:
+                has_subscribers = bool(self._subscribers)
+            if has_subscribers or not self.state:
+                try:
+                    self._poll()
+                except Exception as e:
+                    logger.error(f"Error polling chain state: {e}")
+            time.sleep(max(0.0, self.interval - (time.time() - started)))
+
+    def _poll(self):
+        # Una sola chiamata batch attraverso il proxy: riscalda anche la cache di /rpc
+        keys = list(SOURCES)
+        responses = rpc_proxy.handle([
+            {"jsonrpc": "2.0", "method": SOURCES[key][0], "params": SOURCES[key][1], "id": n}
+            for n, key in enumerate(keys)
+        ])
+
+        # Copia-e-sostituisci: gli stream leggono self.state senza lock
+        state = dict(self.state)
+        delta = {}
+        for key, response in zip(keys, responses):
+            result = response.get('result')
+            if not result:
+                continue
+            changed = diff_fields(state.get(key), result)
+            if changed:
+                delta[key] = changed
+                state[key] = result
+
+        if delta:
+            self.state = state
+            self._broadcast(format_event('delta', delta, self._event_id()))
+
+    def _broadcast(self, frame):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(frame)
+            except queue.Full:
+                # Client troppo lento: lo scolleghiamo, si riconnetterà e riceverà lo snapshot
+                self.unsubscribe(subscriber)
+
+
+# Istanza globale
+chain_state = ChainStateBroadcaster()
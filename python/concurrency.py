@@ -0,0 +1,72 @@
+"""
+Thread veri o greenlet: in produzione i worker gunicorn gevent patchano threading
+
+Sotto gevent una chiamata bloccante che non passa dal loop (SQLite, calcoli lunghi)
+ferma tutti i greenlet del worker, compresi gli stream SSE; run_blocking la sposta
+nel threadpool dell'hub. Con thread veri (server di sviluppo) la esegue direttamente.
+
+UpstreamSlots limita le chiamate contemporanee verso un servizio esterno (nodi Steem,
+SteemWorld): oltre il limite si aspetta poco e poi si rinuncia, invece di accumulare
+richieste bloccate su un servizio già lento.
+"""
+import threading
+
+
+def cooperative_threads():
+    """True se threading è stato patchato da gevent (worker asincrono)"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        return False
+    return monkey.is_module_patched('threading')
+
+
+def run_blocking(fn, *args):
+    """Risultato di fn(*args) eseguita in un thread vero del sistema operativo"""
+    if cooperative_threads():
+        import gevent
+        return gevent.get_hub().threadpool.apply(fn, args)
+    return fn(*args)
+
+
+class UpstreamOverloaded(TimeoutError):
+    """Richiesta scartata perché troppe chiamate verso il servizio sono già in corso"""
+
+
+class UpstreamSlots:
+    def __init__(self, limit, max_wait, name='upstream'):
+        self.limit = limit
+        self.max_wait = max_wait
+        self.name = name
+        self.in_flight = 0
+        self.shed = 0
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+
+    def try_acquire(self, timeout=0):
+        """Prende un posto entro timeout secondi; False se non si è liberato"""
+        if not self._slots.acquire(timeout=timeout):
+            return False
+        with self._lock:
+            self.in_flight += 1
+        return True
+
+    def acquire(self):
+        """Prende un posto entro max_wait, altrimenti UpstreamOverloaded"""
+        if not self.try_acquire(self.max_wait):
+            with self._lock:
+                self.shed += 1
+            raise UpstreamOverloaded(f"More than {self.limit} {self.name} calls in flight")
+
+    def release(self, *_):
+        # Argomenti ignorati: si può usare come done callback di un future
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -0,0 +1,309 @@
+"""
+Statistiche aggregate dei post con tag cur8 (dashboard Cur8 Stats)
+
+I post vengono scaricati in modo incrementale e gli aggregati per autore, per giorno e
+per fascia di payout vengono aggiornati con la differenza rispetto ai valori già
+conteggiati, senza mai ricalcolare tutto. A ogni sincronizzazione si riscaricano i post
+ancora nella finestra di payout (voti e payout cambiano per 7 giorni) e qualche pagina
+di post più vecchi, finché tutta la storia del tag è stata importata.
+"""
+import calendar
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func
+
+from python.models import db, Cur8Post, Cur8AuthorStats, Cur8DailyStats, Cur8PayoutBucket, Cur8StatsState
+from python.rpc_proxy import rpc_proxy
+from python.search_index import search_index
+
+logger = logging.getLogger(__name__)
+
+TAG = 'cur8'
+PAGE_SIZE = 100
+PAYOUT_WINDOW = timedelta(days=7)
+MAX_REFRESH_PAGES = 20
+BACKFILL_PAGES_PER_SYNC = 5
+SYNC_INTERVAL = 300         # secondi
+STATS_TTL = 60              # risposta già calcolata
+FIRST_SYNC_RETRY = 10       # secondi (Retry-After) finché la prima sincronizzazione è in corso
+TOP_LIMIT = 10
+
+PAYOUT_BUCKETS = ['0-1', '1-5', '5-10', '10-50', '50+']
+
+
+def parse_amount(value):
+    try:
+        return float(str(value).split(' ')[0])
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def payout_bucket(payout):
+    if payout < 1:
+        return '0-1'
+    if payout < 5:
+        return '1-5'
+    if payout < 10:
+        return '5-10'
+    if payout < 50:
+        return '10-50'
+    return '50+'
+
+
+def post_values(post):
+    """(voti, commenti, payout) calcolati come nella dashboard"""
+    votes = post.get('net_votes') or len(post.get('active_votes') or [])
+    payout = sum(parse_amount(post.get(field)) for field in
+                 ('pending_payout_value', 'total_payout_value', 'curator_payout_value'))
+    return votes, int(post.get('children') or 0), payout
+
+
+def parse_created(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Cur8StatsAggregator:
+    def __init__(self):
+        self._sync_lock = threading.Lock()
+        self._last_sync = 0
+        self._cached = None  # (calcolato il, statistiche)
+
+    def get_stats(self):
+        """Statistiche precalcolate; avvia in background la sincronizzazione se è ora.
+        None finché la prima sincronizzazione non ha importato nessun post"""
+        self._maybe_sync()
+        cached = self._cached
+        if cached and time.time() - cached[0] < STATS_TTL:
+            return cached[1]
+        if self.first_sync_pending():
+            return None
+        stats = self.build_stats()
+        self._cached = (time.time(), stats)
+        return stats
+
+    def _maybe_sync(self):
+        if time.time() - self._last_sync < SYNC_INTERVAL:
+            return
+        if not self._sync_lock.acquire(blocking=False):
+            return
+        app = current_app._get_current_object()
+        threading.Thread(target=self._sync_in_background, args=(app,), daemon=True).start()
+
+    def first_sync_pending(self):
+        """True se nessun processo ha ancora completato la prima sincronizzazione e non c'è
+        nessun post: meglio dirlo alla dashboard che mostrare zero post"""
+        state = db.session.get(Cur8StatsState, 1)
+        if state is not None and (state.backfill_done or state.backfill_author is not None):
+            return False
+        return db.session.query(Cur8Post.author).first() is None
+
+    def _sync_in_background(self, app):
+        try:
+            with app.app_context():
+                self.sync()
+        except Exception as e:
+            logger.error(f"Cur8 stats sync failed: {e}")
+        finally:
+            self._last_sync = time.time()
+            self._cached = None
+            self._sync_lock.release()
+
+    def sync(self):
+        """Aggiorna gli aggregati; con più processi ne sincronizza uno solo per intervallo"""
+        if not self._claim():
+            return
+        state = db.session.get(Cur8StatsState, 1)
+
+        # Post nuovi e post ancora in pagamento, dal più recente. Alla prima sincronizzazione
+        # ci si ferma alla fine della finestra di payout: il resto lo scarica il backfill
+        first_sync = state.backfill_author is None and not state.backfill_done
+        window_start = datetime.utcnow() - PAYOUT_WINDOW
+        start = None
+        for _ in range(MAX_REFRESH_PAGES):
+            page = self._fetch_page(start)
+            if not page:
+                break
+            known = self._apply(page)
+            start = page[-1]
+            oldest = parse_created(start.get('created'))
+            # Oltre la finestra si continua solo finché ci sono post mai visti (es. server fermo a lungo)
+            if len(page) < PAGE_SIZE - 1 or (oldest and oldest < window_start and (known or first_sync)):
+                break
+        if first_sync:
+            if start:
+                state.backfill_author, state.backfill_permlink = start['author'], start['permlink']
+            else:
+                state.backfill_done = True
+        db.session.commit()
+
+        # Storia più vecchia, qualche pagina per volta
+        for _ in range(BACKFILL_PAGES_PER_SYNC):
+            if state.backfill_done or state.backfill_author is None:
+                break
+            page = self._fetch_page({'author': state.backfill_author, 'permlink': state.backfill_permlink})
+            if page is None:
+                break
+            if not page:
+                state.backfill_done = True
+            else:
+                self._apply(page)
+                state.backfill_author, state.backfill_permlink = page[-1]['author'], page[-1]['permlink']
+            db.session.commit()
+
+    def _claim(self):
+        """Prende il turno di sincronizzazione in modo atomico (più worker sullo stesso database)"""
+        if db.session.get(Cur8StatsState, 1) is None:
+            db.session.add(Cur8StatsState(id=1, backfill_done=False))
+            try:
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+        now = datetime.utcnow()
+        result = db.session.execute(
+            db.update(Cur8StatsState)
+            .where(Cur8StatsState.id == 1)
+            .where((Cur8StatsState.synced_at.is_(None)) |
+                   (Cur8StatsState.synced_at < now - timedelta(seconds=SYNC_INTERVAL - 5)))
+            .values(synced_at=now)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+
+    def _fetch_page(self, start):
+        """Pagina di post cur8 dal più recente; start = ultimo post della pagina precedente"""
+        query = {"tag": TAG, "limit": PAGE_SIZE}
+        if start:
+            query.update(start_author=start['author'], start_permlink=start['permlink'])
+        page = rpc_proxy.call('condenser_api.get_discussions_by_created', [query])
+        if not isinstance(page, list):
+            logger.warning(f"Cur8 stats fetch failed (start={start})")
+            return None
+        search_index.ingest(page)
+        if start and page and page[0].get('permlink') == start['permlink']:
+            page = page[1:]  # il primo risultato è l'ultimo della pagina precedente
+        return [post for post in page if post.get('author') and post.get('permlink')]
+
+    def _apply(self, posts):
+        """Aggiunge i post agli aggregati (solo le differenze per quelli già contati);
+        restituisce True se almeno uno era già conosciuto"""
+        any_known = False
+        for post in posts:
+            created = parse_created(post.get('created'))
+            if created is None:
+                continue
+            votes, comments, payout = post_values(post)
+            row = db.session.get(Cur8Post, (post['author'], post['permlink']))
+            if row is None:
+                row = Cur8Post(author=post['author'], permlink=post['permlink'], created=created,
+                               votes=0, comments=0, payout=0.0)
+                db.session.add(row)
+                new_post = 1
+            else:
+                any_known = True
+                new_post = 0
+                self._bucket(payout_bucket(row.payout)).posts -= 1
+            self._bucket(payout_bucket(payout)).posts += 1
+
+            d_votes, d_comments, d_payout = votes - row.votes, comments - row.comments, payout - row.payout
+            for aggregate in (self._author(row.author), self._day(row.created.date())):
+                aggregate.posts += new_post
+                aggregate.votes += d_votes
+                aggregate.comments += d_comments
+                aggregate.payout += d_payout
+
+            row.title = (post.get('title') or '')[:255]
+            row.votes, row.comments, row.payout = votes, comments, payout
+        db.session.flush()
+        return any_known
+
+    def _author(self, author):
+        stats = db.session.get(Cur8AuthorStats, author)
+        if stats is None:
+            stats = Cur8AuthorStats(author=author, posts=0, votes=0, comments=0, payout=0.0)
+            db.session.add(stats)
+        return stats
+
+    def _day(self, day):
+        stats = db.session.get(Cur8DailyStats, day)
+        if stats is None:
+            stats = Cur8DailyStats(day=day, posts=0, votes=0, comments=0, payout=0.0)
+            db.session.add(stats)
+        return stats
+
+    def _bucket(self, bucket):
+        row = db.session.get(Cur8PayoutBucket, bucket)
+        if row is None:
+            row = Cur8PayoutBucket(bucket=bucket, posts=0)
+            db.session.add(row)
+        return row
+
+    def build_stats(self):
+        """Statistiche nello stesso formato calcolato finora dalla dashboard"""
+        posts, votes, comments, payout = db.session.query(
+            func.coalesce(func.sum(Cur8DailyStats.posts), 0),
+            func.coalesce(func.sum(Cur8DailyStats.votes), 0),
+            func.coalesce(func.sum(Cur8DailyStats.comments), 0),
+            func.coalesce(func.sum(Cur8DailyStats.payout), 0.0),
+        ).one()
+
+        time_distribution = {}
+        first_day = last_day = None
+        for day, day_posts in db.session.query(Cur8DailyStats.day, Cur8DailyStats.posts):
+            name = calendar.day_name[day.weekday()]
+            time_distribution[name] = time_distribution.get(name, 0) + day_posts
+            first_day = min(first_day or day, day)
+            last_day = max(last_day or day, day)
+
+        buckets = dict(db.session.query(Cur8PayoutBucket.bucket, Cur8PayoutBucket.posts))
+        top_authors = Cur8AuthorStats.query.order_by(Cur8AuthorStats.payout.desc()).limit(TOP_LIMIT).all()
+        top_posts = Cur8Post.query.order_by(Cur8Post.payout.desc()).limit(TOP_LIMIT).all()
+        recent_posts = Cur8Post.query.order_by(Cur8Post.created.desc()).limit(TOP_LIMIT).all()
+        state = db.session.get(Cur8StatsState, 1)
+
+        return {
+            'totalPosts': posts,
+            'totalAuthors': Cur8AuthorStats.query.count(),
+            'totalVotes': votes,
+            'totalComments': comments,
+            'totalPayout': round(payout, 3),
+            'averageVotes': round(votes / posts) if posts else 0,
+            'averageComments': round(comments / posts) if posts else 0,
+            'averagePayout': f"{payout / posts:.2f}" if posts else 0,
+            'topAuthors': [
+                {'author': a.author, 'posts': a.posts, 'totalVotes': a.votes,
+                 'totalComments': a.comments, 'totalPayout': round(a.payout, 3)}
+                for a in top_authors
+            ],
+            'topPosts': [self._post_summary(p) for p in top_posts],
+            'recentPosts': [self._post_summary(p) for p in recent_posts],
+            'timeDistribution': time_distribution,
+            'payoutDistribution': {bucket: buckets.get(bucket, 0) for bucket in PAYOUT_BUCKETS},
+            'coverage': {
+                'from': first_day.isoformat() if first_day else None,
+                'to': last_day.isoformat() if last_day else None,
+                'complete': bool(state and state.backfill_done),
+            },
+        }
+
+    @staticmethod
+    def _post_summary(post):
+        return {
+            'author': post.author,
+            'permlink': post.permlink,
+            'title': post.title,
+            'created': post.created.isoformat(),
+            'votes': post.votes,
+            'comments': post.comments,
+            'payout': round(post.payout, 3),
+        }
+
+
+# Istanza globale
+cur8_stats = Cur8StatsAggregator()
@@ -0,0 +1,212 @@
+"""
+Snapshot precalcolati dei feed ordinati (trending/hot/created) per tag e community
+
+Un worker in background aggiorna la prima pagina dei feed configurati e la conserva
+già serializzata (e compressa) con il suo ETag: servire /api/feed è una lettura in
+memoria invece di una chiamata upstream da centinaia di millisecondi.
+
+Configurazione tramite variabili d'ambiente:
+    FEED_SNAPSHOT_TAGS         tag separati da virgola ("" = home)
+    FEED_SNAPSHOT_COMMUNITIES  community separate da virgola (hive-xxxxxx)
+    FEED_SNAPSHOT_SORTS        ordinamenti da precalcolare
+    FEED_SNAPSHOT_INTERVAL     secondi tra un aggiornamento e l'altro
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from python.rpc_proxy import rpc_proxy, MAX_BATCH_SIZE
+from python.search_index import search_index
+
+logger = logging.getLogger(__name__)
+
+CONDENSER_SORTS = {
+    'trending': 'condenser_api.get_discussions_by_trending',
+    'hot': 'condenser_api.get_discussions_by_hot',
+    'created': 'condenser_api.get_discussions_by_created',
+    'promoted': 'condenser_api.get_discussions_by_promoted',
+}
+BRIDGE_SORTS = {'trending', 'hot', 'created', 'payout', 'muted'}
+
+CONDENSER_LIMIT = 50
+BRIDGE_LIMIT = 20  # massimo accettato da bridge.get_ranked_posts
+
+# Feed richiesti ma non configurati: conservati per un intervallo, in numero limitato
+MAX_ON_DEMAND = 256
+
+
+def _env_list(name, default):
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return [item.strip().lower() for item in value.split(',')]
+
+
+def is_community(tag):
+    return tag.startswith('hive-')
+
+
+def is_valid_feed(sort, tag):
+    if is_community(tag):
+        return sort in BRIDGE_SORTS
+    return sort in CONDENSER_SORTS
+
+
+def build_request(sort, tag, request_id=1):
+    """Richiesta JSON-RPC per la prima pagina di un feed"""
+    if is_community(tag):
+        return {
+            "jsonrpc": "2.0",
+            "method": "bridge.get_ranked_posts",
+            "params": {"tag": tag, "sort": sort, "limit": BRIDGE_LIMIT, "observer": ""},
+            "id": request_id
+        }
+    return {
+        "jsonrpc": "2.0",
+        "method": CONDENSER_SORTS[sort],
+        "params": [{"tag": tag, "limit": CONDENSER_LIMIT}],
+        "id": request_id
+    }
+
+
+class FeedSnapshot:
+    """Prima pagina di un feed, già pronta per la risposta HTTP"""
+    __slots__ = ('body', 'gzipped', 'etag', 'updated_at', 'count')
+
+    def __init__(self, posts):
+        self.body = json.dumps(posts, separators=(',', ':')).encode('utf-8')
+        self.gzipped = gzip.compress(self.body, compresslevel=6)
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.updated_at = time.time()
+        self.count = len(posts)
+
+
+class FeedSnapshotWorker:
+    def __init__(self):
+        self.interval = int(os.environ.get('FEED_SNAPSHOT_INTERVAL', 60))
+        self.sorts = _env_list('FEED_SNAPSHOT_SORTS', ['trending', 'hot', 'created'])
+        tags = _env_list('FEED_SNAPSHOT_TAGS', ['', 'steem', 'cur8'])
+        communities = _env_list('FEED_SNAPSHOT_COMMUNITIES', ['hive-196037'])
+        self.feeds = [
+            (sort, tag) for tag in tags + communities for sort in self.sorts
+            if is_valid_feed(sort, tag)
+        ]
+        self.running = False
+        self._thread = None
+        self._snapshots = {}
+        self._on_demand = OrderedDict()
+        self._lock = threading.Lock()
+
+    def start(self):
+        """Avvia il worker (idempotente)"""
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        atexit.register(self.stop)
+        logger.info(f"Feed snapshot worker started for {len(self.feeds)} feeds")
+
+    def stop(self):
+        self.running = False
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def peek(self, sort, tag):
+        """Snapshot già pronto (precalcolato o su richiesta non scaduto), senza chiamate upstream"""
+        self.start()
+        key = (sort, tag)
+        snapshot = self._snapshots.get(key)
+        if snapshot:
+            return snapshot
+        with self._lock:
+            snapshot = self._on_demand.get(key)
+            if snapshot and time.time() - snapshot.updated_at < self.interval:
+                self._on_demand.move_to_end(key)
+                return snapshot
+        return None
+
+    def get(self, sort, tag):
+        """Snapshot di un feed; i feed non configurati vengono caricati su richiesta"""
+        key = (sort, tag)
+        snapshot = self.peek(sort, tag)
+        if snapshot:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._on_demand.get(key)
+        fresh = self._fetch([key]).get(key)
+        if fresh is None:
+            # Upstream in errore: meglio uno snapshot scaduto che niente
+            return snapshot
+        with self._lock:
+            self._on_demand[key] = fresh
+            self._on_demand.move_to_end(key)
+            while len(self._on_demand) > MAX_ON_DEMAND:
+                self._on_demand.popitem(last=False)
+        return fresh
+
+    def get_status(self):
+        now = time.time()
+        return {
+            'running': self.running,
+            'interval': self.interval,
+            'feeds': [
+                {
+                    'sort': sort,
+                    'tag': tag,
+                    'posts': self._snapshots[(sort, tag)].count,
+                    'age': round(now - self._snapshots[(sort, tag)].updated_at, 1)
+                } if (sort, tag) in self._snapshots else {'sort': sort, 'tag': tag, 'posts': None}
+                for sort, tag in self.feeds
+            ],
+            'on_demand': len(self._on_demand)
+        }
+
+    def refresh(self):
+        """Aggiorna tutti i feed configurati con una sola chiamata batch"""
+        snapshots = self._fetch(self.feeds)
+        # In caso di errore (es. -32003 da alcuni nodi) si mantiene lo snapshot precedente
+        self._snapshots = {**self._snapshots, **snapshots}
+        return len(snapshots)
+
+    def _fetch(self, feeds):
+        responses = []
+        for start in range(0, len(feeds), MAX_BATCH_SIZE):
+            chunk = feeds[start:start + MAX_BATCH_SIZE]
+            responses.extend(rpc_proxy.handle([
+                build_request(sort, tag, n) for n, (sort, tag) in enumerate(chunk)
+            ]))
+
+        snapshots = {}
+        for key, response in zip(feeds, responses):
+            posts = response.get('result')
+            if isinstance(posts, list):
+                snapshots[key] = FeedSnapshot(posts)
+                search_index.ingest(posts)
+            else:
+                logger.warning(f"Feed snapshot {key[0]}/{key[1] or 'home'} failed: {response.get('error')}")
+        return snapshots
+
+    def _run(self):
+        while self.running:
+            started = time.time()
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.error(f"Error refreshing feed snapshots: {e}")
+            for _ in range(max(1, int(self.interval - (time.time() - started)))):
+                if not self.running:
+                    break
+                time.sleep(1)
+
+
+# Istanza globale
+feed_snapshots = FeedSnapshotWorker()
@@ -0,0 +1,207 @@
+"""
+Feed RSS 2.0 / Atom per autore, tag e community
+
+I documenti generati restano in cache per qualche minuto con ETag e Last-Modified:
+i lettori di feed, che interrogano di continuo, ricevono quasi sempre un 304 senza
+nessuna chiamata verso i nodi.
+"""
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from xml.sax.saxutils import escape as xml_escape
+
+from python.rpc_proxy import rpc_proxy
+from python.search_index import search_index
+from python.steem_client import steem_client
+
+FEED_TTL = 300              # secondi
+FEED_LIMIT = 20
+MAX_CACHED_FEEDS = 1024
+SUMMARY_LENGTH = 300
+
+FEED_KINDS = ('author', 'tag', 'community')
+
+# Caratteri di controllo non ammessi in XML 1.0: uno solo rende illeggibile tutto il feed
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# Data fissa per i feed vuoti: con "adesso" l'ETag cambierebbe a ogni richiesta
+EMPTY_FEED_UPDATED = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def escape(value):
+    """Testo sicuro per elementi e attributi XML (tra virgolette doppie)"""
+    return xml_escape(INVALID_XML_CHARS.sub('', str(value)), {'"': '&quot;'})
+
+
+def parse_created(value):
+    """Timestamp Steem (UTC senza fuso) come datetime con fuso"""
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=timezone.utc)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
+
+
+def feed_request(kind, name):
+    """(metodo, parametri) per la pagina più recente del feed"""
+    if kind == 'author':
+        return 'condenser_api.get_discussions_by_blog', [{"tag": name, "limit": FEED_LIMIT}]
+    if kind == 'community':
+        return 'bridge.get_ranked_posts', {"tag": name, "sort": "created", "limit": FEED_LIMIT, "observer": ""}
+    return 'condenser_api.get_discussions_by_created', [{"tag": name, "limit": FEED_LIMIT}]
+
+
+def feed_title(kind, name):
+    if kind == 'author':
+        return f"@{name} on cur8.fun"
+    if kind == 'community':
+        return f"{name} community on cur8.fun"
+    return f"#{name} on cur8.fun"
+
+
+def feed_path(kind, name):
+    if kind == 'author':
+        return f"/@{name}"
+    if kind == 'community':
+        return f"/community/{name}"
+    return f"/tag/{name}"
+
+
+def post_item(post, base_url):
+    """Campi di un elemento del feed; riassunto e immagine come per i meta tag"""
+    metadata = steem_client.parse_metadata(post.get('json_metadata'))
+    body = post.get('body', '')
+    return {
+        'title': post.get('title') or post['permlink'],
+        'link': f"{base_url}/@{post['author']}/{post['permlink']}",
+        'author': post['author'],
+        'category': post.get('category') or '',
+        'published': parse_created(post.get('created')),
+        'updated': parse_created(post.get('last_update') or post.get('created')),
+        'summary': steem_client.create_description(body, SUMMARY_LENGTH),
+        'image': steem_client.extract_image_from_post(body, metadata),
+    }
+
+
+def render_rss(title, link, self_url, items):
+    updated = max((item['updated'] for item in items), default=EMPTY_FEED_UPDATED)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" '
+        'xmlns:media="http://search.yahoo.com/mrss/" xmlns:dc="http://purl.org/dc/elements/1.1/">\n'
+        '<channel>\n',
+        f"<title>{escape(title)}</title>\n<link>{escape(link)}</link>\n"
+        f"<description>{escape(title)}</description>\n"
+        f'<atom:link href="{escape(self_url)}" rel="self" type="application/rss+xml"/>\n'
+        f"<lastBuildDate>{format_datetime(updated)}</lastBuildDate>\n<ttl>{FEED_TTL // 60}</ttl>\n"
+    ]
+    for item in items:
+        parts.append(
+            f"<item>\n<title>{escape(item['title'])}</title>\n"
+            f"<link>{escape(item['link'])}</link>\n"
+            f'<guid isPermaLink="true">{escape(item["link"])}</guid>\n'
+            f"<dc:creator>{escape(item['author'])}</dc:creator>\n"
+            f"<pubDate>{format_datetime(item['published'])}</pubDate>\n"
+            + (f"<category>{escape(item['category'])}</category>\n" if item['category'] else '')
+            + f"<description>{escape(item['summary'])}</description>\n"
+            + (f'<media:content url="{escape(item["image"])}" medium="image"/>\n' if item['image'] else '')
+            + "</item>\n"
+        )
+    parts.append('</channel>\n</rss>\n')
+    return ''.join(parts)
+
+
+def render_atom(title, link, self_url, items):
+    updated = max((item['updated'] for item in items), default=EMPTY_FEED_UPDATED)
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f"<title>{escape(title)}</title>\n<id>{escape(link)}</id>\n"
+        f'<link href="{escape(link)}"/>\n<link href="{escape(self_url)}" rel="self"/>\n'
+        f"<updated>{updated.isoformat()}</updated>\n"
+    ]
+    for item in items:
+        parts.append(
+            f"<entry>\n<title>{escape(item['title'])}</title>\n"
+            f"<id>{escape(item['link'])}</id>\n"
+            f'<link href="{escape(item["link"])}"/>\n'
+            f"<author><name>{escape(item['author'])}</name></author>\n"
+            f"<published>{item['published'].isoformat()}</published>\n"
+            f"<updated>{item['updated'].isoformat()}</updated>\n"
+            + (f'<category term="{escape(item["category"])}"/>\n' if item['category'] else '')
+            + f"<summary>{escape(item['summary'])}</summary>\n"
+            + (f'<link rel="enclosure" href="{escape(item["image"])}"/>\n' if item['image'] else '')
+            + "</entry>\n"
+        )
+    parts.append('</feed>\n')
+    return ''.join(parts)
+
+
+class RenderedFeed:
+    """Documento del feed pronto per la risposta HTTP"""
+    __slots__ = ('body', 'etag', 'last_modified', 'created_at')
+
+    def __init__(self, body, last_modified):
+        self.body = body.encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()[:20]
+        self.last_modified = last_modified
+        self.created_at = time.time()
+
+
+class FeedCache:
+    def __init__(self, ttl=FEED_TTL, max_entries=MAX_CACHED_FEEDS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # (tipo, nome, formato) -> RenderedFeed
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'renders': 0}
+
+    def peek(self, kind, name, fmt):
+        """Feed in cache non scaduto, senza chiamate upstream"""
+        key = (kind, name, fmt)
+        with self._lock:
+            feed = self._cache.get(key)
+            if feed and time.time() - feed.created_at < self.ttl:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return feed
+        return None
+
+    def get(self, kind, name, fmt, base_url):
+        """Feed in cache o appena generato; None se i nodi non rispondono e non c'è una copia.
+        base_url è il SITE_URL dell'app, lo stesso per ogni richiesta: non fa parte della chiave"""
+        feed = self.peek(kind, name, fmt)
+        if feed:
+            return feed
+
+        key = (kind, name, fmt)
+        method, params = feed_request(kind, name)
+        posts = rpc_proxy.call(method, params)
+        if not isinstance(posts, list):
+            # Upstream in errore: meglio il feed scaduto che niente
+            with self._lock:
+                return self._cache.get(key)
+
+        if kind == 'author':
+            posts = [post for post in posts if post.get('author') == name]  # senza i reblog
+        search_index.ingest(posts)
+        items = [post_item(post, base_url) for post in posts if post.get('permlink')]
+
+        render = render_atom if fmt == 'atom' else render_rss
+        link = f"{base_url}{feed_path(kind, name)}"
+        self_url = f"{link}/feed.xml" + ('?format=atom' if fmt == 'atom' else '')
+        last_modified = max((item['updated'] for item in items), default=None)
+        feed = RenderedFeed(render(feed_title(kind, name), link, self_url, items), last_modified)
+
+        with self._lock:
+            self.stats['renders'] += 1
+            self._cache[key] = feed
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return feed
+
+
+# Istanza globale
+feed_cache = FeedCache()
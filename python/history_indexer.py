@@ -0,0 +1,162 @@
+"""
+Indice locale e incrementale della cronologia degli account (wallet)
+
+Le operazioni vengono salvate in SQLite con chiave (account, indice operazione): ad
+ogni visita si scaricano solo quelle più recenti dell'ultimo indice salvato, mentre
+le pagine più vecchie vengono scaricate una sola volta, quando richieste.
+"""
+import json
+import logging
+import time
+from datetime import datetime
+
+from python.account_sync import AccountSyncState
+from python.models import db, insert_ignore, HistoryAccount, AccountHistoryOp
+from python.rpc_proxy import rpc_proxy
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000            # massimo accettato da get_account_history
+DELTA_PAGE_SIZE = 100
+MAX_PAGES_PER_SYNC = 10     # primo caricamento: al massimo le 10000 operazioni più recenti
+MIN_SYNC_INTERVAL = 3       # secondi, circa un blocco
+
+
+def parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return datetime.utcnow()
+
+
+class AccountHistoryIndexer:
+    def __init__(self):
+        self._accounts = AccountSyncState()
+
+    def sync(self, account):
+        """Scarica le operazioni più recenti dell'ultimo indice salvato"""
+        if time.time() - self._accounts.last_sync(account) < MIN_SYNC_INTERVAL:
+            return
+        with self._accounts.lock_for(account):
+            if time.time() - self._accounts.last_sync(account) < MIN_SYNC_INTERVAL:
+                return
+            state = db.session.get(HistoryAccount, account) or HistoryAccount(
+                account=account, newest_index=-1, oldest_index=-1
+            )
+            known = state.newest_index
+
+            # Visite successive: di solito le operazioni nuove sono poche, si parte con una pagina piccola
+            start, limit = -1, (DELTA_PAGE_SIZE if known >= 0 else PAGE_SIZE)
+            newest = lowest = None
+            reached_known = False
+            for _ in range(MAX_PAGES_PER_SYNC):
+                page = self._fetch_page(account, start, limit)
+                if page == [] and newest is None and known < 0:
+                    # Account senza operazioni: cronologia vuota ma completa
+                    state.oldest_index = 0
+                    self._finish(state)
+                    return
+                if not page:
+                    break
+                if newest is None:
+                    newest = page[-1][0]
+                new_ops = [op for op in page if op[0] > known]
+                self._store(account, new_ops)
+                if new_ops:
+                    lowest = new_ops[0][0]
+                if len(new_ops) < len(page) or page[0][0] == 0:
+                    reached_known = True
+                    break
+                # Pagina tutta nuova: serve anche quella precedente
+                start = page[0][0] - 1
+                limit = min(PAGE_SIZE, start)  # il nodo richiede limit <= start
+
+            if newest is None:
+                return
+            if lowest is not None:
+                state.newest_index = newest
+                if known < 0 or not reached_known:
+                    # Primo caricamento, o buco troppo grande rispetto a quanto salvato:
+                    # le operazioni più vecchie verranno riscaricate con backfill()
+                    state.oldest_index = lowest
+            self._finish(state)
+
+    def backfill(self, account, before_index):
+        """Scarica una pagina di operazioni più vecchie di quelle salvate, se richiesta"""
+        with self._accounts.lock_for(account):
+            state = db.session.get(HistoryAccount, account)
+            if state is None or state.oldest_index <= 0 or before_index >= state.oldest_index:
+                return
+            start = state.oldest_index - 1
+            page = self._fetch_page(account, start, min(PAGE_SIZE, start))
+            if not page:
+                return
+            self._store(account, [op for op in page if op[0] < state.oldest_index])
+            state.oldest_index = page[0][0]
+            self._finish(state)
+
+    def query(self, account, from_index=-1, limit=100, op_types=None, start=None, end=None, min_index=0):
+        """Operazioni salvate in ordine crescente, come get_account_history, come stringa JSON"""
+        q = AccountHistoryOp.query.filter(
+            AccountHistoryOp.account == account,
+            AccountHistoryOp.op_index >= min_index
+        )
+        if from_index >= 0:
+            q = q.filter(AccountHistoryOp.op_index <= from_index)
+        if op_types:
+            q = q.filter(AccountHistoryOp.op_type.in_(op_types))
+        if start:
+            q = q.filter(AccountHistoryOp.timestamp >= start)
+        if end:
+            q = q.filter(AccountHistoryOp.timestamp <= end)
+
+        rows = q.with_entities(AccountHistoryOp.op_index, AccountHistoryOp.data) \
+            .order_by(AccountHistoryOp.op_index.desc()).limit(limit).all()
+        # I dati sono già JSON: si compone la risposta senza decodificarli
+        return '[' + ','.join(f'[{index},{data}]' for index, data in reversed(rows)) + ']'
+
+    def get_state(self, account):
+        state = db.session.get(HistoryAccount, account)
+        if state is None:
+            return None
+        return {
+            'newest_index': state.newest_index,
+            'oldest_index': state.oldest_index,
+            'complete': state.oldest_index == 0
+        }
+
+    def _fetch_page(self, account, start, limit):
+        result = rpc_proxy.call('condenser_api.get_account_history', [account, start, limit])
+        if not isinstance(result, list):
+            logger.warning(f"Account history fetch failed for @{account} (start={start})")
+            return None
+        return sorted(result, key=lambda op: op[0])
+
+    def _store(self, account, ops):
+        if not ops:
+            return
+        rows = [
+            {
+                'account': account,
+                'op_index': index,
+                'op_type': entry['op'][0],
+                'timestamp': parse_timestamp(entry.get('timestamp')),
+                'data': json.dumps(entry, separators=(',', ':'))
+            }
+            for index, entry in ops
+        ]
+        db.session.execute(insert_ignore(AccountHistoryOp), rows)
+
+    def _finish(self, state):
+        state.synced_at = datetime.utcnow()
+        db.session.merge(state)
+        try:
+            db.session.commit()
+            self._accounts.mark_synced(state.account)
+        except Exception as e:
+            logger.error(f"Failed to store history for @{state.account}: {e}")
+            db.session.rollback()
+
+
+# Istanza globale
+history_indexer = AccountHistoryIndexer()
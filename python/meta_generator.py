@@ -3,6 +3,7 @@ Servizio per generare meta tag dinamici HTML
 """
 import os
 from python.steem_client import steem_client
+from python.search_index import search_index
 
 class MetaTagGenerator:
     def __init__(self):
@@ -14,15 +15,18 @@ class MetaTagGenerator:
             'type': 'website'
         }
     
-    def generate_post_meta(self, author, permlink, base_url='https://cur8.fun'):
-        """Genera meta tag per un post specifico"""
+    def generate_post_meta(self, author, permlink, base_url='https://cur8.fun', post=None):
+        """Genera meta tag per un post specifico (post già scaricato dal chiamante, se disponibile)"""
         try:
-            post = steem_client.get_content(author, permlink)
+            if post is None:
+                post = steem_client.get_content(author, permlink)
             
             if not post or post.get('id', 0) == 0:
                 print(f"Warning: Post not found @{author}/{permlink}, using default meta")
                 return self.generate_default_meta(f"{base_url}/@{author}/{permlink}")
             
+            search_index.ingest([post])
+            
             # Estrai immagine e metadata
             metadata = steem_client.parse_metadata(post.get('json_metadata', ''))
             image_url = steem_client.extract_image_from_post(post.get('body', ''), metadata)
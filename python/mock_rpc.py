@@ -0,0 +1,217 @@
+"""
+Server JSON-RPC fittizio per test offline, benchmark e load test
+
+Risponde ai metodi Steem con risultati predefiniti (fixture), con latenza ed errori
+iniettabili. Si può avviare da codice (MockRpcServer(...).start()) oppure da riga di
+comando:
+
+    python -m python.mock_rpc --port 8090 --latency-ms 80 --error-rate 0.01
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Errori tipici restituiti dai nodi pubblici
+INJECTED_ERRORS = [
+    (-32003, "Unable to acquire database lock"),
+    (-32603, "Internal Error"),
+]
+
+
+def fixed_latency(seconds):
+    return lambda rng: seconds
+
+
+def spiky_latency(base, jitter, spike_probability, spike_min, spike_max):
+    """Latenza base con jitter e picchi occasionali (coda lunga tipica dei nodi pubblici)"""
+    def sample(rng):
+        if rng.random() < spike_probability:
+            return rng.uniform(spike_min, spike_max)
+        return max(0.0, rng.gauss(base, jitter))
+    return sample
+
+
+def default_fixtures():
+    """Risultati minimi ma realistici per i metodi più usati"""
+    post = {
+        "id": 1, "author": "steemit", "permlink": "firstpost", "category": "meta",
+        "parent_author": "", "parent_permlink": "meta", "title": "Welcome to Steem!",
+        "body": "Steemit is a social media platform where anyone can earn STEEM points by posting.",
+        "json_metadata": "{\"tags\":[\"meta\"]}", "created": "2016-03-30T18:30:18",
+        "last_update": "2016-03-30T18:30:18", "net_votes": 90, "children": 10,
+        "pending_payout_value": "0.000 SBD", "total_payout_value": "0.942 SBD",
+        "active_votes": []
+    }
+    return {
+        "get_content": lambda params: dict(post, author=params[0], permlink=params[1]),
+        "get_accounts": lambda params: [
+            {"id": 1, "name": name, "posting_json_metadata": "{\"profile\":{\"about\":\"mock\"}}"}
+            for name in (params[0] if params else [])
+        ],
+        "get_dynamic_global_properties": {
+            "head_block_number": 90000000, "total_vesting_fund_steem": "180000000.000 STEEM",
+            "total_vesting_shares": "330000000000.000000 VESTS", "time": "2024-01-01T00:00:00"
+        },
+        "get_reward_fund": {"name": "post", "reward_balance": "800000.000 STEEM", "recent_claims": "400000000000000000"},
+        "get_current_median_history_price": {"base": "0.250 SBD", "quote": "1.000 STEEM"},
+        "get_discussions_by_trending": [post],
+        "get_discussions_by_hot": [post],
+        "get_discussions_by_created": [post],
+        "get_discussions_by_blog": [post],
+        "get_ranked_posts": [post],
+        "get_account_history": [],
+    }
+
+
+def recorded_fixtures(data, base=None):
+    """Fixture da post e account registrati ({"posts": [...], "accounts": [...]}):
+    get_content e get_accounts rispondono con il record corrispondente, come un nodo vero
+    (post inesistente = post vuoto con id 0, account inesistente = assente dalla lista)"""
+    fixtures = dict(base if base is not None else default_fixtures())
+    posts = {(post['author'], post['permlink']): post for post in data.get('posts', [])}
+    accounts = {account['name']: account for account in data.get('accounts', [])}
+    empty_post = {"id": 0, "author": "", "permlink": "", "title": "", "body": "", "json_metadata": ""}
+
+    fixtures['get_content'] = lambda params: posts.get((params[0], params[1]), empty_post)
+    fixtures['get_accounts'] = lambda params: [
+        accounts[name] for name in (params[0] if params else []) if name in accounts
+    ]
+    if posts:
+        recent = sorted(posts.values(), key=lambda post: post.get('created', ''), reverse=True)[:20]
+        for name in ('get_discussions_by_created', 'get_discussions_by_trending', 'get_discussions_by_hot'):
+            fixtures[name] = recent
+    return fixtures
+
+
+class MockRpcServer:
+    def __init__(self, latency=None, fixtures=None, error_rate=0.0, default_result=None,
+                 host='127.0.0.1', port=0, seed=None):
+        self.latency = latency or fixed_latency(0.0)
+        self.fixtures = default_fixtures() if fixtures is None else fixtures
+        self.error_rate = error_rate
+        self.default_result = default_result
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0      # richieste contemporanee al picco
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, payload):
+        """Risposta JSON-RPC per un payload singolo o batch"""
+        if isinstance(payload, list):
+            return [self._respond_one(item) for item in payload]
+        return self._respond_one(payload)
+
+    def _respond_one(self, item):
+        request_id = item.get('id') if isinstance(item, dict) else None
+        if not isinstance(item, dict) or 'method' not in item:
+            return {"jsonrpc": "2.0", "error": {"code": -32600, "message": "Invalid Request"}, "id": request_id}
+
+        method, params = item['method'], item.get('params', [])
+        if method == 'call' and isinstance(params, list) and len(params) == 3:
+            method, params = f"{params[0]}.{params[1]}", params[2]
+
+        with self._lock:
+            inject_error = self._rng.random() < self.error_rate
+            error = self._rng.choice(INJECTED_ERRORS)
+        if inject_error:
+            return {"jsonrpc": "2.0", "error": {"code": error[0], "message": error[1]}, "id": request_id}
+
+        name = method.rpartition('.')[2]
+        fixture = self.fixtures.get(method, self.fixtures.get(name, self.default_result))
+        if fixture is None:
+            return {"jsonrpc": "2.0", "error": {"code": -32601, "message": f"Method not found: {method}"}, "id": request_id}
+        result = fixture(params) if callable(fixture) else fixture
+        return {"jsonrpc": "2.0", "result": result, "id": request_id}
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                with server._lock:
+                    server.requests += 1
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                    delay = server.latency(server._rng)
+                try:
+                    if delay:
+                        time.sleep(delay)
+                    payload = json.loads(self.rfile.read(length) or b'null')
+                    body = json.dumps(server.respond(payload)).encode('utf-8')
+                except ValueError:
+                    body = b'{"jsonrpc":"2.0","error":{"code":-32700,"message":"Parse error"},"id":null}'
+                finally:
+                    with server._lock:
+                        server.in_flight -= 1
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Steem JSON-RPC server")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8090)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--fixtures', help="file JSON {metodo: risultato} che si aggiunge ai predefiniti")
+    parser.add_argument('--recorded', help="file JSON {posts, accounts} registrato con scripts/loadtest.py --record")
+    args = parser.parse_args()
+
+    fixtures = default_fixtures()
+    if args.recorded:
+        with open(args.recorded, encoding='utf-8') as f:
+            fixtures = recorded_fixtures(json.load(f), fixtures)
+    if args.fixtures:
+        with open(args.fixtures, encoding='utf-8') as f:
+            fixtures.update(json.load(f))
+
+    server = MockRpcServer(
+        latency=fixed_latency(args.latency_ms / 1000),
+        fixtures=fixtures,
+        error_rate=args.error_rate,
+        host=args.host,
+        port=args.port
+    ).start()
+    print(f"Mock Steem RPC listening on {server.url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,79 @@
+import threading
+import zlib
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import deferred
+from sqlalchemy.types import LargeBinary, TypeDecorator
 from datetime import datetime
 
 db = SQLAlchemy()
+_schema_lock = threading.Lock()
+
+
+def init_schema(app):
+    """Crea le tabelle mancanti una sola volta per processo, al primo utilizzo"""
+    if app.extensions.get('schema_ready'):
+        return
+    with _schema_lock:
+        if app.extensions.get('schema_ready'):
+            return
+        with app.app_context():
+            db.create_all()
+            compress_legacy_bodies()
+        app.extensions['schema_ready'] = True
+
+
+def compress_legacy_bodies():
+    """Comprime i corpi dei post programmati salvati in chiaro prima di CompressedText"""
+    if db.engine.dialect.name != 'sqlite':
+        return
+    rows = db.session.execute(
+        db.text("SELECT id, body FROM scheduled_post WHERE typeof(body) = 'text'")
+    ).all()
+    for post_id, body in rows:
+        db.session.execute(
+            db.update(ScheduledPost).where(ScheduledPost.id == post_id).values(body=body)
+        )
+    if rows:
+        db.session.commit()
+
+
+def insert_ignore(model):
+    """INSERT che salta le righe la cui chiave primaria esiste già, nel dialetto del database"""
+    dialect = db.engine.dialect.name
+    if dialect == 'sqlite':
+        return sqlite_insert(model).on_conflict_do_nothing()
+    if dialect == 'postgresql':
+        return postgresql_insert(model).on_conflict_do_nothing()
+    if dialect in ('mysql', 'mariadb'):
+        return insert(model).prefix_with('IGNORE')
+    return insert(model)
+
+
+class CompressedText(TypeDecorator):
+    """Testo salvato compresso con zlib; le righe scritte prima in chiaro (str) si leggono così come sono"""
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode('utf-8'), 6)
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return zlib.decompress(value).decode('utf-8')
+
 
 class ScheduledPost(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(64), nullable=False, index=True)
     title = db.Column(db.String(255), nullable=False)
-    body = db.Column(db.Text, nullable=False)
+    # Compresso e caricato solo quando serve (pubblicazione o lettura del singolo post)
+    body = deferred(db.Column(CompressedText, nullable=False))
     tags = db.Column(db.String(255))
     community = db.Column(db.String(64))
     permlink = db.Column(db.String(255))
@@ -27,4 +93,101 @@ class ScheduledPost(db.Model):
             "scheduled_datetime": self.scheduled_datetime.isoformat(),
             "created_at": self.created_at.isoformat(),
             "status": self.status
-        }
\ No newline at end of file
+        }
+
+class PublisherHeartbeat(db.Model):
+    """Ultimo giro del processo publisher (python -m python.publisher), letto dai worker web"""
+    id = db.Column(db.Integer, primary_key=True)
+    beat_at = db.Column(db.DateTime, nullable=False)
+    pid = db.Column(db.Integer)
+    check_interval = db.Column(db.Integer, nullable=False)
+
+
+class HistoryAccount(db.Model):
+    """Stato dell'indice locale della cronologia di un account"""
+    account = db.Column(db.String(16), primary_key=True)
+    newest_index = db.Column(db.Integer, nullable=False, default=-1)
+    oldest_index = db.Column(db.Integer, nullable=False, default=-1)
+    synced_at = db.Column(db.DateTime)
+
+
+class AccountHistoryOp(db.Model):
+    """Operazione della cronologia di un account, chiave (account, indice operazione)"""
+    account = db.Column(db.String(16), primary_key=True)
+    op_index = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    op_type = db.Column(db.String(48), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)
+    data = db.Column(db.Text, nullable=False)  # JSON dell'operazione così come restituito dal nodo
+
+    __table_args__ = (
+        db.Index('ix_history_account_type', 'account', 'op_type', 'op_index'),
+        db.Index('ix_history_account_time', 'account', 'timestamp'),
+    )
+
+
+class Cur8Post(db.Model):
+    """Post con tag cur8 già conteggiato negli aggregati (valori usati per le differenze)"""
+    author = db.Column(db.String(16), primary_key=True)
+    permlink = db.Column(db.String(255), primary_key=True)
+    title = db.Column(db.String(255), nullable=False, default='')
+    created = db.Column(db.DateTime, nullable=False, index=True)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+    payout = db.Column(db.Float, nullable=False, default=0.0, index=True)
+
+
+class Cur8AuthorStats(db.Model):
+    author = db.Column(db.String(16), primary_key=True)
+    posts = db.Column(db.Integer, nullable=False, default=0)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+    payout = db.Column(db.Float, nullable=False, default=0.0, index=True)
+
+
+class Cur8DailyStats(db.Model):
+    day = db.Column(db.Date, primary_key=True)
+    posts = db.Column(db.Integer, nullable=False, default=0)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+    comments = db.Column(db.Integer, nullable=False, default=0)
+    payout = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class Cur8PayoutBucket(db.Model):
+    """Numero di post per fascia di payout ('0-1', '1-5', ...)"""
+    bucket = db.Column(db.String(8), primary_key=True)
+    posts = db.Column(db.Integer, nullable=False, default=0)
+
+
+class Cur8StatsState(db.Model):
+    """Stato dell'aggregazione: cursore per scaricare i post più vecchi"""
+    id = db.Column(db.Integer, primary_key=True)
+    backfill_author = db.Column(db.String(16))
+    backfill_permlink = db.Column(db.String(255))
+    backfill_done = db.Column(db.Boolean, nullable=False, default=False)
+    synced_at = db.Column(db.DateTime)
+
+
+class NotificationAccount(db.Model):
+    """Stato delle notifiche SteemWorld salvate per un account"""
+    account = db.Column(db.String(16), primary_key=True)
+    newest_id = db.Column(db.BigInteger, nullable=False, default=0)
+    unread = db.Column(db.Integer, nullable=False, default=0)
+    synced_at = db.Column(db.DateTime)
+
+
+class AccountNotification(db.Model):
+    """Notifica SteemWorld, chiave (account destinatario, id della notifica)"""
+    account = db.Column(db.String(16), primary_key=True)
+    id = db.Column(db.BigInteger, primary_key=True, autoincrement=False)
+    time = db.Column(db.Integer, nullable=False)  # secondi Unix, come nell'API
+    type = db.Column(db.String(32), nullable=False)
+    is_read = db.Column(db.Integer, nullable=False, default=0)
+    actor = db.Column(db.String(16))  # colonna 'account' dell'API: chi ha compiuto l'azione
+    author = db.Column(db.String(16))
+    permlink = db.Column(db.String(255))
+    link_depth = db.Column(db.Integer)
+    voted_rshares = db.Column(db.BigInteger)
+
+    __table_args__ = (
+        db.Index('ix_notification_account_read', 'account', 'is_read', 'id'),
+    )
@@ -0,0 +1,188 @@
+"""
+Proxy con cache delle notifiche SteemWorld (sds.steemworld.org)
+
+Le notifiche vengono salvate in SQLite per (account, id): ad ogni sincronizzazione si
+scaricano solo quelle più recenti dell'ultimo id salvato, e il numero di non lette è
+tenuto aggiornato in modo incrementale. Tutte le schede e i dispositivi di un utente
+condividono così un'unica richiesta upstream per intervallo.
+
+Lo stato "letto" dipende dalla data setLastRead salvata on-chain, che avanza sempre:
+le non lette sono sempre le notifiche più recenti. Per accorgersi di una lettura basta
+controllare che upstream esista ancora la non letta più vecchia che conosciamo.
+
+Le chiamate a SteemWorld sono limitate per processo (MAX_UPSTREAM_CONCURRENCY): oltre,
+si aspetta al massimo MAX_QUEUE_WAIT e poi si servono le notifiche già salvate.
+"""
+import json
+import logging
+import os
+import time
+import urllib.parse
+import urllib.request
+from datetime import datetime
+
+from python.account_sync import AccountSyncState
+from python.concurrency import UpstreamSlots
+from python.models import db, insert_ignore, NotificationAccount, AccountNotification
+
+logger = logging.getLogger(__name__)
+
+STEEMWORLD_API = os.environ.get('STEEMWORLD_API', 'https://sds.steemworld.org')
+PAGE_SIZE = 250
+MAX_INITIAL_ROWS = 2500     # primo caricamento: quante ne chiedeva la SPA
+MIN_SYNC_INTERVAL = 60      # secondi per account
+MIN_REFRESH_INTERVAL = 5    # aggiornamento forzato (pull to refresh, "segna tutto come letto")
+REQUEST_TIMEOUT = 10
+MAX_UPSTREAM_CONCURRENCY = int(os.environ.get('STEEMWORLD_MAX_CONCURRENCY', '8'))
+MAX_QUEUE_WAIT = float(os.environ.get('STEEMWORLD_MAX_QUEUE_WAIT', '2'))
+
+# Colonne servite, nello stesso formato cols/rows dell'API SteemWorld
+COLUMNS = ['id', 'time', 'type', 'is_read', 'account', 'author', 'permlink', 'link_depth', 'voted_rshares']
+COLUMN_FIELDS = {'account': 'actor'}
+
+
+class NotificationStore:
+    def __init__(self, base_url=STEEMWORLD_API):
+        self.base_url = base_url
+        self._accounts = AccountSyncState()
+        self._upstream = UpstreamSlots(MAX_UPSTREAM_CONCURRENCY, MAX_QUEUE_WAIT, 'SteemWorld')
+        self.stats = {'syncs': 0, 'upstream_calls': 0, 'rows_fetched': 0}
+
+    def needs_sync(self, account, min_interval=MIN_SYNC_INTERVAL):
+        return time.time() - self._accounts.last_sync(account) >= min_interval
+
+    def sync(self, account, min_interval=MIN_SYNC_INTERVAL):
+        """Scarica le notifiche più recenti dell'ultimo id salvato e aggiorna le non lette"""
+        if not self.needs_sync(account, min_interval):
+            return
+        with self._accounts.lock_for(account):
+            if not self.needs_sync(account, min_interval):
+                return
+            state = db.session.get(NotificationAccount, account) or NotificationAccount(
+                account=account, newest_id=0, unread=0
+            )
+            try:
+                new_rows = self._fetch_new(account, state.newest_id)
+                if new_rows:
+                    self._store(account, new_rows)
+                    state.newest_id = max(row['id'] for row in new_rows)
+                    state.unread += sum(1 for row in new_rows if not row['is_read'])
+                if state.unread:
+                    self._reconcile_read(account, state)
+            except (OSError, ValueError) as e:
+                logger.warning(f"SteemWorld notifications fetch failed for @{account}: {e}")
+                db.session.rollback()
+                return
+
+            state.synced_at = datetime.utcnow()
+            db.session.merge(state)
+            try:
+                db.session.commit()
+                self._accounts.mark_synced(account)
+                self.stats['syncs'] += 1
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Failed to store notifications for @{account}: {e}")
+
+    def get_stats(self):
+        """Contatori di sincronizzazione e chiamate SteemWorld in corso o scartate"""
+        stats = dict(self.stats)
+        stats['in_flight'] = self._upstream.in_flight
+        stats['shed'] = self._upstream.shed
+        stats['max_concurrency'] = MAX_UPSTREAM_CONCURRENCY
+        stats['tracked_accounts'] = len(self._accounts)
+        return stats
+
+    def query(self, account, status='all', limit=PAGE_SIZE, offset=0):
+        """Notifiche salvate dalla più recente, come {cols, rows} di SteemWorld"""
+        q = AccountNotification.query.filter(AccountNotification.account == account)
+        if status == 'new':
+            q = q.filter(AccountNotification.is_read == 0)
+        rows = q.order_by(AccountNotification.id.desc()).offset(offset).limit(limit).all()
+        return {
+            'cols': {name: i for i, name in enumerate(COLUMNS)},
+            'rows': [[getattr(row, COLUMN_FIELDS.get(name, name)) for name in COLUMNS] for row in rows],
+        }
+
+    def get_state(self, account):
+        """(non lette, sincronizzato il) o None se l'account non è mai stato scaricato"""
+        state = db.session.get(NotificationAccount, account)
+        if state is None or state.synced_at is None:
+            return None
+        return state.unread, state.synced_at
+
+    def _fetch_new(self, account, newest_id):
+        """Righe con id maggiore di newest_id, pagina per pagina dalla più recente"""
+        rows = []
+        offset = 0
+        limit = PAGE_SIZE if newest_id else MAX_INITIAL_ROWS
+        while True:
+            page = self._fetch(account, 'all', limit, offset)
+            fresh = [row for row in page if row['id'] > newest_id]
+            rows.extend(fresh)
+            if len(fresh) < len(page) or len(page) < limit or len(rows) >= MAX_INITIAL_ROWS:
+                return rows
+            offset += len(page)
+            limit = PAGE_SIZE
+
+    def _reconcile_read(self, account, state):
+        """Allinea le non lette dopo un setLastRead: normalmente una sola riga upstream"""
+        oldest_unread = self._fetch(account, 'new', 1, state.unread - 1)
+        known = AccountNotification.query.filter_by(account=account, is_read=0) \
+            .order_by(AccountNotification.id.desc()).offset(state.unread - 1).first()
+        if oldest_unread and known and oldest_unread[0]['id'] == known.id:
+            return  # nessuna notifica letta nel frattempo
+
+        # Margine per le notifiche arrivate nel frattempo (più recenti, in testa alla lista)
+        limit = min(state.unread + PAGE_SIZE, MAX_INITIAL_ROWS)
+        unread_ids = {row['id'] for row in self._fetch(account, 'new', limit, 0)}
+        stored = AccountNotification.query.with_entities(AccountNotification.id) \
+            .filter_by(account=account, is_read=0).all()
+        read_ids = [row.id for row in stored if row.id not in unread_ids]
+        if read_ids:
+            AccountNotification.query.filter(
+                AccountNotification.account == account,
+                AccountNotification.id.in_(read_ids)
+            ).update({'is_read': 1}, synchronize_session=False)
+        state.unread = len(stored) - len(read_ids)
+
+    def _fetch(self, account, status, limit, offset):
+        url = (f"{self.base_url}/notifications_api/getNotificationsByStatus/"
+               f"{urllib.parse.quote(account)}/{status}/{limit}/{offset}")
+        req = urllib.request.Request(url, headers={'User-Agent': 'cur8.fun/1.0'})
+        # UpstreamOverloaded è un TimeoutError: sync lo tratta come un errore di rete
+        with self._upstream:
+            self.stats['upstream_calls'] += 1
+            with urllib.request.urlopen(req, timeout=REQUEST_TIMEOUT) as response:
+                data = json.loads(response.read().decode('utf-8'))
+        if data.get('code') != 0:
+            raise ValueError(f"SteemWorld API returned code {data.get('code')}")
+        result = data.get('result') or {}
+        cols, rows = result.get('cols') or {}, result.get('rows') or []
+        self.stats['rows_fetched'] += len(rows)
+        return [
+            {name: row[cols[name]] if name in cols else None for name in COLUMNS}
+            for row in rows
+        ]
+
+    def _store(self, account, rows):
+        values = [
+            {
+                'account': account,
+                'id': row['id'],
+                'time': row['time'],
+                'type': row['type'],
+                'is_read': 1 if row['is_read'] == 1 else 0,
+                'actor': row['account'],
+                'author': row['author'],
+                'permlink': row['permlink'],
+                'link_depth': row['link_depth'],
+                'voted_rshares': row['voted_rshares'],
+            }
+            for row in rows
+        ]
+        db.session.execute(insert_ignore(AccountNotification), values)
+
+
+# Istanza globale
+notification_store = NotificationStore()
@@ -0,0 +1,275 @@
+"""
+Rendering lato server del corpo dei post (markdown -> HTML sanitizzato)
+
+Usato per mandare a crawler e client senza JavaScript il testo del post già dentro
+index.html. Se è installata la libreria `markdown` viene usata per la conversione,
+altrimenti un convertitore minimo interno; in entrambi i casi l'HTML passa da una
+allowlist di tag e attributi. I frammenti restano in cache per (autore, permlink,
+last_update): un post modificato viene ri-renderizzato.
+"""
+import html
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from html.parser import HTMLParser
+
+try:
+    import markdown as markdown_lib  # opzionale
+except ImportError:
+    markdown_lib = None
+
+MAX_CACHED_FRAGMENTS = 256
+SSR_ENABLED = os.environ.get('SSR_POSTS', '1') != '0'
+
+ALLOWED_TAGS = {
+    'a', 'b', 'blockquote', 'br', 'center', 'code', 'del', 'div', 'em', 'h1', 'h2', 'h3',
+    'h4', 'h5', 'h6', 'hr', 'i', 'img', 'li', 'ol', 'p', 'pre', 's', 'span', 'strike',
+    'strong', 'sub', 'sup', 'table', 'tbody', 'td', 'th', 'thead', 'tr', 'u', 'ul',
+}
+VOID_TAGS = {'br', 'hr', 'img'}
+# Tag eliminati insieme al loro contenuto (gli embed li gestisce la SPA)
+DROPPED_TAGS = {'script', 'style', 'iframe', 'object', 'embed', 'noscript', 'template', 'svg', 'math'}
+ALLOWED_ATTRIBUTES = {
+    'a': {'href', 'title'},
+    'img': {'src', 'alt', 'title', 'width', 'height'},
+    'td': {'colspan', 'rowspan'},
+    'th': {'colspan', 'rowspan'},
+}
+ALLOWED_CLASSES = {'pull-left', 'pull-right', 'text-justify', 'text-center', 'phishy'}
+URL_ATTRIBUTES = {'href', 'src'}
+SAFE_URL = re.compile(r'^(https?://|/|#|mailto:)', re.IGNORECASE)
+
+IMAGE_URL = r'https?://[^\s<>"\')]+\.(?:jpe?g|png|gif|webp)(?:\?[^\s<>"\')]*)?'
+
+
+class _Sanitizer(HTMLParser):
+    """Ricostruisce l'HTML tenendo solo tag/attributi in allowlist, sempre ben formato"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.out = []
+        self.open_tags = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in DROPPED_TAGS:
+            self.skip_depth += 1
+            return
+        if self.skip_depth or tag not in ALLOWED_TAGS:
+            return
+
+        parts = [tag]
+        allowed = ALLOWED_ATTRIBUTES.get(tag, ())
+        for name, value in attrs:
+            if value is None:
+                continue
+            if name == 'class':
+                classes = [c for c in value.split() if c in ALLOWED_CLASSES]
+                if classes:
+                    parts.append(f'class="{" ".join(classes)}"')
+                continue
+            if name not in allowed:
+                continue
+            if name in URL_ATTRIBUTES and not SAFE_URL.match(value.strip()):
+                continue
+            parts.append(f'{name}="{html.escape(value.strip(), quote=True)}"')
+        if tag == 'a':
+            parts.append('rel="nofollow noopener ugc"')
+        elif tag == 'img':
+            parts.append('loading="lazy"')
+
+        self.out.append(f"<{' '.join(parts)}>")
+        if tag not in VOID_TAGS:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS and self.open_tags and self.open_tags[-1] == tag:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        if tag in DROPPED_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+            return
+        if self.skip_depth or tag not in self.open_tags:
+            return
+        # Chiude anche i tag rimasti aperti dentro quello corrente
+        while self.open_tags:
+            current = self.open_tags.pop()
+            self.out.append(f"</{current}>")
+            if current == tag:
+                break
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.out.append(html.escape(data, quote=False))
+
+    def result(self):
+        self.close()
+        while self.open_tags:
+            self.out.append(f"</{self.open_tags.pop()}>")
+        return ''.join(self.out)
+
+
+def sanitize_html(value):
+    sanitizer = _Sanitizer()
+    sanitizer.feed(value)
+    return sanitizer.result()
+
+
+def _inline(text):
+    """Markdown inline: codice, immagini, link, enfasi, URL di immagini nudi"""
+    codes = []
+
+    def keep_code(match):
+        codes.append(f"<code>{html.escape(match.group(1))}</code>")
+        return f"\x00{len(codes) - 1}\x00"
+
+    text = re.sub(r'`([^`\n]+)`', keep_code, text)
+    text = re.sub(r'!\[([^\]]*)\]\(\s*([^)\s]+)(?:\s+"[^"]*")?\s*\)',
+                  lambda m: f'<img src="{html.escape(m.group(2))}" alt="{html.escape(m.group(1))}">', text)
+    text = re.sub(r'\[([^\]]+)\]\(\s*([^)\s]+)(?:\s+"[^"]*")?\s*\)',
+                  lambda m: f'<a href="{html.escape(m.group(2))}">{m.group(1)}</a>', text)
+    text = re.sub(r'(?<![="\'>])(' + IMAGE_URL + r')', r'<img src="\1">', text, flags=re.IGNORECASE)
+    text = re.sub(r'(\*\*|__)(?=\S)(.+?)(?<=\S)\1', r'<strong>\2</strong>', text)
+    text = re.sub(r'(?<![\w*])\*(?=\S)(.+?)(?<=\S)\*(?![\w*])', r'<em>\1</em>', text)
+    text = re.sub(r'(?<!\w)_(?=\S)(.+?)(?<=\S)_(?!\w)', r'<em>\1</em>', text)
+    text = re.sub(r'~~(.+?)~~', r'<del>\1</del>', text)
+    return re.sub(r'\x00(\d+)\x00', lambda m: codes[int(m.group(1))], text)
+
+
+def simple_markdown(text):
+    """Convertitore markdown minimo (blocchi principali); l'HTML grezzo passa invariato"""
+    lines = text.replace('\r\n', '\n').split('\n')
+    out = []
+    paragraph = []
+    list_tag = None
+    i = 0
+
+    def flush_paragraph():
+        if paragraph:
+            out.append(f"<p>{_inline(chr(10).join(paragraph)).replace(chr(10), '<br>')}</p>")
+            paragraph.clear()
+
+    def close_list():
+        nonlocal list_tag
+        if list_tag:
+            out.append(f"</{list_tag}>")
+            list_tag = None
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith('```'):
+            flush_paragraph()
+            close_list()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith('```'):
+                code.append(lines[i])
+                i += 1
+            out.append(f"<pre><code>{html.escape(chr(10).join(code))}</code></pre>")
+            i += 1
+            continue
+
+        heading = re.match(r'^(#{1,6})\s+(.*?)\s*#*$', stripped)
+        bullet = re.match(r'^[-*+]\s+(.*)$', stripped)
+        numbered = re.match(r'^\d+[.)]\s+(.*)$', stripped)
+
+        if not stripped:
+            flush_paragraph()
+            close_list()
+        elif re.match(r'^([-*_])(\s*\1){2,}$', stripped):
+            flush_paragraph()
+            close_list()
+            out.append('<hr>')
+        elif heading:
+            flush_paragraph()
+            close_list()
+            level = len(heading.group(1))
+            out.append(f"<h{level}>{_inline(heading.group(2))}</h{level}>")
+        elif stripped.startswith('>'):
+            flush_paragraph()
+            close_list()
+            quoted = []
+            while i < len(lines) and lines[i].strip().startswith('>'):
+                quoted.append(lines[i].strip()[1:].lstrip())
+                i += 1
+            out.append(f"<blockquote>{simple_markdown(chr(10).join(quoted))}</blockquote>")
+            continue
+        elif bullet or numbered:
+            flush_paragraph()
+            tag = 'ul' if bullet else 'ol'
+            if list_tag != tag:
+                close_list()
+                out.append(f"<{tag}>")
+                list_tag = tag
+            out.append(f"<li>{_inline((bullet or numbered).group(1))}</li>")
+        elif stripped.startswith('<') and not paragraph:
+            # Blocco HTML grezzo (frequente nei post Steem): lo pulisce il sanitizer
+            close_list()
+            out.append(_inline(stripped))
+        else:
+            close_list()
+            paragraph.append(stripped)
+        i += 1
+
+    flush_paragraph()
+    close_list()
+    return '\n'.join(out)
+
+
+def markdown_to_html(text):
+    if markdown_lib is not None:
+        html_text = markdown_lib.markdown(text, extensions=['extra', 'sane_lists'])
+    else:
+        html_text = simple_markdown(text)
+    return sanitize_html(html_text)
+
+
+def inline_json(data):
+    """JSON sicuro dentro <script type="application/json"> (niente '</script>' o '<!--')"""
+    return (json.dumps(data, separators=(',', ':'))
+            .replace('<', '\\u003c').replace('>', '\\u003e').replace('&', '\\u0026'))
+
+
+class PostRenderer:
+    def __init__(self, max_entries=MAX_CACHED_FRAGMENTS):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # (author, permlink, last_update) -> html
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'renders': 0}
+
+    def render(self, post):
+        """Frammento HTML (titolo, autore, corpo) per un post di get_content"""
+        key = (post['author'], post['permlink'], post.get('last_update'))
+        with self._lock:
+            fragment = self._cache.get(key)
+            if fragment is not None:
+                self._cache.move_to_end(key)
+                self.stats['hits'] += 1
+                return fragment
+
+        title = html.escape(post.get('title') or '')
+        author = html.escape(post['author'])
+        fragment = (
+            '<article id="ssr-post" class="ssr-post">'
+            f"<h1>{title}</h1>"
+            f'<p class="ssr-post-meta"><a href="/@{author}">@{author}</a> · {html.escape(post.get("created") or "")}</p>'
+            f'<div class="ssr-post-body">{markdown_to_html(post.get("body") or "")}</div>'
+            '</article>'
+        )
+
+        with self._lock:
+            self.stats['renders'] += 1
+            self._cache[key] = fragment
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+        return fragment
+
+
+# Istanza globale
+post_renderer = PostRenderer()
@@ -0,0 +1,122 @@
+"""
+Manifest di precache per il service worker, dagli hash del contenuto dei file
+
+Ogni file statico dell'app ha il suo hash: dopo un deploy il service worker scarica
+solo i file il cui hash è cambiato, invece di tutta l'app ad ogni versione.
+
+Da riga di comando genera precache-manifest.json (da eseguire in fase di build):
+
+    python -m python.precache [--output precache-manifest.json]
+
+Il server usa quel file se esiste, altrimenti calcola il manifest al volo
+(ricalcolando solo gli hash dei file modificati).
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MANIFEST_FILE = 'precache-manifest.json'
+
+PRECACHE_DIRS = ['components', 'services', 'views', 'utils', 'models', 'controllers', 'config', 'assets']
+PRECACHE_ROOT_FILES = ['index.js', 'manifest.json', 'offline.html']
+CODE_EXTENSIONS = {'.js', '.css'}
+# Immagini e altri file grandi restano alla cache a runtime (cache-first) del service worker
+MAX_ASSET_SIZE = 128 * 1024
+HASH_LENGTH = 12
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+def precache_files(root=ROOT):
+    """(url, percorso, stat) dei file da mettere in precache, in ordine stabile"""
+    files = []
+    for name in PRECACHE_ROOT_FILES:
+        path = os.path.join(root, name)
+        if os.path.isfile(path):
+            files.append((f"/{name}", path, os.stat(path)))
+    for directory in PRECACHE_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, directory)):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                extension = os.path.splitext(filename)[1].lower()
+                if extension not in CODE_EXTENSIONS and stat.st_size > MAX_ASSET_SIZE:
+                    continue
+                url = '/' + os.path.relpath(path, root).replace(os.sep, '/')
+                files.append((url, path, stat))
+    return files
+
+
+def manifest_version(files):
+    digest = hashlib.sha256()
+    for url, content_hash in sorted(files.items()):
+        digest.update(f"{url} {content_hash}\n".encode('utf-8'))
+    return digest.hexdigest()[:HASH_LENGTH]
+
+
+class PrecacheManifest:
+    def __init__(self, root=ROOT):
+        self.root = root
+        self._hashes = {}  # percorso -> (mtime, dimensione, hash)
+        self._manifest = None
+        self._signature = None
+        self._lock = threading.Lock()
+
+    def build(self):
+        """Manifest {version, files: {url: hash}} ricalcolando solo i file cambiati"""
+        files = {}
+        for url, path, stat in precache_files(self.root):
+            cached = self._hashes.get(path)
+            if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                content_hash = cached[2]
+            else:
+                content_hash = file_hash(path)
+                self._hashes[path] = (stat.st_mtime_ns, stat.st_size, content_hash)
+            files[url] = content_hash
+        return {'version': manifest_version(files), 'files': files}
+
+    def get(self):
+        """Manifest dal file di build se presente, altrimenti calcolato dai file"""
+        path = os.path.join(self.root, MANIFEST_FILE)
+        with self._lock:
+            try:
+                mtime = os.path.getmtime(path)
+                if self._signature != ('file', mtime):
+                    with open(path, encoding='utf-8') as f:
+                        self._manifest = json.load(f)
+                    self._signature = ('file', mtime)
+                return self._manifest
+            except (OSError, ValueError):
+                pass
+            self._manifest = self.build()
+            self._signature = ('live', None)
+            return self._manifest
+
+
+# Istanza globale
+precache_manifest = PrecacheManifest()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate the service worker precache manifest")
+    parser.add_argument('--output', default=os.path.join(ROOT, MANIFEST_FILE))
+    args = parser.parse_args()
+
+    manifest = PrecacheManifest().build()
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    print(f"{len(manifest['files'])} files, version {manifest['version']} -> {args.output}")
+
+
+if __name__ == '__main__':
+    main()
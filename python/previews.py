@@ -0,0 +1,106 @@
+"""
+Anteprime compatte dei post (link card della SPA e oEmbed)
+
+Le anteprime vengono dai meta tag del MetaTagGenerator e restano in cache per
+(autore, permlink); i post mancanti vengono scaricati con un solo batch JSON-RPC
+di get_content invece che con una richiesta per post.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from python.meta_generator import meta_generator
+from python.rpc_proxy import rpc_proxy
+
+PREVIEW_TTL = 600           # secondi
+MISSING_TTL = 60            # post inesistenti: riprova dopo un minuto
+MAX_CACHED_PREVIEWS = 4096
+MAX_PREVIEWS = 20           # URL per richiesta
+
+# @autore/permlink dentro un URL qualsiasi (cur8.fun, steemit.com/tag/@a/p, percorso relativo)
+POST_REF = re.compile(r'@([a-z0-9][a-z0-9.-]{1,15})/([a-z0-9][a-z0-9-]{0,255})', re.IGNORECASE)
+
+
+def parse_post_ref(url):
+    """(autore, permlink) da un URL di post, None se non è un post"""
+    if not isinstance(url, str):
+        return None
+    match = POST_REF.search(url.split('?', 1)[0].split('#', 1)[0])
+    if not match:
+        return None
+    return match.group(1).lower(), match.group(2).lower()
+
+
+def compact_preview(meta):
+    """Campi dell'anteprima dai meta tag del post (URL escluso: dipende dall'host)"""
+    return {
+        'title': meta['title'],
+        'description': meta['description'],
+        'image': meta['image'],
+        'author': meta.get('author'),
+        'created': meta.get('published_time') or None,
+    }
+
+
+class PreviewCache:
+    def __init__(self, ttl=PREVIEW_TTL, max_entries=MAX_CACHED_PREVIEWS):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # (autore, permlink) -> (scade il, anteprima o None)
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'fetched': 0, 'upstream_batches': 0}
+
+    def peek_many(self, refs):
+        """Anteprime in cache non scadute, senza chiamate upstream: {ref: anteprima o None}"""
+        now = time.time()
+        found = {}
+        with self._lock:
+            for ref in refs:
+                entry = self._cache.get(ref)
+                if entry and entry[0] > now:
+                    self._cache.move_to_end(ref)
+                    found[ref] = entry[1]
+        return found
+
+    def get_many(self, refs, base_url):
+        """{ref: anteprima o None}; i post non in cache arrivano con un unico batch"""
+        found = self.peek_many(refs)
+        with self._lock:
+            self.stats['hits'] += len(found)
+        missing = list(dict.fromkeys(ref for ref in refs if ref not in found))
+        if not missing:
+            return found
+
+        responses = rpc_proxy.handle([
+            {"jsonrpc": "2.0", "method": "condenser_api.get_content", "params": [author, permlink], "id": n}
+            for n, (author, permlink) in enumerate(missing)
+        ])
+        now = time.time()
+        with self._lock:
+            self.stats['upstream_batches'] += 1
+
+        for ref, response in zip(missing, responses):
+            if 'error' in response:
+                found[ref] = None  # nodi in errore: nessuna cache, si riprova alla prossima richiesta
+                continue
+            post = response.get('result')
+            preview = None
+            if post and post.get('id', 0) != 0:
+                author, permlink = ref
+                preview = compact_preview(meta_generator.generate_post_meta(author, permlink, base_url, post=post))
+            found[ref] = preview
+            with self._lock:
+                self.stats['fetched'] += 1
+                self._cache[ref] = (now + (self.ttl if preview else MISSING_TTL), preview)
+                self._cache.move_to_end(ref)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        return found
+
+    def get(self, author, permlink, base_url):
+        return self.get_many([(author, permlink)], base_url)[(author, permlink)]
+
+
+# Istanza globale
+preview_cache = PreviewCache()
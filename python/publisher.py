@@ -3,20 +3,28 @@ Scheduled Post Publisher Service
 
 This service handles the automatic publishing of scheduled posts.
 For testing purposes, this demonstrates the basic logic without actual blockchain publishing.
+
+In production it runs as its own process (python -m python.publisher), not inside the web
+workers: the loop writes a heartbeat row on every pass, and /api/publisher/status on any
+web worker reports from that row.
 """
 
+import os
 import time
 import threading
 import logging
 from datetime import datetime, timedelta
 from typing import List, Optional
 
-from python.models import db, ScheduledPost
+from python.models import db, ScheduledPost, PublisherHeartbeat
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Missed heartbeats before the separate publisher process is reported as stopped
+HEARTBEAT_MISSES = 3
+
 
 class ScheduledPostPublisher:
     """
@@ -58,6 +66,19 @@ class ScheduledPostPublisher:
             self.publisher_thread.join(timeout=5)
         logger.info("Scheduled post publisher stopped")
         
+    def run_forever(self):
+        """Run the publisher loop in the calling thread until stop() or SIGTERM/SIGINT"""
+        import signal
+
+        def handle_signal(signum, frame):
+            logger.info(f"Received signal {signum}, stopping publisher")
+            self.running = False
+
+        signal.signal(signal.SIGTERM, handle_signal)
+        signal.signal(signal.SIGINT, handle_signal)
+        self.running = True
+        self._run_publisher()
+        
     def _run_publisher(self):
         """Main publisher loop"""
         logger.info(f"Publisher loop started, checking every {self.check_interval} seconds")
@@ -65,6 +86,7 @@ class ScheduledPostPublisher:
             try:
                 logger.info("Publisher: Checking for scheduled posts...")
                 with self.app.app_context():
+                    self._beat()
                     self._check_and_publish_posts()
             except Exception as e:
                 logger.error(f"Error in publisher loop: {e}")
@@ -76,6 +98,13 @@ class ScheduledPostPublisher:
                 time.sleep(1)
         logger.info("Publisher loop ended")
             
+    def _beat(self):
+        """Record that the publisher loop is alive (read by get_status in other processes)"""
+        db.session.merge(PublisherHeartbeat(
+            id=1, beat_at=datetime.utcnow(), pid=os.getpid(), check_interval=self.check_interval
+        ))
+        db.session.commit()
+
     def _check_and_publish_posts(self):
         """Check for posts that need to be published and publish them"""
         now = datetime.utcnow()
@@ -193,10 +222,18 @@ class ScheduledPostPublisher:
             scheduled_count = ScheduledPost.query.filter_by(status='scheduled').count()
             published_count = ScheduledPost.query.filter_by(status='published').count()
             failed_count = ScheduledPost.query.filter_by(status='failed').count()
-            
+            heartbeat = db.session.get(PublisherHeartbeat, 1)
+
+        # The loop normally runs in another process: trust its heartbeat, not self.running
+        worker_alive = heartbeat is not None and datetime.utcnow() - heartbeat.beat_at < timedelta(
+            seconds=heartbeat.check_interval * HEARTBEAT_MISSES
+        )
         return {
-            'running': self.running,
-            'check_interval': self.check_interval,
+            'running': self.running or worker_alive,
+            'worker': 'python -m python.publisher',
+            'last_heartbeat': heartbeat.beat_at.isoformat() + 'Z' if heartbeat else None,
+            'worker_pid': heartbeat.pid if heartbeat else None,
+            'check_interval': heartbeat.check_interval if heartbeat else self.check_interval,
             'scheduled_posts': scheduled_count,
             'published_posts': published_count,
             'failed_posts': failed_count
@@ -222,3 +259,23 @@ class ScheduledPostPublisher:
 
 # Global publisher instance
 publisher = ScheduledPostPublisher()
+
+
+def main():
+    """
+    Standalone publisher worker, independent of the web processes:
+
+        python -m python.publisher
+    """
+    from app import create_app
+    from python.models import init_schema
+    # Use the instance registered by create_app(), not the copy of this module running as __main__
+    from python.publisher import publisher as worker
+
+    app = create_app()
+    init_schema(app)
+    worker.run_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""
+Limitatore a token bucket per le route che generano chiamate RPC
+
+Ogni client (IP + classe di user agent) ha un secchio di gettoni che si ricarica a
+velocità costante; una richiesta consuma uno o più gettoni e, a secchio vuoto, viene
+servita senza lavoro upstream (index.html semplice, 429 per le API).
+"""
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+# (gettoni al secondo, capacità) per classe di user agent
+CLASS_LIMITS = {
+    'browser': (5.0, 60),
+    'crawler': (1.0, 20),
+    'tool': (0.2, 5),       # curl, librerie HTTP, user agent vuoti
+}
+MAX_CLIENTS = 50000         # oltre, si dimenticano i client meno recenti
+
+CRAWLER_PATTERN = re.compile(
+    r'bot|crawl|spider|slurp|facebookexternalhit|embedly|preview|whatsapp|telegram|discord',
+    re.IGNORECASE
+)
+TOOL_PATTERN = re.compile(
+    r'curl|wget|python|java/|go-http|okhttp|axios|node-fetch|libwww|httpclient|scrapy|headless',
+    re.IGNORECASE
+)
+
+
+def classify_user_agent(user_agent):
+    """Classe di limite del client: 'crawler', 'tool' o 'browser'"""
+    if not user_agent:
+        return 'tool'
+    if CRAWLER_PATTERN.search(user_agent):
+        return 'crawler'
+    if TOOL_PATTERN.search(user_agent) or not user_agent.startswith('Mozilla/'):
+        return 'tool'
+    return 'browser'
+
+
+class TokenBucketLimiter:
+    def __init__(self, limits=None, max_clients=MAX_CLIENTS):
+        self.limits = limits or CLASS_LIMITS
+        self.max_clients = max_clients
+        self.enabled = os.environ.get('RATE_LIMIT', '1') != '0'
+        self._buckets = OrderedDict()  # (ip, classe) -> [gettoni, ultimo aggiornamento]
+        self._lock = threading.Lock()
+        self.stats = {'allowed': 0, 'limited': 0}
+
+    def allow(self, ip, user_agent, cost=1):
+        """True se il client ha gettoni sufficienti (e li consuma)"""
+        if not self.enabled:
+            return True
+        ua_class = classify_user_agent(user_agent)
+        rate, capacity = self.limits[ua_class]
+        key = (ip, ua_class)
+        now = time.monotonic()
+
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [float(capacity), now]
+                self._buckets[key] = bucket
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(key)
+                bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+
+            # Un costo oltre la capacità passa solo a secchio pieno e lascia un debito da
+            # ripagare aspettando, così anche i batch grandi pagano per intero
+            if bucket[0] >= min(cost, capacity):
+                bucket[0] -= cost
+                self.stats['allowed'] += 1
+                return True
+            self.stats['limited'] += 1
+            return False
+
+    def retry_after(self, user_agent):
+        """Secondi indicativi prima che torni disponibile un gettone"""
+        rate, _ = self.limits[classify_user_agent(user_agent)]
+        return max(1, int(round(1 / rate)))
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats['clients'] = len(self._buckets)
+        stats['enabled'] = self.enabled
+        return stats
+
+
+# Istanza globale
+rate_limiter = TokenBucketLimiter()
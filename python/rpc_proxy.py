@@ -0,0 +1,287 @@
+"""
+Proxy JSON-RPC con cache per la SPA
+
+Le richieste dei browser passano da /rpc: le chiamate identiche vengono servite dalla
+cache (con TTL diverso per tipo di metodo) oppure unite a quelle già in volo, così
+che verso i nodi pubblici parta una sola richiesta.
+"""
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from urllib.error import URLError, HTTPError
+
+from python.steem_client import steem_client
+
+logger = logging.getLogger(__name__)
+
+# Contenuto immutabile: un blocco non cambia più, la chiave (metodo + numero blocco) basta
+IMMUTABLE_METHODS = {
+    'get_block',
+    'get_block_header',
+    'get_ops_in_block',
+}
+
+# Stato della chain: cambia ad ogni blocco (3 s)
+CHAIN_STATE_METHODS = {
+    'get_dynamic_global_properties',
+    'get_reward_fund',
+    'get_current_median_history_price',
+    'get_feed_history',
+    'get_chain_properties',
+    'get_config',
+}
+
+# Post singolo: cambia con voti e commenti, basta un blocco di cache per unire le
+# richieste identiche (raffiche di crawler, pagine renderizzate lato server)
+CONTENT_METHODS = {
+    'get_content',
+}
+
+# Liste di post ordinate: tollerano qualche secondo di ritardo in più
+RANKED_LIST_METHODS = {
+    'get_discussions_by_trending',
+    'get_discussions_by_hot',
+    'get_discussions_by_created',
+    'get_discussions_by_promoted',
+    'get_trending_tags',
+    'get_ranked_posts',
+}
+
+CHAIN_STATE_TTL = 3
+CONTENT_TTL = 3
+RANKED_LIST_TTL = 30
+IMMUTABLE_TTL = 24 * 3600
+
+MAX_BATCH_SIZE = 50
+MAX_CACHE_ENTRIES = 4096
+
+# Codici di errore JSON-RPC
+INVALID_REQUEST = -32600
+UPSTREAM_ERROR = -32000
+
+
+def normalize_method(method, params):
+    """Restituisce (nome completo, parametri) anche per il formato 'call' di steem-js"""
+    if method == 'call' and isinstance(params, list) and len(params) == 3:
+        return f"{params[0]}.{params[1]}", params[2]
+    return method, params
+
+
+def cache_ttl(full_method):
+    """TTL in secondi per un metodo, None se la risposta non va messa in cache"""
+    namespace, _, name = full_method.rpartition('.')
+    if namespace == 'network_broadcast_api' or name.startswith('broadcast_'):
+        return None
+    if name in IMMUTABLE_METHODS:
+        return IMMUTABLE_TTL
+    if name in CHAIN_STATE_METHODS:
+        return CHAIN_STATE_TTL
+    if name in CONTENT_METHODS:
+        return CONTENT_TTL
+    if name in RANKED_LIST_METHODS:
+        return RANKED_LIST_TTL
+    return None
+
+
+def response_ttl(full_method, stored):
+    """TTL per una risposta riuscita: un blocco non ancora prodotto (result null o vuoto)
+    non è immutabile, va richiesto di nuovo al blocco successivo"""
+    ttl = cache_ttl(full_method)
+    if ttl == IMMUTABLE_TTL and not stored.get('result'):
+        return CHAIN_STATE_TTL
+    return ttl
+
+
+def error_response(request_id, code, message):
+    """Crea una risposta di errore JSON-RPC"""
+    return {
+        "jsonrpc": "2.0",
+        "error": {"code": code, "message": message},
+        "id": request_id
+    }
+
+
+class _InFlight:
+    """Chiamata upstream in corso, condivisa da tutte le richieste identiche"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.response = None
+
+
+class RpcProxy:
+    def __init__(self, client=None, max_entries=MAX_CACHE_ENTRIES):
+        self.client = client or steem_client
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # key -> (expires_at, response senza id)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'deduplicated': 0, 'upstream_calls': 0}
+
+    def handle(self, payload):
+        """Gestisce un payload JSON-RPC singolo o batch e restituisce la risposta"""
+        if isinstance(payload, list):
+            if not payload:
+                return error_response(None, INVALID_REQUEST, "Empty batch")
+            if len(payload) > MAX_BATCH_SIZE:
+                return error_response(None, INVALID_REQUEST, f"Batch too large (max {MAX_BATCH_SIZE})")
+            return self._handle_batch(payload)
+        if isinstance(payload, dict):
+            return self._handle_batch([payload])[0]
+        return error_response(None, INVALID_REQUEST, "Invalid request")
+
+    def call(self, method, params):
+        """Esegue una singola chiamata passando dalla cache; restituisce il campo result o None"""
+        response = self.handle({"jsonrpc": "2.0", "method": method, "params": params, "id": 1})
+        return response.get('result')
+
+    def upstream_cost(self, payload):
+        """Quante richieste del payload andrebbero ai nodi (né in cache né già in volo)"""
+        requests = payload if isinstance(payload, list) else [payload]
+        if len(requests) > MAX_BATCH_SIZE:
+            return 0  # rifiutato da handle() senza chiamate upstream
+        cost = 0
+        seen = set()
+        now = time.time()
+        with self._lock:
+            for req in requests:
+                if not isinstance(req, dict) or not isinstance(req.get('method'), str):
+                    continue
+                full_method, params = normalize_method(req['method'], req.get('params', []))
+                if cache_ttl(full_method) is not None:
+                    key = self._key(full_method, params)
+                    cached = self._cache.get(key)
+                    if (cached and cached[0] > now) or key in self._in_flight or key in seen:
+                        continue
+                    seen.add(key)
+                cost += 1
+        return cost
+
+    def get_stats(self):
+        """Statistiche di utilizzo della cache"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._cache)
+        lookups = stats['hits'] + stats['misses'] + stats['deduplicated']
+        stats['hit_ratio'] = round((stats['hits'] + stats['deduplicated']) / lookups, 3) if lookups else 0.0
+        return stats
+
+    def _handle_batch(self, requests):
+        responses = [None] * len(requests)
+        waiting = []   # (indice, _InFlight) di chiamate avviate da altri
+        leading = []   # (indice, richiesta, chiave, _InFlight) da inoltrare noi
+
+        now = time.time()
+        with self._lock:
+            for i, req in enumerate(requests):
+                if not isinstance(req, dict) or not isinstance(req.get('method'), str):
+                    responses[i] = error_response(None, INVALID_REQUEST, "Invalid request")
+                    continue
+
+                full_method, params = normalize_method(req['method'], req.get('params', []))
+                ttl = cache_ttl(full_method)
+                if ttl is None:
+                    self.stats['misses'] += 1
+                    leading.append((i, req, None, None))
+                    continue
+
+                key = self._key(full_method, params)
+                cached = self._cache.get(key)
+                if cached and cached[0] > now:
+                    self._cache.move_to_end(key)
+                    self.stats['hits'] += 1
+                    responses[i] = self._with_id(cached[1], req.get('id'))
+                elif key in self._in_flight:
+                    self.stats['deduplicated'] += 1
+                    waiting.append((i, self._in_flight[key]))
+                else:
+                    self.stats['misses'] += 1
+                    pending = _InFlight()
+                    self._in_flight[key] = pending
+                    leading.append((i, req, key, pending))
+
+        if leading:
+            self._forward(requests, responses, leading)
+
+        for i, pending in waiting:
+            pending.event.wait(timeout=15)
+            if pending.response is None:
+                responses[i] = error_response(requests[i].get('id'), UPSTREAM_ERROR, "Upstream request failed")
+            else:
+                responses[i] = self._with_id(pending.response, requests[i].get('id'))
+
+        return responses
+
+    def _forward(self, requests, responses, leading):
+        """Inoltra le richieste non in cache con una sola chiamata upstream"""
+        upstream = [
+            {
+                "jsonrpc": "2.0",
+                "method": req['method'],
+                "params": req.get('params', []),
+                "id": n
+            }
+            for n, (_, req, _, _) in enumerate(leading)
+        ]
+
+        results = {}
+        try:
+            try:
+                with self._lock:
+                    self.stats['upstream_calls'] += 1
+                reply = self.client.call_raw(upstream if len(upstream) > 1 else upstream[0])
+                if isinstance(reply, dict):
+                    reply = [reply]
+                if not isinstance(reply, list):
+                    raise ValueError(f"unexpected reply type {type(reply).__name__}")
+                for item in reply:
+                    if isinstance(item, dict) and isinstance(item.get('id'), int):
+                        results[item['id']] = item
+            except (URLError, HTTPError, OSError, ValueError) as e:
+                logger.warning(f"RPC proxy upstream error: {e}")
+
+            now = time.time()
+            with self._lock:
+                for n, (i, req, key, pending) in enumerate(leading):
+                    item = results.get(n)
+                    if item is None:
+                        responses[i] = error_response(req.get('id'), UPSTREAM_ERROR, "Upstream request failed")
+                        stored = None
+                    else:
+                        stored = {k: v for k, v in item.items() if k != 'id'}
+                        responses[i] = self._with_id(stored, req.get('id'))
+
+                    if key is None:
+                        continue
+                    if stored is not None and 'error' not in stored:
+                        full_method, _ = normalize_method(req['method'], req.get('params', []))
+                        self._cache[key] = (now + response_ttl(full_method, stored), stored)
+                        self._cache.move_to_end(key)
+                        while len(self._cache) > self.max_entries:
+                            self._cache.popitem(last=False)
+                    pending.response = stored
+        finally:
+            # Anche per errori imprevisti: chi aspetta viene svegliato e la chiave liberata
+            with self._lock:
+                for _, _, key, pending in leading:
+                    if key is None:
+                        continue
+                    if self._in_flight.get(key) is pending:
+                        del self._in_flight[key]
+                    pending.event.set()
+
+    @staticmethod
+    def _key(full_method, params):
+        return json.dumps([full_method, params], sort_keys=True, separators=(',', ':'))
+
+    @staticmethod
+    def _with_id(stored, request_id):
+        response = dict(stored)
+        response['id'] = request_id
+        return response
+
+
+# Istanza globale del proxy
+rpc_proxy = RpcProxy()
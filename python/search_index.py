@@ -0,0 +1,512 @@
+"""
+Indice di ricerca full-text locale sui post (SQLite FTS5)
+
+I post visti dal server (snapshot dei feed, anteprime, recuperi su richiesta) vengono
+accodati e scritti a blocchi in una sola transazione. La ricerca supporta prefissi,
+ordinamento BM25 e paginazione a cursore.
+
+BM25 legge l'intera doclist di ogni termine, quindi su tutto l'indice il costo cresce con
+il numero di post. Per questo i post più recenti (RECENT_WINDOW) hanno un secondo indice
+FTS5 sulla stessa tabella (recent_fts): la prima fase della ricerca ordina per BM25 solo
+lì (sui MAX_CANDIDATES risultati più recenti), poi si prosegue sui post più vecchi in
+ordine di id, senza punteggio.
+
+Le query SQLite sono bloccanti: sotto gevent girano nel threadpool dell'hub
+(run_blocking), con connessioni prese da un pool limitato per processo.
+"""
+import atexit
+import base64
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from python.concurrency import run_blocking
+from python.steem_client import steem_client
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0        # secondi
+MAX_BODY_LENGTH = 5000      # testo indicizzato per post
+EXCERPT_LENGTH = 150
+RECENT_WINDOW = 100000      # post più recenti cercati per BM25 (indice recent_fts)
+MAX_CANDIDATES = 5000       # risultati più recenti di recent_fts ordinati per BM25
+PRUNE_STEP = 10000          # post usciti dalla finestra prima di toglierli da recent_fts
+MIN_QUERY_LENGTH = 2        # caratteri alfanumerici nella query
+MIN_PREFIX_LENGTH = 3       # l'ultimo termine è cercato come prefisso solo da 3 caratteri
+SEARCH_TIMEOUT = 0.5        # secondi per query, poi SQLite la interrompe
+PROGRESS_STEPS = 1000       # istruzioni SQLite tra un controllo del tempo e l'altro
+RESULT_CACHE_TTL = 30       # secondi: la stessa query ripetuta a ogni tasto non torna su SQLite
+MAX_CACHED_RESULTS = 1024
+POOL_SIZE = 4               # connessioni SQLite per processo
+POOL_WAIT = 1.0             # secondi di attesa per una connessione libera
+
+# Pesi BM25 per colonna: title, tags, author, body
+BM25_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    author TEXT NOT NULL,
+    permlink TEXT NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    tags TEXT NOT NULL DEFAULT '',
+    category TEXT,
+    created TEXT,
+    body TEXT NOT NULL DEFAULT '',
+    UNIQUE (author, permlink)
+);
+CREATE INDEX IF NOT EXISTS ix_posts_created ON posts (created);
+CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+    title, tags, author, body,
+    content='posts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO posts_fts (rowid, title, tags, author, body)
+    VALUES (new.id, new.title, new.tags, new.author, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, tags, author, body)
+    VALUES ('delete', old.id, old.title, old.tags, old.author, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE ON posts BEGIN
+    INSERT INTO posts_fts (posts_fts, rowid, title, tags, author, body)
+    VALUES ('delete', old.id, old.title, old.tags, old.author, old.body);
+    INSERT INTO posts_fts (rowid, title, tags, author, body)
+    VALUES (new.id, new.title, new.tags, new.author, new.body);
+END;
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS recent_fts USING fts5(
+    title, tags, author, body,
+    content='posts', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2',
+    prefix='2 3'
+);
+CREATE TRIGGER IF NOT EXISTS posts_recent_ai AFTER INSERT ON posts BEGIN
+    INSERT INTO recent_fts (rowid, title, tags, author, body)
+    VALUES (new.id, new.title, new.tags, new.author, new.body);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_recent_ad AFTER DELETE ON posts
+WHEN old.id >= (SELECT value FROM search_meta WHERE key = 'recent_from') BEGIN
+    INSERT INTO recent_fts (recent_fts, rowid, title, tags, author, body)
+    VALUES ('delete', old.id, old.title, old.tags, old.author, old.body);
+END;
+CREATE TRIGGER IF NOT EXISTS posts_recent_au AFTER UPDATE ON posts
+WHEN old.id >= (SELECT value FROM search_meta WHERE key = 'recent_from') BEGIN
+    INSERT INTO recent_fts (recent_fts, rowid, title, tags, author, body)
+    VALUES ('delete', old.id, old.title, old.tags, old.author, old.body);
+    INSERT INTO recent_fts (rowid, title, tags, author, body)
+    VALUES (new.id, new.title, new.tags, new.author, new.body);
+END;
+"""
+
+UPSERT = """
+INSERT INTO posts (author, permlink, title, tags, category, created, body)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (author, permlink) DO UPDATE SET
+    title = excluded.title, tags = excluded.tags, category = excluded.category, body = excluded.body
+WHERE posts.title != excluded.title OR posts.tags != excluded.tags OR posts.body != excluded.body
+"""
+
+
+class SearchTimeout(TimeoutError):
+    """Query interrotta dopo SEARCH_TIMEOUT o nessuna connessione libera nel pool"""
+
+
+def build_match_query(text):
+    """Query FTS5 da testo libero: tutti i termini richiesti, l'ultimo come prefisso
+    (se abbastanza lungo: un prefisso di 1-2 lettere si espande in migliaia di termini)"""
+    terms = re.findall(r'\w+', text.lower())[:8]
+    if not terms or sum(len(term) for term in terms) < MIN_QUERY_LENGTH:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def encode_cursor(*position):
+    """Cursore opaco: ('r', punteggio, id) nei post recenti, ('o', id) in quelli più vecchi"""
+    raw = json.dumps(position).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded))
+        if position and position[0] == 'o':
+            return 'o', int(position[1])
+        if position and position[0] == 'r':
+            position = position[1:]
+        score, row_id = position  # i cursori senza fase sono della prima
+        return 'r', float(score), int(row_id)
+    except (ValueError, TypeError, IndexError):
+        return None
+
+
+def post_to_row(post):
+    """Riga dell'indice da un post (condenser o bridge)"""
+    metadata = steem_client.parse_metadata(post.get('json_metadata'))
+    tags = metadata.get('tags') if isinstance(metadata, dict) else None
+    if not isinstance(tags, list):
+        tags = []
+    category = post.get('category') or post.get('parent_permlink') or ''
+    if category and category not in tags:
+        tags = [category] + tags
+    body = steem_client.clean_text(post.get('body', ''))[:MAX_BODY_LENGTH]
+    return (
+        post['author'],
+        post['permlink'],
+        post.get('title') or '',
+        ' '.join(str(tag) for tag in tags[:10]),
+        category,
+        post.get('created'),
+        body
+    )
+
+
+class SearchIndex:
+    def __init__(self, path=None, result_ttl=RESULT_CACHE_TTL):
+        self.path = path
+        self.result_ttl = result_ttl
+        self._pool = queue.LifoQueue()  # connessioni libere, l'ultima usata per prima
+        self._opened = 0
+        self._prepared = False
+        self._queue = queue.Queue(maxsize=50000)
+        self._writer = None
+        self._lock = threading.Lock()
+        self._results = OrderedDict()  # (match, limit, cursore) -> (scade il, risultato)
+
+    def init_app(self, app):
+        """Indice nella cartella instance dell'app, accanto al database"""
+        if self.path is None:
+            os.makedirs(app.instance_path, exist_ok=True)
+            self.path = os.path.join(app.instance_path, 'search.db')
+        self._prepare()
+
+    def _connect(self):
+        # Autocommit: le scritture aprono esplicitamente BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _prepare(self):
+        """Schema e indice dei post recenti, una volta per processo"""
+        if self._prepared:
+            return
+        with self._lock:
+            if self._prepared:
+                return
+            conn = self._connect()
+            conn.executescript(SCHEMA)
+            self._transaction(conn, self._init_recent)
+            self._opened += 1
+            self._pool.put(conn)
+            self._prepared = True
+
+    def _init_recent(self, conn):
+        # Database creato prima di recent_fts: indicizza gli ultimi RECENT_WINDOW post
+        if conn.execute("SELECT 1 FROM search_meta WHERE key = 'recent_from'").fetchone():
+            return
+        recent_from = max(1, conn.execute('SELECT coalesce(max(id), 0) FROM posts').fetchone()[0] - RECENT_WINDOW + 1)
+        conn.execute("INSERT INTO recent_fts (recent_fts) VALUES ('delete-all')")
+        conn.execute(
+            'INSERT INTO recent_fts (rowid, title, tags, author, body) '
+            'SELECT id, title, tags, author, body FROM posts WHERE id >= ?',
+            (recent_from,)
+        )
+        conn.execute("INSERT INTO search_meta (key, value) VALUES ('recent_from', ?)", (recent_from,))
+
+    def _prune_recent(self, conn):
+        """Toglie da recent_fts i post usciti dalla finestra, PRUNE_STEP alla volta"""
+        recent_from = conn.execute("SELECT value FROM search_meta WHERE key = 'recent_from'").fetchone()[0]
+        target = conn.execute('SELECT coalesce(max(id), 0) FROM posts').fetchone()[0] - RECENT_WINDOW + 1
+        if target - recent_from < PRUNE_STEP:
+            return
+        conn.execute(
+            "INSERT INTO recent_fts (recent_fts, rowid, title, tags, author, body) "
+            "SELECT 'delete', id, title, tags, author, body FROM posts WHERE id >= ? AND id < ?",
+            (recent_from, target)
+        )
+        conn.execute("UPDATE search_meta SET value = ? WHERE key = 'recent_from'", (target,))
+
+    @staticmethod
+    def _transaction(conn, fn, *args):
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            fn(conn, *args)
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def _acquire(self, wait):
+        self._prepare()
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            opening = self._opened < POOL_SIZE
+            if opening:
+                self._opened += 1
+        if opening:
+            try:
+                return self._connect()
+            except BaseException:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._pool.get(timeout=wait)
+        except queue.Empty:
+            raise SearchTimeout("No free search index connection")
+
+    def _run(self, fn, *args, wait=None):
+        """fn(connessione, *args) in un thread vero, con una connessione del pool"""
+        conn = self._acquire(wait)
+        try:
+            return run_blocking(fn, conn, *args)
+        finally:
+            self._pool.put(conn)
+
+    def ingest(self, posts):
+        """Accoda post da indicizzare; solo i post principali, non i commenti"""
+        if self.path is None:
+            return
+        self._ensure_writer()
+        for post in posts or []:
+            if not isinstance(post, dict) or not post.get('author') or not post.get('permlink'):
+                continue
+            if post.get('parent_author'):
+                continue
+            try:
+                self._queue.put_nowait(post_to_row(post))
+            except queue.Full:
+                logger.warning("Search index queue full, dropping posts")
+                return
+
+    def write_batch(self, rows):
+        """Scrive un blocco di righe in una sola transazione"""
+        self._run(self._transaction, self._write, rows)
+
+    def _write(self, conn, rows):
+        conn.executemany(UPSERT, rows)
+        self._prune_recent(conn)
+
+    def flush(self):
+        """Scrive subito tutte le righe in coda; restituisce quante ne ha scritte"""
+        written = 0
+        while True:
+            rows = self._drain()
+            if not rows:
+                return written
+            self.write_batch(rows)
+            written += len(rows)
+
+    def _drain(self, first=None):
+        rows = [first] if first else []
+        while len(rows) < BATCH_SIZE:
+            try:
+                rows.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return rows
+
+    def search(self, text, limit=20, cursor=None):
+        """Post che corrispondono al testo: prima i recenti per BM25, poi i più vecchi per data.
+        Restituisce (risultati, cursore); SearchTimeout se la query non finisce in tempo"""
+        match = build_match_query(text)
+        if match is None or self.path is None:
+            return [], None
+
+        if not self.result_ttl:
+            return self._run(self._search, match, limit, cursor, wait=POOL_WAIT)
+        key = (match, limit, cursor)
+        now = time.time()
+        with self._lock:
+            cached = self._results.get(key)
+            if cached and cached[0] > now:
+                self._results.move_to_end(key)
+                return cached[1]
+
+        # Le query interrotte non vanno in cache: SearchTimeout arriva al chiamante
+        result = self._run(self._search, match, limit, cursor, wait=POOL_WAIT)
+        with self._lock:
+            self._results[key] = (now + self.result_ttl, result)
+            self._results.move_to_end(key)
+            while len(self._results) > MAX_CACHED_RESULTS:
+                self._results.popitem(last=False)
+        return result
+
+    def _search(self, conn, match, limit, cursor):
+        # SEARCH_TIMEOUT interrompe la query tra un passo e l'altro di SQLite. La fase BM25
+        # legge le doclist solo di recent_fts, quindi il suo costo non cresce con l'indice
+        # (nel benchmark i prefissi lunghi restano il caso peggiore: ~0.5 s a 300k post);
+        # sui post più vecchi FTS5 scorre le doclist per id decrescente e si ferma al LIMIT.
+        position = decode_cursor(cursor) if cursor else ('r', None, None)
+        if position is None:
+            return [], None
+        deadline = time.monotonic() + SEARCH_TIMEOUT
+        conn.set_progress_handler(lambda: time.monotonic() > deadline, PROGRESS_STEPS)
+        try:
+            recent_from = conn.execute("SELECT value FROM search_meta WHERE key = 'recent_from'").fetchone()[0]
+            rows = []
+            if position[0] == 'r':
+                rows = self._ranked(conn, match, limit + 1, position[1], position[2])
+                if len(rows) > limit:
+                    last = rows[limit - 1]
+                    return self._results_page(rows[:limit]), encode_cursor('r', last[7], last[0])
+                position = ('o', self._ranked_from(conn, match, recent_from))
+            if position[1] <= 1:
+                return self._results_page(rows), None
+            try:
+                older = self._older(conn, match, limit + 1 - len(rows), position[1])
+            except sqlite3.OperationalError:
+                if not rows:
+                    raise
+                # Pagina già avviata con i recenti: il resto alla richiesta successiva
+                return self._results_page(rows), encode_cursor('o', position[1])
+            rows += older
+            next_cursor = None
+            if len(rows) > limit:
+                next_cursor = encode_cursor('o', rows[limit - 1][0])
+            return self._results_page(rows[:limit]), next_cursor
+        except sqlite3.OperationalError as e:
+            if time.monotonic() > deadline:
+                raise SearchTimeout(f"Search query interrupted after {SEARCH_TIMEOUT}s") from e
+            logger.warning(f"Search query failed for {match!r}: {e}")
+            return [], None
+        finally:
+            conn.set_progress_handler(None, 0)
+
+    @staticmethod
+    def _ranked(conn, match, count, score, row_id):
+        weights = ', '.join(map(str, BM25_WEIGHTS))
+        ranked = (
+            "SELECT rowid, score FROM ("
+            f"SELECT rowid, bm25(recent_fts, {weights}) AS score FROM recent_fts "
+            "WHERE recent_fts MATCH ? ORDER BY rowid DESC LIMIT ?)"
+        )
+        params = [match, MAX_CANDIDATES]
+        if score is not None:
+            ranked += " WHERE score > ? OR (score = ? AND rowid > ?)"
+            params += [score, score, row_id]
+        ranked += " ORDER BY score, rowid LIMIT ?"
+        params.append(count)
+        return conn.execute(
+            "SELECT p.id, p.author, p.permlink, p.title, p.category, p.created, "
+            f"substr(p.body, 1, {EXCERPT_LENGTH}), m.score "
+            f"FROM ({ranked}) m JOIN posts p ON p.id = m.rowid "
+            "ORDER BY m.score, m.rowid",
+            params
+        ).fetchall()
+
+    @staticmethod
+    def _ranked_from(conn, match, recent_from):
+        """Primo id dopo la fase BM25: il candidato più vecchio se i candidati sono al completo"""
+        found, oldest = conn.execute(
+            "SELECT count(*), min(rowid) FROM ("
+            "SELECT rowid FROM recent_fts WHERE recent_fts MATCH ? ORDER BY rowid DESC LIMIT ?)",
+            (match, MAX_CANDIDATES)
+        ).fetchone()
+        return oldest if found == MAX_CANDIDATES else recent_from
+
+    @staticmethod
+    def _older(conn, match, count, before_id):
+        return conn.execute(
+            "SELECT p.id, p.author, p.permlink, p.title, p.category, p.created, "
+            f"substr(p.body, 1, {EXCERPT_LENGTH}), NULL "
+            "FROM (SELECT rowid FROM posts_fts WHERE posts_fts MATCH ? AND rowid < ? ORDER BY rowid DESC LIMIT ?) m "
+            "JOIN posts p ON p.id = m.rowid ORDER BY p.id DESC",
+            (match, before_id, count)
+        ).fetchall()
+
+    @staticmethod
+    def _results_page(rows):
+        return [
+            {
+                'author': author,
+                'permlink': permlink,
+                'title': title,
+                'category': category,
+                'created': created,
+                'excerpt': excerpt,
+                'score': round(score, 4) if score is not None else None
+            }
+            for _, author, permlink, title, category, created, excerpt, score in rows
+        ]
+
+    def _fetch(self, sql, params=()):
+        """Tutte le righe della query: la connessione torna subito nel pool"""
+        if self.path is None:
+            return []
+        return self._run(lambda conn: conn.execute(sql, params).fetchall())
+
+    def count(self):
+        return self._fetch('SELECT count(*) FROM posts')[0][0]
+
+    def max_id(self):
+        if self.path is None:
+            return 0
+        return self._fetch('SELECT coalesce(max(id), 0) FROM posts')[0][0]
+
+    def iter_posts(self, first_id, last_id):
+        """(author, permlink, created) dei post con id nell'intervallo"""
+        return self._fetch(
+            'SELECT author, permlink, created FROM posts WHERE id BETWEEN ? AND ? ORDER BY id',
+            (first_id, last_id)
+        )
+
+    def count_authors(self):
+        if self.path is None:
+            return 0
+        return self._fetch('SELECT count(DISTINCT author) FROM posts')[0][0]
+
+    def iter_authors(self, offset, limit):
+        """(author, ultimo post) in ordine alfabetico"""
+        return self._fetch(
+            'SELECT author, max(created) FROM posts GROUP BY author ORDER BY author LIMIT ? OFFSET ?',
+            (limit, offset)
+        )
+
+    def iter_communities(self):
+        """(community, ultimo post) delle community presenti nell'indice"""
+        return self._fetch(
+            "SELECT category, max(created) FROM posts WHERE category LIKE 'hive-%' GROUP BY category ORDER BY category"
+        )
+
+    def _ensure_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._run_writer, daemon=True)
+                self._writer.start()
+                atexit.register(self.flush)
+
+    def _run_writer(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                continue
+            try:
+                self.write_batch(self._drain(first))
+            except sqlite3.Error as e:
+                logger.error(f"Error writing search index batch: {e}")
+
+
+# Istanza globale
+search_index = SearchIndex()
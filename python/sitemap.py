@@ -0,0 +1,202 @@
+"""
+Sitemap XML per post, profili e community
+
+Le URL vengono dall'indice locale dei post (search_index); se l'indice è ancora vuoto
+si usa la paginazione di get_discussions_by_created. I file vengono generati in
+streaming riga per riga (memoria costante qualunque sia la dimensione) e salvati su
+disco mentre vengono inviati: i blocchi di post già completi non cambiano più, solo
+l'ultimo viene rigenerato quando arrivano post nuovi.
+
+Le URL usano l'URL canonico del sito (SITE_URL), mai l'host della richiesta: un client
+potrebbe altrimenti creare una cartella di cache e una rigenerazione per ogni Host.
+"""
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from xml.sax.saxutils import escape
+
+from python.rpc_proxy import rpc_proxy
+from python.search_index import search_index
+
+logger = logging.getLogger(__name__)
+
+SHARD_SIZE = 10000          # URL per file (il protocollo ne consente 50000)
+OPEN_SHARD_TTL = 300        # secondi, ultimo blocco di post ancora in crescita
+LIST_TTL = 3600             # profili e community
+INDEX_TTL = 300
+RPC_PAGE_SIZE = 100
+RPC_MAX_PAGES = int(os.environ.get('SITEMAP_RPC_PAGES', '20'))
+CHUNK_SIZE = 64 * 1024
+
+URLSET_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+URLSET_FOOTER = '</urlset>\n'
+
+
+def lastmod_date(created):
+    """Data W3C (YYYY-MM-DD) da un timestamp Steem"""
+    if created and re.match(r'^\d{4}-\d{2}-\d{2}', created):
+        return created[:10]
+    return None
+
+
+def url_entry(loc, lastmod=None):
+    if lastmod:
+        return f"<url><loc>{escape(loc)}</loc><lastmod>{lastmod}</lastmod></url>\n"
+    return f"<url><loc>{escape(loc)}</loc></url>\n"
+
+
+class SitemapBuilder:
+    def __init__(self, index=None, cache_dir=None):
+        self.index = index or search_index
+        self.cache_dir = cache_dir
+        self._index_cache = {}  # base_url -> (generato il, xml)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        if self.cache_dir is None:
+            self.cache_dir = os.path.join(app.instance_path, 'sitemaps')
+
+    def post_shard_count(self):
+        max_id = self.index.max_id()
+        if not max_id:
+            return 1  # indice vuoto: un solo file dai post recenti via RPC
+        return (max_id - 1) // SHARD_SIZE + 1
+
+    def profile_shard_count(self):
+        return (self.index.count_authors() + SHARD_SIZE - 1) // SHARD_SIZE
+
+    def sitemap_index(self, base_url):
+        """Indice dei sitemap (piccolo: una riga per file), tenuto in memoria per qualche minuto"""
+        with self._lock:
+            cached = self._index_cache.get(base_url)
+        if cached and time.time() - cached[0] < INDEX_TTL:
+            return cached[1]
+
+        names = [f"sitemap-{n}.xml" for n in range(self.post_shard_count())]
+        names += [f"sitemap-profiles-{n}.xml" for n in range(self.profile_shard_count())]
+        if self.index.max_id():
+            names.append('sitemap-communities.xml')
+        xml = (
+            '<?xml version="1.0" encoding="UTF-8"?>\n'
+            '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+            + ''.join(f"<sitemap><loc>{escape(base_url)}/{name}</loc></sitemap>\n" for name in names)
+            + '</sitemapindex>\n'
+        )
+        with self._lock:
+            self._index_cache[base_url] = (time.time(), xml)
+        return xml
+
+    def posts(self, n, base_url):
+        """Blocco n dei post come generatore di frammenti XML, o None se non esiste"""
+        if n < 0 or n >= self.post_shard_count():
+            return None
+        max_id = self.index.max_id()
+        if not max_id:
+            return self._cached(base_url, 'posts-rpc', OPEN_SHARD_TTL, lambda: self._rpc_post_urls(base_url))
+
+        first_id, last_id = n * SHARD_SIZE + 1, (n + 1) * SHARD_SIZE
+        rows = lambda: (
+            url_entry(f"{base_url}/@{author}/{permlink}", lastmod_date(created))
+            for author, permlink, created in self.index.iter_posts(first_id, last_id)
+        )
+        if max_id > last_id:
+            # Blocco completo: il file su disco resta valido per sempre
+            return self._cached(base_url, f"posts-{n}.complete", None, rows)
+        return self._cached(base_url, f"posts-{n}", OPEN_SHARD_TTL, rows)
+
+    def profiles(self, n, base_url):
+        if n < 0 or n >= self.profile_shard_count():
+            return None
+        rows = lambda: (
+            url_entry(f"{base_url}/@{author}", lastmod_date(created))
+            for author, created in self.index.iter_authors(n * SHARD_SIZE, SHARD_SIZE)
+        )
+        return self._cached(base_url, f"profiles-{n}", LIST_TTL, rows)
+
+    def communities(self, base_url):
+        rows = lambda: (
+            url_entry(f"{base_url}/community/{name}", lastmod_date(created))
+            for name, created in self.index.iter_communities()
+        )
+        return self._cached(base_url, 'communities', LIST_TTL, rows)
+
+    def _rpc_post_urls(self, base_url):
+        """Post recenti paginando get_discussions_by_created (finché l'indice locale è vuoto)"""
+        start = {}
+        for _ in range(RPC_MAX_PAGES):
+            page = rpc_proxy.call(
+                'condenser_api.get_discussions_by_created',
+                [dict({"tag": "", "limit": RPC_PAGE_SIZE}, **start)]
+            )
+            if not isinstance(page, list):
+                break
+            if start and page:
+                page = page[1:]  # il primo risultato è l'ultimo della pagina precedente
+            if not page:
+                break
+            self.index.ingest(page)
+            for post in page:
+                yield url_entry(f"{base_url}/@{post['author']}/{post['permlink']}", lastmod_date(post.get('created')))
+            start = {"start_author": page[-1]['author'], "start_permlink": page[-1]['permlink']}
+
+    def _cached(self, base_url, name, ttl, rows):
+        """Serve il file da disco se valido, altrimenti lo genera (rows() produce le righe)
+        inviandolo e salvandolo insieme"""
+        host = re.sub(r'[^a-zA-Z0-9.-]', '_', base_url.split('://', 1)[-1])
+        directory = os.path.join(self.cache_dir, host)
+        path = os.path.join(directory, f"{name}.xml")
+        try:
+            if ttl is None or time.time() - os.path.getmtime(path) < ttl:
+                return self._read_file(path)
+        except OSError:
+            pass
+        os.makedirs(directory, exist_ok=True)
+        return self._write_through(path, rows)
+
+    def _read_file(self, path):
+        # Aperto subito: se il file non c'è l'errore arriva a _cached, non durante la risposta
+        f = open(path, 'rb')
+
+        def chunks():
+            with f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        return
+                    yield chunk
+        return chunks()
+
+    def _write_through(self, path, rows):
+        def chunks():
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+            completed = False
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    buffer = [URLSET_HEADER]
+                    size = len(URLSET_HEADER)
+                    for row in rows():
+                        buffer.append(row)
+                        size += len(row)
+                        if size >= CHUNK_SIZE:
+                            data = ''.join(buffer).encode('utf-8')
+                            f.write(data)
+                            yield data
+                            buffer, size = [], 0
+                    buffer.append(URLSET_FOOTER)
+                    data = ''.join(buffer).encode('utf-8')
+                    f.write(data)
+                    yield data
+                os.replace(tmp_path, path)
+                completed = True
+            finally:
+                # Client disconnesso o errore a metà: il file parziale non va tenuto
+                if not completed and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+        return chunks()
+
+
+# Istanza globale
+sitemap_builder = SitemapBuilder()
@@ -2,15 +2,255 @@
 Client per interagire con l'API Steem/Hive senza dipendenze esterne
 """
 import json
+import os
 import re
+import threading
+import time
 import urllib.request
 import urllib.parse
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from urllib.error import URLError, HTTPError
 
+from python.concurrency import UpstreamOverloaded, UpstreamSlots
+
+DEFAULT_NODES = [
+    "https://api.steemit.com",
+    "https://api.moecki.online",
+    "https://api.steemyy.com",
+]
+
+# Hedging: se il nodo primario non risponde entro un suo percentile di latenza, la stessa
+# richiesta (solo lettura) parte anche verso un secondo nodo e vince la prima risposta valida.
+# Il percentile è il p95 e non il p90: con il p90 un 10% di richieste vorrebbe l'hedge,
+# il doppio di quanto il budget consente.
+HEDGE_PERCENTILE = 0.95
+HEDGE_DEFAULT_DELAY = 0.5   # secondi, finché non ci sono abbastanza campioni
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MIN_SAMPLES = 20
+HEDGE_BUDGET_RATIO = 0.05   # richieste extra al massimo pari al 5% di quelle normali
+HEDGE_BUDGET_BURST = 5
+LATENCY_WINDOW = 200
+
+# Chiamate upstream contemporanee per processo: oltre, si aspetta al massimo MAX_QUEUE_WAIT
+# e poi si rinuncia, invece di accumulare thread bloccati su nodi già lenti. Ogni richiesta
+# HTTP occupa un posto finché non finisce, compreso l'hedge che ha perso la gara; l'hedge
+# parte solo se c'è un posto libero subito.
+MAX_UPSTREAM_CONCURRENCY = int(os.environ.get('STEEM_MAX_CONCURRENCY', '16'))
+MAX_QUEUE_WAIT = float(os.environ.get('STEEM_MAX_QUEUE_WAIT', '2'))
+
+
+def is_read_only(payload):
+    """True se nessuna richiesta del payload è un broadcast (e quindi si può duplicare)"""
+    items = payload if isinstance(payload, list) else [payload]
+    for item in items:
+        method = item.get('method', '') if isinstance(item, dict) else ''
+        params = item.get('params') if isinstance(item, dict) else None
+        if method == 'call' and isinstance(params, list) and len(params) >= 2:
+            method = f"{params[0]}.{params[1]}"
+        if method.startswith('network_broadcast_api.') or '.broadcast_' in method:
+            return False
+    return True
+
+
+def is_valid_response(response):
+    if isinstance(response, list):
+        return bool(response) and all(is_valid_response(item) for item in response)
+    return isinstance(response, dict) and 'result' in response and 'error' not in response
+
+
+def load_nodes():
+    """Nodi da STEEM_NODES (separati da virgola) o dai "ranked_nodes" del file
+    STEEM_NODES_FILE prodotto da test_nodes.py --bench; altrimenti quelli predefiniti"""
+    nodes = os.environ.get('STEEM_NODES')
+    if nodes:
+        return [n.strip() for n in nodes.split(',') if n.strip()] or DEFAULT_NODES
+    path = os.environ.get('STEEM_NODES_FILE')
+    if path:
+        try:
+            with open(path, encoding='utf-8') as f:
+                ranked = json.load(f).get('ranked_nodes')
+            if isinstance(ranked, list) and ranked:
+                return [str(n) for n in ranked]
+        except (OSError, ValueError, AttributeError) as e:
+            print(f"Error reading STEEM_NODES_FILE {path}: {e}")
+    return DEFAULT_NODES
+
+
 class SteemClient:
-    def __init__(self):
-        self.api_url = "https://api.steemit.com"
-    
+    def __init__(self, api_urls=None, hedging=None):
+        # Nodi e hedging vengono letti dall'ambiente al primo uso, non all'import
+        self._api_urls = api_urls
+        self._hedging = hedging
+        self._configured = False
+        self._latencies = {}
+        self._hedge_tokens = float(HEDGE_BUDGET_BURST)
+        self._executor = None
+        self._lock = threading.Lock()
+        self._upstream = UpstreamSlots(MAX_UPSTREAM_CONCURRENCY, MAX_QUEUE_WAIT, 'Steem node')
+        self.stats = {'requests': 0, 'hedged': 0, 'hedge_wins': 0, 'hedge_denied': 0}
+
+    def _configure(self):
+        with self._lock:
+            if self._configured:
+                return
+            self._api_urls = self._api_urls or load_nodes()
+            if self._hedging is None:
+                self._hedging = os.environ.get('STEEM_HEDGING', '1') != '0'
+            self._hedging = self._hedging and len(self._api_urls) > 1
+            self._latencies = {url: deque(maxlen=LATENCY_WINDOW) for url in self._api_urls}
+            self._configured = True
+
+    @property
+    def api_urls(self):
+        if not self._configured:
+            self._configure()
+        return self._api_urls
+
+    @property
+    def api_url(self):
+        return self.api_urls[0]
+
+    @property
+    def hedging(self):
+        if not self._configured:
+            self._configure()
+        return self._hedging
+
+    def call_raw(self, payload, timeout=10):
+        """Invia un payload JSON-RPC (singolo o batch) e restituisce la risposta decodificata.
+
+        Solleva URLError/HTTPError/JSONDecodeError in caso di errore: il chiamante decide
+        come gestirlo. Le richieste di sola lettura usano l'hedging se abilitato; se troppe
+        chiamate sono già in corso solleva UpstreamOverloaded (sottoclasse di TimeoutError).
+        """
+        self._upstream.acquire()
+        with self._lock:
+            self.stats['requests'] += 1
+            self._hedge_tokens = min(HEDGE_BUDGET_BURST, self._hedge_tokens + HEDGE_BUDGET_RATIO)
+        if self.hedging and is_read_only(payload):
+            return self._hedged_call(payload, timeout)
+        try:
+            return self._post(self.api_url, payload, timeout)
+        finally:
+            self._upstream.release()
+
+    def _submit(self, url, payload, timeout):
+        """Richiesta nel pool di thread: il posto preso dal chiamante si libera quando finisce"""
+        try:
+            future = self._get_executor().submit(self._post, url, payload, timeout)
+        except BaseException:
+            self._upstream.release()
+            raise
+        future.add_done_callback(self._upstream.release)
+        return future
+
+    def _post(self, url, payload, timeout):
+        data = json.dumps(payload).encode('utf-8')
+        req = urllib.request.Request(
+            url,
+            data=data,
+            headers={
+                'Content-Type': 'application/json',
+                'User-Agent': 'cur8.fun/1.0'
+            }
+        )
+
+        started = time.monotonic()
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                result = json.loads(response.read().decode('utf-8'))
+        except Exception:
+            # Un errore pesa come un timeout sulla soglia di hedging del nodo
+            if url in self._latencies:
+                self._latencies[url].append(timeout)
+            raise
+        if url in self._latencies:
+            self._latencies[url].append(time.monotonic() - started)
+        return result
+
+    def _hedged_call(self, payload, timeout):
+        primary, secondary = self.api_urls[0], self.api_urls[1]
+        started = time.monotonic()
+        deadline = started + timeout
+        hedge_at = started + self.hedge_delay(primary)
+        pending = {self._submit(primary, payload, timeout): primary}
+        hedged = False
+        fallback = None   # risposta con errore JSON-RPC, usata se non arriva di meglio
+        last_error = None
+
+        while pending and time.monotonic() < deadline:
+            wait_until = deadline if hedged else min(hedge_at, deadline)
+            done, _ = wait(pending, timeout=max(0.0, wait_until - time.monotonic()),
+                           return_when=FIRST_COMPLETED)
+
+            for future in done:
+                node = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if is_valid_response(result):
+                    if node == secondary:
+                        with self._lock:
+                            self.stats['hedge_wins'] += 1
+                    return result
+                fallback = fallback or result
+
+            # Primario lento o fallito: stessa richiesta al secondo nodo, se il budget lo consente
+            if not hedged and (done or time.monotonic() >= hedge_at):
+                hedged = True
+                if self._take_hedge_token():
+                    pending[self._submit(secondary, payload, timeout)] = secondary
+
+        if fallback is not None:
+            return fallback
+        raise last_error or TimeoutError(f"No response within {timeout}s")
+
+    def hedge_delay(self, url):
+        """Soglia adattiva: percentile HEDGE_PERCENTILE delle ultime latenze del nodo"""
+        samples = list(self._latencies.get(url, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DEFAULT_DELAY
+        samples.sort()
+        return max(HEDGE_MIN_DELAY, samples[int(len(samples) * HEDGE_PERCENTILE) - 1])
+
+    def _take_hedge_token(self):
+        """Token del budget di hedging e posto upstream libero, entrambi o nessuno"""
+        if not self._upstream.try_acquire():
+            with self._lock:
+                self.stats['hedge_denied'] += 1
+            return False
+        with self._lock:
+            if self._hedge_tokens >= 1:
+                self._hedge_tokens -= 1
+                self.stats['hedged'] += 1
+                return True
+            self.stats['hedge_denied'] += 1
+        self._upstream.release()
+        return False
+
+    def _get_executor(self):
+        # Creato al primo uso: nessun thread finché non serve. Ogni thread occupa un posto
+        # upstream, quindi non ne servono più di MAX_UPSTREAM_CONCURRENCY
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=MAX_UPSTREAM_CONCURRENCY,
+                                                    thread_name_prefix='steem-rpc')
+            return self._executor
+
+    def get_stats(self):
+        """Contatori di richieste/hedging/scarti e soglia corrente per nodo"""
+        with self._lock:
+            stats = dict(self.stats)
+        stats['in_flight'] = self._upstream.in_flight
+        stats['shed'] = self._upstream.shed
+        stats['max_concurrency'] = MAX_UPSTREAM_CONCURRENCY
+        stats['hedge_ratio'] = round(stats['hedged'] / stats['requests'], 4) if stats['requests'] else 0.0
+        stats['hedge_delay_ms'] = {url: round(self.hedge_delay(url) * 1000) for url in self.api_urls}
+        return stats
+
     def get_content(self, author, permlink):
         """Ottiene il contenuto di un post"""
         try:
@@ -20,24 +260,13 @@ class SteemClient:
                 "params": [author, permlink],
                 "id": 1
             }
-            
-            data = json.dumps(payload).encode('utf-8')
-            req = urllib.request.Request(
-                self.api_url,
-                data=data,
-                headers={
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'cur8.fun/1.0'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                if 'result' in result and result['result']:
-                    return result['result']
-                return None
+
+            result = self.call_raw(payload)
+            if 'result' in result and result['result']:
+                return result['result']
+            return None
                 
-        except (URLError, HTTPError, json.JSONDecodeError) as e:
+        except (URLError, HTTPError, TimeoutError, json.JSONDecodeError) as e:
             print(f"Error fetching content: {e}")
             return None
     
@@ -50,24 +279,13 @@ class SteemClient:
                 "params": [usernames],
                 "id": 1
             }
-            
-            data = json.dumps(payload).encode('utf-8')
-            req = urllib.request.Request(
-                self.api_url,
-                data=data,
-                headers={
-                    'Content-Type': 'application/json',
-                    'User-Agent': 'cur8.fun/1.0'
-                }
-            )
-            
-            with urllib.request.urlopen(req, timeout=10) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                if 'result' in result and result['result']:
-                    return result['result']
-                return []
+
+            result = self.call_raw(payload)
+            if 'result' in result and result['result']:
+                return result['result']
+            return []
                 
-        except (URLError, HTTPError, json.JSONDecodeError) as e:
+        except (URLError, HTTPError, TimeoutError, json.JSONDecodeError) as e:
             print(f"Error fetching accounts: {e}")
             return []
     
@@ -164,6 +382,18 @@ class SteemClient:
         if not content:
             return "Your Steem community social platform"
         
+        clean_content = self.clean_text(content)
+        
+        if len(clean_content) > max_length:
+            clean_content = clean_content[:max_length] + '...'
+        
+        return clean_content or "Your Steem community social platform"
+    
+    def clean_text(self, content):
+        """Testo semplice da markdown/HTML (usato per descrizioni e indice di ricerca)"""
+        if not content:
+            return ''
+        
         # Rimuovi markdown e HTML
         clean_content = re.sub(r'!\[.*?\]\(.*?\)', '', content)  # Rimuovi immagini
         clean_content = re.sub(r'\[.*?\]\(.*?\)', '', clean_content)  # Rimuovi link
@@ -173,12 +403,7 @@ class SteemClient:
         clean_content = re.sub(r'`{1,3}(.*?)`{1,3}', r'\1', clean_content)  # Rimuovi code
         clean_content = re.sub(r'\n+', ' ', clean_content)  # Sostituisci newline
         clean_content = re.sub(r'\s+', ' ', clean_content)  # Rimuovi spazi multipli
-        clean_content = clean_content.strip()
-        
-        if len(clean_content) > max_length:
-            clean_content = clean_content[:max_length] + '...'
-        
-        return clean_content or "Your Steem community social platform"
+        return clean_content.strip()
     
     def parse_metadata(self, json_metadata):
         """Parse metadata JSON"""
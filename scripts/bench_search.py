@@ -0,0 +1,137 @@
+"""
+Benchmark dell'indice di ricerca FTS5 su un corpus sintetico
+Usage: python scripts/bench_search.py [--posts 1000000] [--queries 2000] [--db /tmp/bench-search.db]
+
+Genera i post con un vocabolario a distribuzione Zipf, li inserisce a blocchi con lo
+stesso percorso di scrittura del server e misura la latenza delle ricerche
+(p50/p95/p99) per tipo di query.
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python.search_index import SearchIndex, SearchTimeout, BATCH_SIZE  # noqa: E402
+
+VOCABULARY_SIZE = 30000
+TAGS = ['steem', 'photography', 'cur8', 'art', 'music', 'travel', 'food', 'crypto',
+        'life', 'nature', 'gaming', 'writing', 'science', 'hive-196037', 'dev']
+
+
+def make_vocabulary(rng):
+    consonants, vowels = 'bcdfglmnprstvz', 'aeiou'
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        length = rng.randint(2, 5)
+        words.add(''.join(rng.choice(consonants) + rng.choice(vowels) for _ in range(length)))
+    return sorted(words)
+
+
+def zipf_sampler(rng, words):
+    cumulative = list(itertools.accumulate(1.0 / (rank + 1) for rank in range(len(words))))
+    return lambda k: rng.choices(words, cum_weights=cumulative, k=k)
+
+
+def generate_rows(count, rng, sample):
+    for i in range(count):
+        tags = rng.sample(TAGS, 3)
+        yield (
+            f"author{i % 5000}",
+            f"post-{i}",
+            ' '.join(sample(6)).capitalize(),
+            ' '.join(tags),
+            tags[0],
+            f"2024-{1 + i % 12:02d}-{1 + i % 28:02d}T00:00:00",
+            ' '.join(sample(rng.randint(80, 250)))
+        )
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--posts', type=int, default=1000000)
+    parser.add_argument('--queries', type=int, default=2000)
+    parser.add_argument('--db', default='/tmp/bench-search.db')
+    parser.add_argument('--reuse', action='store_true', help="usa il database esistente senza rigenerarlo")
+    parser.add_argument('--json', help="salva i risultati in questo file")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    words = make_vocabulary(rng)
+    sample = zipf_sampler(rng, words)
+
+    if not args.reuse:
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(args.db + suffix):
+                os.remove(args.db + suffix)
+    index = SearchIndex(args.db, result_ttl=0)  # misura SQLite, non la cache dei risultati
+
+    report = {'posts': args.posts}
+    if not args.reuse:
+        started = time.time()
+        batch = []
+        for n, row in enumerate(generate_rows(args.posts, rng, sample), 1):
+            batch.append(row)
+            if len(batch) == BATCH_SIZE:
+                index.write_batch(batch)
+                batch = []
+            if n % 100000 == 0:
+                print(f"  {n} posts indexed ({n / (time.time() - started):.0f}/s)")
+        if batch:
+            index.write_batch(batch)
+        elapsed = time.time() - started
+        report['ingest_seconds'] = round(elapsed, 1)
+        report['ingest_posts_per_second'] = round(args.posts / elapsed)
+    report['db_megabytes'] = round(os.path.getsize(args.db) / 1e6, 1)
+
+    query_types = {
+        'common_word': lambda: words[rng.randint(0, 50)],
+        'rare_word': lambda: words[rng.randint(5000, VOCABULARY_SIZE - 1)],
+        'prefix': lambda: words[rng.randint(0, 2000)][:3],
+        'two_words': lambda: f"{words[rng.randint(0, 500)]} {words[rng.randint(0, 3000)]}",
+        'tag_and_prefix': lambda: f"{rng.choice(TAGS[:12])} {words[rng.randint(0, 3000)][:4]}",
+    }
+    report['latency_ms'] = {}
+    per_type = max(1, args.queries // len(query_types))
+    for name, make_query in query_types.items():
+        timings, timeouts = [], 0
+        for _ in range(per_type):
+            query = make_query()
+            cursor = None
+            for page in range(2):
+                started = time.perf_counter()
+                try:
+                    results, cursor = index.search(query, limit=20, cursor=cursor)
+                except SearchTimeout:
+                    timeouts += 1
+                    cursor = None
+                timings.append((time.perf_counter() - started) * 1000)
+                if not cursor or rng.random() >= 0.2:
+                    break
+        report['latency_ms'][name] = {
+            'p50': round(percentile(timings, 50), 2),
+            'p95': round(percentile(timings, 95), 2),
+            'p99': round(percentile(timings, 99), 2),
+            'timeouts': timeouts,
+        }
+        print(f"{name:<16} p50 {report['latency_ms'][name]['p50']:>8} ms   "
+              f"p95 {report['latency_ms'][name]['p95']:>8} ms   p99 {report['latency_ms'][name]['p99']:>8} ms   "
+              f"timeouts {timeouts}")
+
+    print(json.dumps(report, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
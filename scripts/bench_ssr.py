@@ -0,0 +1,100 @@
+"""
+Tempo di rendering lato server (markdown -> HTML sanitizzato) su post grandi
+Usage: python scripts/bench_ssr.py [--runs 50] [--json ssr-bench.json]
+
+Genera corpi sintetici nello stile dei post Steem (titoli, paragrafi, liste, immagini,
+HTML grezzo, blocchi di codice) di varie dimensioni e misura il rendering a freddo
+(p50/p95) e la lettura dalla cache.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python.post_renderer import PostRenderer, markdown_to_html, markdown_lib  # noqa: E402
+
+SIZES_KB = [5, 20, 60, 200]
+WORDS = ('steem community post vote reward curation witness block chain token '
+         'photo travel music art food nature daily update crypto market').split()
+
+
+def make_body(rng, size_kb):
+    blocks = []
+    size = 0
+    n = 0
+    while size < size_kb * 1024:
+        n += 1
+        kind = n % 7
+        sentence = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(30, 80)))
+        if kind == 0:
+            block = f"## Section {n}"
+        elif kind == 1:
+            block = f"![photo {n}](https://images.example.com/{n}/photo.jpg)\n{sentence.capitalize()} **{rng.choice(WORDS)}**."
+        elif kind == 2:
+            block = '\n'.join(f"- {rng.choice(WORDS)} [{rng.choice(WORDS)}](https://example.com/{n}_{i})" for i in range(5))
+        elif kind == 3:
+            block = f'<center><img src="https://images.example.com/{n}.png"><br><sub>{sentence[:60]}</sub></center>'
+        elif kind == 4:
+            block = f'<div class="pull-left">{sentence}</div>'
+        elif kind == 5:
+            block = f"```\nfor i in range({n}):\n    print('<b>{n}</b>')\n```"
+        else:
+            block = f"{sentence.capitalize()}. *{rng.choice(WORDS)}* and `code_{n}` and https://images.example.com/{n}.gif"
+        blocks.append(block)
+        size += len(block) + 2
+    return '\n\n'.join(blocks)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--json', help="salva i risultati in questo file")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    report = {'converter': 'markdown' if markdown_lib else 'builtin', 'results': {}}
+    print(f"Converter: {report['converter']}")
+    for size_kb in SIZES_KB:
+        body = make_body(rng, size_kb)
+        timings = []
+        for _ in range(args.runs):
+            started = time.perf_counter()
+            html = markdown_to_html(body)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        renderer = PostRenderer()
+        post = {'author': 'bench', 'permlink': f'post-{size_kb}', 'last_update': '2024-01-01T00:00:00',
+                'title': 'Benchmark', 'created': '2024-01-01T00:00:00', 'body': body}
+        renderer.render(post)
+        started = time.perf_counter()
+        for _ in range(1000):
+            renderer.render(post)
+        cached_us = (time.perf_counter() - started) * 1000
+
+        result = {
+            'body_kb': round(len(body) / 1024, 1),
+            'html_kb': round(len(html) / 1024, 1),
+            'p50_ms': round(percentile(timings, 50), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'cached_us': round(cached_us, 2),
+        }
+        report['results'][f"{size_kb}kb"] = result
+        print(f"{result['body_kb']:>7} KB body -> {result['html_kb']:>7} KB html   "
+              f"p50 {result['p50_ms']:>8} ms   p95 {result['p95_ms']:>8} ms   cached {result['cached_us']} us")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
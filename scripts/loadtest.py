@@ -0,0 +1,447 @@
+"""
+Load test end-to-end di app.py contro un server Steem JSON-RPC fittizio
+Usage: python scripts/loadtest.py [--scenarios mixed,...] [--duration 15] [--concurrency 16]
+                                  [--check | --save-baseline] [--baseline scripts/loadtest-baseline.json]
+       python scripts/loadtest.py --record fixtures.json [--count 500]   (registra post veri dai nodi)
+
+Avvia il server mock (python/mock_rpc.py) con i post delle fixture, avvia l'app in un
+processo separato puntata sul mock ed esegue per ogni scenario traffico scriptato:
+
+    crawler_burst     molti crawler sulla stessa pagina di un post
+    longtail_previews anteprime (/api/previews) e pagine di post presi da migliaia di post
+    static_modules    moduli JS/CSS e asset statici dell'app
+    scheduled_crud    crea/leggi/modifica/cancella post programmati
+    mixed             tutti i precedenti insieme, con pesi simili al traffico reale
+
+Per ogni scenario riporta throughput, percentili di latenza, errori, chiamate verso il
+mock e memoria (RSS) del processo dell'app. --save-baseline salva i risultati, --check li
+confronta con la baseline salvata ed esce con codice 1 se c'è una regressione oltre la
+tolleranza. Senza --fixtures usa post sintetici generati in modo deterministico.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from python.mock_rpc import MockRpcServer, recorded_fixtures, spiky_latency  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(ROOT, 'scripts', 'loadtest-baseline.json')
+SCENARIOS = ['crawler_burst', 'longtail_previews', 'static_modules', 'scheduled_crud', 'mixed']
+MIXED_WEIGHTS = {'static_modules': 50, 'longtail_previews': 25, 'crawler_burst': 15, 'scheduled_crud': 10}
+
+BROWSER_UA = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36'
+CRAWLER_UA = 'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+
+WORDS = ('steem community post vote reward curation witness photo travel music art '
+         'food nature daily update market story').split()
+
+
+# --- Fixture -----------------------------------------------------------------
+
+def synthetic_fixtures(posts=5000, authors=500, seed=1):
+    """Post e account sintetici ma con la forma e le dimensioni di quelli veri"""
+    rng = random.Random(seed)
+    now = datetime(2024, 1, 1)
+    names = [f"author{i:03d}" for i in range(authors)]
+    result = {'posts': [], 'accounts': []}
+    for i in range(posts):
+        author = names[i % authors]
+        created = (now - timedelta(minutes=7 * i)).strftime('%Y-%m-%dT%H:%M:%S')
+        paragraphs = [' '.join(rng.choice(WORDS) for _ in range(rng.randint(40, 120))) for _ in range(rng.randint(3, 12))]
+        body = f"![cover](https://images.example.com/{i}/cover.jpg)\n\n" + '\n\n'.join(paragraphs)
+        result['posts'].append({
+            "id": i + 1, "author": author, "permlink": f"post-{i}", "category": "steem",
+            "parent_author": "", "parent_permlink": "steem", "title": f"Post {i} by {author}",
+            "body": body, "json_metadata": json.dumps({"tags": ["steem", rng.choice(WORDS)],
+                                                       "image": [f"https://images.example.com/{i}/cover.jpg"]}),
+            "created": created, "last_update": created, "net_votes": rng.randint(0, 200),
+            "children": rng.randint(0, 30), "pending_payout_value": f"{rng.uniform(0, 20):.3f} SBD",
+            "total_payout_value": "0.000 SBD", "curator_payout_value": "0.000 SBD", "active_votes": [],
+        })
+    for name in names:
+        result['accounts'].append({
+            "id": len(result['accounts']) + 1, "name": name,
+            "posting_json_metadata": json.dumps({"profile": {"about": f"{name} on Steem",
+                                                              "profile_image": f"https://images.example.com/{name}.png"}}),
+        })
+    return result
+
+
+def record_fixtures(path, count):
+    """Registra post e account veri dai nodi configurati (STEEM_NODES) per riprodurli offline"""
+    from python.steem_client import steem_client
+
+    posts, start = [], {}
+    while len(posts) < count:
+        query = dict({"tag": "", "limit": 100}, **start)
+        reply = steem_client.call_raw({"jsonrpc": "2.0", "method": "condenser_api.get_discussions_by_created",
+                                       "params": [query], "id": 1})
+        page = reply.get('result') or []
+        if start and page:
+            page = page[1:]
+        if not page:
+            break
+        posts.extend(page)
+        start = {"start_author": page[-1]['author'], "start_permlink": page[-1]['permlink']}
+    posts = posts[:count]
+
+    authors = sorted({post['author'] for post in posts})
+    accounts = []
+    for i in range(0, len(authors), 100):
+        accounts.extend(steem_client.get_accounts(authors[i:i + 100]) or [])
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'posts': posts, 'accounts': accounts}, f)
+    print(f"Recorded {len(posts)} posts and {len(accounts)} accounts -> {path}")
+
+
+def static_paths():
+    from python.precache import precache_files
+    paths = [url for url, _, _ in precache_files(ROOT)]
+    return [path for path in paths if not path.startswith('/assets/img/')] or ['/index.js']
+
+
+# --- Scenari: generatori di richieste (metodo, percorso, corpo, user agent) ----
+# Ogni generatore riceve con send() lo (status, corpo) della risposta precedente.
+
+def crawler_burst(ctx, rng, worker):
+    post = ctx['posts'][0]
+    while True:
+        yield 'GET', f"/@{post['author']}/{post['permlink']}", None, CRAWLER_UA
+
+
+def longtail_previews(ctx, rng, worker):
+    posts = ctx['posts']
+    while True:
+        if rng.random() < 0.7:
+            batch = [rng.choice(posts) for _ in range(rng.randint(1, 8))]
+            urls = [f"https://cur8.fun/@{post['author']}/{post['permlink']}" for post in batch]
+            yield 'POST', '/api/previews', {"urls": urls}, BROWSER_UA
+        else:
+            post = rng.choice(posts)
+            yield 'GET', f"/@{post['author']}/{post['permlink']}", None, BROWSER_UA
+
+
+def static_modules(ctx, rng, worker):
+    paths = ctx['static']
+    while True:
+        yield 'GET', rng.choice(paths), None, BROWSER_UA
+
+
+def scheduled_crud(ctx, rng, worker):
+    username = f"loadtest{worker}"
+    while True:
+        when = (datetime.now(timezone.utc) + timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%S')
+        body = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(200, 2000)))
+        status, data = yield 'POST', '/api/scheduled_posts', {
+            "username": username, "title": "Load test", "body": body,
+            "tags": ["loadtest"], "scheduled_datetime": when
+        }, BROWSER_UA
+        post_id = (data or {}).get('id')
+        yield 'GET', f"/api/scheduled_posts?username={username}", None, BROWSER_UA
+        if post_id is None:
+            continue
+        yield 'GET', f"/api/scheduled_posts/{post_id}", None, BROWSER_UA
+        yield 'PUT', f"/api/scheduled_posts/{post_id}", {"title": "Load test (edited)"}, BROWSER_UA
+        yield 'DELETE', f"/api/scheduled_posts/{post_id}", None, BROWSER_UA
+
+
+def mixed(ctx, rng, worker):
+    generators = {name: SCENARIO_FUNCTIONS[name](ctx, rng, worker) for name in MIXED_WEIGHTS}
+    names, weights = list(MIXED_WEIGHTS), list(MIXED_WEIGHTS.values())
+    pending = {name: None for name in names}  # risposta da restituire al generatore
+    while True:
+        name = rng.choices(names, weights)[0]
+        gen = generators[name]
+        request = next(gen) if pending[name] is None else gen.send(pending[name])
+        pending[name] = yield request
+
+
+SCENARIO_FUNCTIONS = {
+    'crawler_burst': crawler_burst,
+    'longtail_previews': longtail_previews,
+    'static_modules': static_modules,
+    'scheduled_crud': scheduled_crud,
+    'mixed': mixed,
+}
+
+
+# --- Esecuzione ----------------------------------------------------------------
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    """RSS attuale del processo in MB (Linux), None se non disponibile"""
+    try:
+        with open(f"/proc/{pid}/status", encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def send(base_url, request):
+    method, path, body, user_agent = request
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    req = urllib.request.Request(base_url + path, data=data, method=method, headers={
+        'User-Agent': user_agent, 'Content-Type': 'application/json', 'Accept-Encoding': 'identity'
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=30) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, OSError):
+        return 0, b''
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def run_scenario(name, ctx, base_url, server_pid, mock, duration, warmup, concurrency, seed):
+    results = []
+    lock = threading.Lock()
+
+    def worker(n):
+        rng = random.Random(seed * 1000 + n)
+        gen = SCENARIO_FUNCTIONS[name](ctx, rng, n)
+        reply = None
+        warm_until = time.monotonic() + warmup
+        deadline = warm_until + duration
+        local = []
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            request = next(gen) if reply is None else gen.send(reply)
+            started = time.perf_counter()
+            status, body = send(base_url, request)
+            elapsed = (time.perf_counter() - started) * 1000
+            try:
+                parsed = json.loads(body) if body[:1] in (b'{', b'[') else None
+            except ValueError:
+                parsed = None
+            reply = (status, parsed)
+            if now >= warm_until:
+                local.append((elapsed, status))
+        with lock:
+            results.extend(local)
+
+    memory = []
+    stop = threading.Event()
+
+    def sample_memory():
+        while not stop.wait(0.2):
+            value = rss_mb(server_pid)
+            if value is not None:
+                memory.append(value)
+
+    sampler = threading.Thread(target=sample_memory, daemon=True)
+    sampler.start()
+    upstream_before = mock.requests
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(worker, range(concurrency)))
+    stop.set()
+    sampler.join()
+
+    latencies = [ms for ms, _ in results] or [0.0]
+    statuses = Counter(status for _, status in results)
+    errors = sum(count for status, count in statuses.items() if status == 0 or status >= 500)
+    return {
+        'requests': len(results),
+        'rps': round(len(results) / duration, 1),
+        'p50_ms': round(percentile(latencies, 50), 1),
+        'p90_ms': round(percentile(latencies, 90), 1),
+        'p95_ms': round(percentile(latencies, 95), 1),
+        'p99_ms': round(percentile(latencies, 99), 1),
+        'max_ms': round(max(latencies), 1),
+        'error_rate': round(errors / len(results), 4) if results else 0.0,
+        'status': {str(status): count for status, count in sorted(statuses.items())},
+        'upstream_calls': mock.requests - upstream_before,
+        'rss_peak_mb': round(max(memory), 1) if memory else None,
+        'rss_end_mb': round(memory[-1], 1) if memory else None,
+    }
+
+
+def start_app(port, mock_url, workdir, rate_limit):
+    env = dict(os.environ)
+    env.update({
+        'STEEM_NODES': mock_url,
+        'STEEM_HEDGING': '0',
+        'DATABASE_URL': f"sqlite:///{os.path.join(workdir, 'loadtest.db')}",
+        # Indice di ricerca e sitemap nella cartella temporanea, non in instance/ del repository
+        'INSTANCE_PATH': os.path.join(workdir, 'instance'),
+        'RATE_LIMIT': '1' if rate_limit else '0',
+        'PYTHONPATH': ROOT,
+    })
+    log = open(os.path.join(workdir, 'app.log'), 'wb')
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', str(port)],
+        cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited early, see {log.name}")
+        try:
+            urllib.request.urlopen(base_url + '/robots.txt', timeout=1).read()
+            return process, base_url
+        except OSError:
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("App did not start within 10 s")
+
+
+def serve(port):
+    """Processo dell'app sotto test (server WSGI multi-thread di werkzeug)"""
+    import logging
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    make_server('127.0.0.1', port, create_app(), threaded=True).serve_forever()
+
+
+# --- Baseline -------------------------------------------------------------------
+
+def compare(results, baseline, tolerance):
+    """Regressioni rispetto alla baseline: throughput, p95, errori, memoria"""
+    problems = []
+    for name, current in results.items():
+        base = baseline.get('scenarios', {}).get(name)
+        if not base:
+            continue
+        if base['rps'] and current['rps'] < base['rps'] * (1 - tolerance):
+            problems.append(f"{name}: throughput {current['rps']} req/s < baseline {base['rps']}")
+        if base['p95_ms'] and current['p95_ms'] > base['p95_ms'] * (1 + tolerance) + 1:
+            problems.append(f"{name}: p95 {current['p95_ms']} ms > baseline {base['p95_ms']} ms")
+        if current['error_rate'] > base['error_rate'] + 0.01:
+            problems.append(f"{name}: error rate {current['error_rate']} > baseline {base['error_rate']}")
+        if base.get('rss_peak_mb') and current['rss_peak_mb'] and \
+                current['rss_peak_mb'] > base['rss_peak_mb'] * (1 + tolerance):
+            problems.append(f"{name}: peak RSS {current['rss_peak_mb']} MB > baseline {base['rss_peak_mb']} MB")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--duration', type=float, default=15, help="secondi misurati per scenario")
+    parser.add_argument('--warmup', type=float, default=2, help="secondi non misurati prima di ogni scenario")
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--fixtures', help="post e account registrati con --record (default: sintetici)")
+    parser.add_argument('--latency-ms', type=float, default=80, help="latenza base del mock")
+    parser.add_argument('--spike-probability', type=float, default=0.01)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="errori JSON-RPC iniettati dal mock")
+    parser.add_argument('--rate-limit', action='store_true', help="lascia attivo il rate limiter dell'app")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--check', action='store_true', help="esce con 1 se peggiora rispetto alla baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--json', help="salva i risultati in questo file")
+    parser.add_argument('--record', metavar='PATH', help="registra fixture dai nodi veri ed esce")
+    parser.add_argument('--count', type=int, default=500, help="post da registrare con --record")
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        return serve(args.serve)
+    if args.record:
+        return record_fixtures(args.record, args.count)
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenarios if name not in SCENARIO_FUNCTIONS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)}")
+
+    if args.fixtures:
+        with open(args.fixtures, encoding='utf-8') as f:
+            data = json.load(f)
+    else:
+        data = synthetic_fixtures(seed=args.seed)
+    ctx = {'posts': data['posts'], 'static': static_paths()}
+
+    latency = spiky_latency(args.latency_ms / 1000, args.latency_ms / 5000, args.spike_probability, 0.45, 1.7)
+    mock = MockRpcServer(latency=latency, fixtures=recorded_fixtures(data), error_rate=args.error_rate,
+                         seed=args.seed).start()
+    workdir = tempfile.mkdtemp(prefix='cur8-loadtest-')
+    process, base_url = start_app(free_port(), mock.url, workdir, args.rate_limit)
+
+    config = {k: getattr(args, k) for k in ('duration', 'warmup', 'concurrency', 'seed', 'latency_ms',
+                                            'spike_probability', 'error_rate', 'rate_limit')}
+    config['fixtures'] = os.path.basename(args.fixtures) if args.fixtures else f"synthetic:{len(data['posts'])}"
+    report = {
+        'created': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                    'cpus': os.cpu_count()},
+        'config': config,
+        'scenarios': {},
+    }
+    print(f"App {base_url} (pid {process.pid}), mock {mock.url}, logs in {workdir}")
+    print(f"{'scenario':<18} {'req/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6} {'upstream':>9} {'rss MB':>7}")
+    try:
+        for name in scenarios:
+            result = run_scenario(name, ctx, base_url, process.pid, mock, args.duration,
+                                  args.warmup, args.concurrency, args.seed)
+            report['scenarios'][name] = result
+            print(f"{name:<18} {result['rps']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8} "
+                  f"{result['p99_ms']:>8} {result['error_rate'] * 100:>6.2f} {result['upstream_calls']:>9} "
+                  f"{result['rss_peak_mb'] or '-':>7}")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        mock.stop()
+    shutil.rmtree(workdir, ignore_errors=True)  # in caso di errore restano log e database
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+            f.write('\n')
+        print(f"Baseline saved to {args.baseline}")
+    if args.check:
+        try:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        except OSError:
+            print(f"No baseline at {args.baseline}: run with --save-baseline first")
+            return 1
+        if baseline.get('config') != config:
+            print("Warning: baseline was recorded with a different configuration")
+        problems = compare(report['scenarios'], baseline, args.tolerance)
+        for problem in problems:
+            print(f"REGRESSION {problem}")
+        if problems:
+            return 1
+        print(f"No regressions against baseline ({baseline.get('created')}, tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,56 @@
+import eventEmitter from '../utils/EventEmitter.js';
+
+/**
+ * Live chain state pushed by the server over Server-Sent Events.
+ * One long-lived connection per tab replaces the per-service polling of
+ * global properties, reward fund and median price.
+ */
+class ChainStateService {
+  constructor() {
+    this.state = { props: null, reward_fund: null, median_price: null };
+    this.source = null;
+    this.updatedAt = 0;
+    this.maxAge = 15000; // Ignore pushed values older than this (stream down)
+  }
+
+  /**
+   * Open the stream if the browser supports it and it is not already open
+   */
+  connect() {
+    if (this.source || typeof EventSource === 'undefined') return;
+
+    this.source = new EventSource('/api/chain/stream');
+    this.source.addEventListener('snapshot', (e) => this._apply(JSON.parse(e.data), true));
+    this.source.addEventListener('delta', (e) => this._apply(JSON.parse(e.data), false));
+    this.source.onerror = () => {
+      // EventSource reconnects on its own unless the server refused the stream
+      if (this.source && this.source.readyState === EventSource.CLOSED) {
+        this.source = null;
+      }
+    };
+  }
+
+  _apply(data, replace) {
+    for (const [key, value] of Object.entries(data)) {
+      this.state[key] = replace || !this.state[key] ? value : { ...this.state[key], ...value };
+    }
+    this.updatedAt = Date.now();
+    eventEmitter.emit('chain:state', this.state);
+  }
+
+  /**
+   * Latest pushed value for a key ('props', 'reward_fund', 'median_price').
+   * Returns null when the stream is unavailable or stale so callers can
+   * fall back to a direct API call.
+   * @param {string} key
+   * @returns {Object|null}
+   */
+  get(key) {
+    this.connect();
+    if (Date.now() - this.updatedAt > this.maxAge) return null;
+    return this.state[key];
+  }
+}
+
+const chainStateService = new ChainStateService();
+export default chainStateService;
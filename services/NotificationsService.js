@@ -2,6 +2,7 @@
 import eventEmitter from '../utils/EventEmitter.js';
 import steemService from './SteemService.js';
 import walletService from './WalletService.js';
+import chainStateService from './ChainStateService.js';
 import { TYPES } from '../models/Notification.js';
 
 const STEEMWORLD_API = 'https://sds.steemworld.org';
@@ -25,12 +26,29 @@ class NotificationsService {
         this._lastReadTimestamp = new Map(); // per-user cached lastRead cutoff (ISO) derived from SW data
         this._vestsRate = null;     // VESTS → SP conversion rate (totalSteem / totalVests)
         this._vestsRateTime = 0;    // timestamp of last _vestsRate fetch
+        this._forceServerRefresh = false; // next proxy request bypasses the server sync interval
     }
 
     // â”€â”€â”€ SteemWorld API â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€â”€
 
     async _fetchFromAPI(username, status, limit = 250, offset = 0) {
-        const url = `${STEEMWORLD_API}/notifications_api/getNotificationsByStatus/${encodeURIComponent(username)}/${status}/${limit}/${offset}`;
+        const path = `${encodeURIComponent(username)}/${status}/${limit}/${offset}`;
+
+        // Server proxy first: notifications are stored server-side and fetched upstream
+        // once for all tabs and devices. Falls back to SteemWorld directly (static hosting).
+        const refresh = this._forceServerRefresh ? '?refresh=1' : '';
+        this._forceServerRefresh = false;
+        try {
+            const proxied = await fetch(`/api/notifications/${path}${refresh}`);
+            if (proxied.ok) {
+                const data = await proxied.json();
+                if (data.code === 0) return this._parseResponse(data.result);
+            }
+        } catch {
+            // proxy unavailable — use SteemWorld below
+        }
+
+        const url = `${STEEMWORLD_API}/notifications_api/getNotificationsByStatus/${path}`;
         const resp = await fetch(url);
         if (!resp.ok) throw new Error(`SteemWorld API error: ${resp.status}`);
         const data = await resp.json();
@@ -84,6 +102,16 @@ class NotificationsService {
     async _ensureRewardFund() {
         const TTL = 5 * 60 * 1000;
         if (this._cachedRewardFund && Date.now() - this._rewardFundCacheTime < TTL) return;
+        const pushedFund = chainStateService.get('reward_fund');
+        const pushedPrice = chainStateService.get('median_price');
+        if (pushedFund && pushedPrice) {
+            this._cachedRewardFund = pushedFund;
+            this._cachedSteemPrice = parseFloat(pushedPrice.quote) > 0
+                ? parseFloat(pushedPrice.base) / parseFloat(pushedPrice.quote)
+                : 1;
+            this._rewardFundCacheTime = Date.now();
+            return;
+        }
         try {
             await steemService.ensureLibraryLoaded();
             const [fund, price] = await Promise.all([
@@ -205,6 +233,7 @@ class NotificationsService {
         const cacheKey = `${username}_all_notifications`;
 
         if (forceRefresh) {
+            this._forceServerRefresh = true;
             this._cache.delete(cacheKey);
             this._walletState.delete(username);
             this._lastReadTimestamp.delete(username);
@@ -350,6 +379,7 @@ class NotificationsService {
         // Optimistic update: everything is now read
         this.unreadCount = 0;
         this.clearCache();
+        this._forceServerRefresh = true;
         // Preserve the new cutoff so wallet items are shown as read immediately on next render
         this._lastReadTimestamp.set(currentUser.username, new Date().toISOString());
         eventEmitter.emit('notifications:unread_count_updated', 0);
@@ -411,10 +441,11 @@ class NotificationsService {
     async _getVestsRate() {
         const TTL = 5 * 60 * 1000;
         if (this._vestsRate && Date.now() - this._vestsRateTime < TTL) return this._vestsRate;
-        const steem = await steemService.ensureLibraryLoaded();
-        const props = await new Promise((resolve, reject) => {
-            steem.api.getDynamicGlobalProperties((err, r) => err ? reject(err) : resolve(r));
-        });
+        const props = chainStateService.get('props') || await steemService.ensureLibraryLoaded().then(steem =>
+            new Promise((resolve, reject) => {
+                steem.api.getDynamicGlobalProperties((err, r) => err ? reject(err) : resolve(r));
+            })
+        );
         const totalVests = parseFloat(props.total_vesting_shares.split(' ')[0]);
         const totalSteem = parseFloat(props.total_vesting_fund_steem.split(' ')[0]);
         this._vestsRate = totalSteem / totalVests;
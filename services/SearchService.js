@@ -317,6 +317,9 @@ export class SearchService {
      * @returns {Promise<Array>} Array of post objects
      */
     async searchPosts(query, limit = 20, offset = 0) {
+        const localResults = await this.searchPostsLocal(query, limit, offset);
+        if (localResults) return localResults;
+
         try {
             const text = encodeURIComponent(query.trim());
             const url = `https://sds.steemworld.org/content_search_api/getPostsByText/${text}/any/null/150/time/DESC/${limit}/${offset}`;
@@ -340,6 +343,53 @@ export class SearchService {
         }
     }
 
+    /**
+     * Search posts in the server-side full-text index (/api/search).
+     * Offsets are mapped to the cursor returned by the previous page.
+     * Sets lastSearchTimedOut when the server gave up on the query (503 with timeout: true).
+     * @returns {Promise<Array|null>} Array of post objects, null to fall back to SteemWorld
+     */
+    async searchPostsLocal(query, limit = 20, offset = 0) {
+        const text = query.trim();
+        this._searchCursors = this._searchCursors || new Map();
+        const cursorKey = `${text}|${limit}|${offset}`;
+        const cursor = offset > 0 ? this._searchCursors.get(cursorKey) : '';
+        this.lastSearchTimedOut = false;
+        if (cursor === undefined) return null;
+        if (cursor === null) return []; // Local results already exhausted
+
+        try {
+            const params = new URLSearchParams({ q: text, limit: String(limit) });
+            if (cursor) params.set('cursor', cursor);
+            const response = await fetch(`/api/search?${params}`);
+            if (response.status === 503) {
+                const error = await response.json().catch(() => ({}));
+                if (error.timeout) {
+                    console.warn(`Local search timed out for "${text}", falling back to SteemWorld`);
+                    this.lastSearchTimedOut = true;
+                }
+                return null;
+            }
+            if (!response.ok) return null;
+            const data = await response.json();
+            // Empty first page: the local index may not cover this query yet
+            if (!data.results || (offset === 0 && data.results.length === 0)) return null;
+
+            this._searchCursors.set(`${text}|${limit}|${offset + limit}`, data.next_cursor || null);
+            return data.results.map(row => ({
+                type: 'post',
+                author: row.author,
+                permlink: row.permlink,
+                created: row.created,
+                title: row.title || 'Untitled',
+                body: row.excerpt || '',
+                category: row.category
+            }));
+        } catch (error) {
+            return null;
+        }
+    }
+
     /**
      * Initialize the search functionality with a search input and container for suggestions
      * @param {HTMLElement} searchInput - The search input element
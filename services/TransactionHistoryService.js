@@ -20,6 +20,10 @@ class TransactionHistoryService {
     if (!username) return [];
     
     try {
+      // Server-side index: only operations newer than the stored ones go upstream
+      const indexed = await this.fetchIndexedHistory(username, limit, from);
+      if (indexed) return indexed;
+
       const steem = await steemService.ensureLibraryLoaded();
       
       return new Promise((resolve, reject) => {
@@ -34,6 +38,25 @@ class TransactionHistoryService {
     }
   }
 
+  /**
+   * Recupera la cronologia dall'indice locale del server (/api/history)
+   * @param {string} username - Nome utente
+   * @param {number} limit - Numero massimo di transazioni
+   * @param {number} from - Indice da cui iniziare (-1 per le più recenti)
+   * @return {Promise<Array|null>} - Stesso formato di getAccountHistory, null se non disponibile
+   */
+  async fetchIndexedHistory(username, limit, from) {
+    if (typeof fetch === 'undefined') return null;
+    try {
+      const response = await fetch(`/api/history/${encodeURIComponent(username)}?from=${from}&limit=${limit}`);
+      if (!response.ok) return null;
+      const history = await response.json();
+      return Array.isArray(history) ? history : null;
+    } catch (error) {
+      return null;
+    }
+  }
+
   /**
    * Formatta una transazione per la visualizzazione
    * @param {Object} transaction - Transazione da formattare
@@ -1,6 +1,7 @@
 import eventEmitter from '../utils/EventEmitter.js';
 import steemService from './SteemService.js';
 import authService from './AuthService.js';
+import chainStateService from './ChainStateService.js';
 import router from '../utils/Router.js'; // Add router import
 
 /**
@@ -455,6 +456,8 @@ class VoteService {
    * @private
    */
   _getDynamicGlobalProperties() {
+    const pushed = chainStateService.get('props');
+    if (pushed) return Promise.resolve(pushed);
     return new Promise((resolve, reject) => {
       window.steem.api.getDynamicGlobalProperties((err, result) => {
         if (err) {
@@ -471,6 +474,8 @@ class VoteService {
    * @private
    */
   _getRewardFund() {
+    const pushed = chainStateService.get('reward_fund');
+    if (pushed) return Promise.resolve(pushed);
     return new Promise((resolve, reject) => {
       window.steem.api.getRewardFund('post', (err, result) => {
         if (err) {
@@ -488,6 +493,8 @@ class VoteService {
    * @private
    */
   _getCurrentMedianHistoryPrice() {
+    const pushed = chainStateService.get('median_price');
+    if (pushed) return Promise.resolve(pushed);
     return new Promise((resolve) => {
       try {
         window.steem.api.getCurrentMedianHistoryPrice((err, result) => resolve(err ? null : result));
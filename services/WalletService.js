@@ -1,6 +1,7 @@
 import eventEmitter from '../utils/EventEmitter.js';
 import steemService from './SteemService.js';
 import authService from './AuthService.js';
+import chainStateService from './ChainStateService.js';
 //router
 import router from '../utils/Router.js';
 
@@ -1124,7 +1125,7 @@ class WalletService {
       const steem = await steemService.ensureLibraryLoaded();
 
       // Step 1: Get dynamic global properties
-      const props = await new Promise((resolve, reject) => {
+      const props = chainStateService.get('props') || await new Promise((resolve, reject) => {
         steem.api.getDynamicGlobalProperties((error, result) => {
           if (error) reject(error);
           else resolve(result);
@@ -1159,7 +1160,7 @@ class WalletService {
       const p = (votingPower * weight / 10000 + 49) / 50;
 
       // Step 7: Get reward fund
-      const rewardFund = await new Promise((resolve, reject) => {
+      const rewardFund = chainStateService.get('reward_fund') || await new Promise((resolve, reject) => {
         steem.api.getRewardFund('post', (error, result) => {
           if (error) reject(error);
           else resolve(result);
@@ -1172,7 +1173,7 @@ class WalletService {
       const rbPrc = rewardBalance / recentClaims;
 
       // Step 9: Get median price from Steem API
-      const priceInfo = await new Promise((resolve, reject) => {
+      const priceInfo = chainStateService.get('median_price') || await new Promise((resolve, reject) => {
         steem.api.getCurrentMedianHistoryPrice((error, result) => {
           if (error) reject(error);
           else resolve(result);
@@ -71,8 +71,35 @@ export default class PostService {
         return query;
     }
 
+    /**
+     * First page of a ranked feed from the server-side snapshot (/api/feed).
+     * Returns null when no snapshot is available or it holds fewer posts than
+     * needed, so callers can fall back to the blockchain API.
+     * @param {string} sort - 'trending', 'hot', 'created', ...
+     * @param {string} [tag=''] - Tag or community ('hive-xxxxxx'); empty for home
+     * @param {number} [minCount=1] - Minimum number of posts required
+     * @returns {Promise<Array|null>} At most minCount posts, matching a direct API call
+     */
+    async fetchFeedSnapshot(sort, tag = '', minCount = 1) {
+        if (typeof fetch === 'undefined') return null;
+        try {
+            const url = tag ? `/api/feed/${sort}/${encodeURIComponent(tag)}` : `/api/feed/${sort}`;
+            const response = await fetch(url);
+            if (!response.ok) return null;
+            const posts = await response.json();
+            return Array.isArray(posts) && posts.length >= minCount ? posts.slice(0, minCount) : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
     async fetchAndProcessPosts(method, query, category, limit) {
-        let posts = await this.core.executeApiMethod(method, query);
+        let posts = !query.start_author
+            ? await this.fetchFeedSnapshot(category, query.tag, query.limit)
+            : null;
+        if (!posts) {
+            posts = await this.core.executeApiMethod(method, query);
+        }
 
         if (!Array.isArray(posts)) {
             return [];
@@ -126,7 +153,28 @@ export default class PostService {
         }
     }
 
+    /**
+     * Post inlined by the server in index.html (#initial-post), used once to skip
+     * the first get_content round trip.
+     */
+    takeInitialPost(author, permlink) {
+        if (typeof document === 'undefined') return null;
+        const element = document.getElementById('initial-post');
+        if (!element) return null;
+        element.remove();
+        try {
+            const post = JSON.parse(element.textContent);
+            if (post && post.author === author && post.permlink === permlink) return post;
+        } catch (error) {
+            console.warn('Invalid initial post data:', error);
+        }
+        return null;
+    }
+
     async getContent(author, permlink) {
+        const initialPost = this.takeInitialPost(author, permlink);
+        if (initialPost) return initialPost;
+
         await this.core.ensureLibraryLoaded();
 
         try {
@@ -463,8 +511,9 @@ export default class PostService {
                 query.start_permlink = this.lastPost.permlink;
             }
 
-            // Use the API with proper promise handling
-            const posts = await this.core.executeApiMethod('getDiscussionsByCreated', query);
+            // First page comes from the server snapshot when available
+            const posts = (page === 1 && await this.fetchFeedSnapshot('created', query.tag, query.limit))
+                || await this.core.executeApiMethod('getDiscussionsByCreated', query);
 
             if (!posts || !Array.isArray(posts)) {
                 console.warn('Invalid response from API:', posts);
@@ -606,7 +655,9 @@ export default class PostService {
 
             // Use rpcCall (direct JSON-RPC) so params are sent as a plain object (not wrapped
             // in an array by the Steem.js library), ensuring observer is recognised by the bridge.
-            const result = await this.core.rpcCall('bridge.get_ranked_posts', callParams);
+            const isFirstAnonymousPage = !callParams.start_author && !callParams.observer;
+            const result = (isFirstAnonymousPage && await this.fetchFeedSnapshot(callParams.sort, communityTag, Math.min(limit, 20)))
+                || await this.core.rpcCall('bridge.get_ranked_posts', callParams);
             console.log(`Bridge API returned ${result ? result.length : 0} posts`);
 
             if (!Array.isArray(result)) return [];
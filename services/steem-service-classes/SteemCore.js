@@ -5,6 +5,8 @@ import eventEmitter from '../../utils/EventEmitter.js';
 export default class SteemCore {
     constructor() {
         this.apiEndpoints = [
+            // Caching proxy served by app.py; public nodes remain as failover
+            ...(typeof window !== 'undefined' ? [`${window.location.origin}/rpc`] : []),
             'https://api.moecki.online',
             'https://api.steemitdev.com',
             'https://api.steemit.com',
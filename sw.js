@@ -3,30 +3,102 @@ const CACHE_NAME = 'cur8-pwa-v1.189';
 const APP_VERSION = '1.0.179';
 const BUILD_TIMESTAMP = '2026-07-15T22:33:33Z';
 
-// Solo assets statici versionati — MAI index.html o navigation HTML
+// Precache per hash di contenuto: il manifest (/precache-manifest.json) elenca ogni file
+// statico con il suo hash; dopo un deploy vengono scaricati solo i file cambiati.
+// PRECACHE_VERSION viene sostituito dal server con la versione del manifest, così il
+// service worker si aggiorna quando cambia almeno un file.
+const PRECACHE_NAME = 'cur8-precache';
+const PRECACHE_VERSION = 'dev';
+const MANIFEST_URL = '/precache-manifest.json';
+const PRECACHE_PREFIXES = ['/components/', '/services/', '/views/', '/utils/', '/models/',
+                           '/controllers/', '/config/', '/assets/'];
+const PRECACHE_ROOT_FILES = ['/index.js', '/manifest.json', '/offline.html'];
+
+// Asset fuori dal manifest (troppo grandi per la precache) — MAI index.html o navigation HTML
 const ASSETS_TO_CACHE = [
-  '/manifest.json',
-  '/index.js',
-  '/assets/css/main.css',
-  '/assets/css/styles.css',
-  '/assets/img/logo_tra.png',
-  '/assets/js/steem.min.js',
-  '/assets/js/steemlogin.min.js',
-  '/assets/js/steem-content-renderer.min.js'
+  '/assets/img/logo_tra.png'
 ];
 
+let precacheFiles = null; // url -> hash del manifest attivo
+
+function precacheKey(url, hash) {
+  return `${url}?__rev=${hash}`;
+}
+
+async function loadPrecacheFiles() {
+  if (precacheFiles) return precacheFiles;
+  const cache = await caches.open(PRECACHE_NAME);
+  const stored = await cache.match(MANIFEST_URL);
+  precacheFiles = stored ? (await stored.json()).files : {};
+  return precacheFiles;
+}
+
+async function precache() {
+  const response = await fetch(`${MANIFEST_URL}?v=${PRECACHE_VERSION}`, { cache: 'no-cache' });
+  if (!response.ok) return;
+  const manifest = await response.json();
+  const cache = await caches.open(PRECACHE_NAME);
+
+  // Solo i file nuovi o con hash cambiato
+  const entries = Object.entries(manifest.files);
+  const cached = await Promise.all(entries.map(([url, hash]) => cache.match(precacheKey(url, hash))));
+  const missing = entries.filter((entry, i) => !cached[i]);
+  await Promise.all(missing.map(async ([url, hash]) => {
+    const fresh = await fetch(url, { cache: 'no-cache' });
+    if (fresh.ok) await cache.put(precacheKey(url, hash), fresh);
+  }));
+
+  await cache.put(MANIFEST_URL, new Response(JSON.stringify(manifest), {
+    headers: { 'Content-Type': 'application/json' }
+  }));
+  precacheFiles = manifest.files;
+  console.log(`Precache ${manifest.version}: ${missing.length}/${entries.length} files downloaded`);
+}
+
+async function removeStalePrecache() {
+  const files = await loadPrecacheFiles();
+  const current = new Set(Object.entries(files).map(([url, hash]) => precacheKey(url, hash)));
+  const cache = await caches.open(PRECACHE_NAME);
+  const keys = await cache.keys();
+  await Promise.all(keys.map(request => {
+    const url = new URL(request.url);
+    const key = url.pathname + url.search;
+    if (url.pathname !== MANIFEST_URL && !current.has(key)) return cache.delete(request);
+    return null;
+  }));
+}
+
+function isPrecacheCandidate(pathname) {
+  return PRECACHE_ROOT_FILES.includes(pathname) ||
+         PRECACHE_PREFIXES.some(prefix => pathname.startsWith(prefix));
+}
+
+async function fromPrecache(request, pathname) {
+  const files = await loadPrecacheFiles();
+  const hash = files[pathname];
+  if (!hash) return null;
+  const cache = await caches.open(PRECACHE_NAME);
+  const key = precacheKey(pathname, hash);
+  const cached = await cache.match(key);
+  if (cached) return cached;
+  const fresh = await fetch(request);
+  if (fresh.ok) cache.put(key, fresh.clone());
+  return fresh;
+}
+
 self.addEventListener('install', event => {
-  event.waitUntil(
-    caches.open(CACHE_NAME).then(cache => cache.addAll(ASSETS_TO_CACHE))
-  );
+  event.waitUntil(Promise.all([
+    caches.open(CACHE_NAME).then(cache => cache.addAll(ASSETS_TO_CACHE)),
+    precache().catch(error => console.warn('Precache failed:', error))
+  ]));
   self.skipWaiting();
 });
 
 self.addEventListener('activate', event => {
   event.waitUntil(
     caches.keys().then(keys =>
-      Promise.all(keys.filter(k => k !== CACHE_NAME).map(k => caches.delete(k)))
-    )
+      Promise.all(keys.filter(k => k !== CACHE_NAME && k !== PRECACHE_NAME).map(k => caches.delete(k)))
+    ).then(removeStalePrecache)
   );
   self.clients.claim();
 });
@@ -50,21 +122,34 @@ self.addEventListener('fetch', event => {
 
   if (event.request.method !== 'GET') return;
 
+  // File statici dell'app presenti nel manifest: dalla precache (chiave = hash del contenuto)
+  if (url.origin === self.location.origin && !url.search && isPrecacheCandidate(url.pathname)) {
+    event.respondWith(
+      fromPrecache(event.request, url.pathname)
+        .catch(() => null)
+        .then(response => response || runtimeStrategy(event.request, url) || fetch(event.request))
+    );
+    return;
+  }
+
+  const runtime = runtimeStrategy(event.request, url);
+  if (runtime) event.respondWith(runtime);
+});
+
+// Strategie a runtime per ciò che non è in precache; null = lascia passare alla rete
+function runtimeStrategy(request, url) {
   // Assets statici pesanti (immagini/librerie vendor): cache-first
   const isHeavyStatic = (url.pathname.startsWith('/assets/img/') ||
                         url.pathname.startsWith('/assets/js/'));
 
   if (isHeavyStatic) {
-    event.respondWith(
-      caches.match(event.request).then(cached =>
-        cached || fetch(event.request).then(response => {
-          const clone = response.clone();
-          caches.open(CACHE_NAME).then(cache => cache.put(event.request, clone));
-          return response;
-        })
-      )
+    return caches.match(request).then(cached =>
+      cached || fetch(request).then(response => {
+        const clone = response.clone();
+        caches.open(CACHE_NAME).then(cache => cache.put(request, clone));
+        return response;
+      })
     );
-    return;
   }
 
   // Script/style dell'app:
@@ -74,35 +159,33 @@ self.addEventListener('fetch', event => {
                     (url.pathname.endsWith('.js') || url.pathname.endsWith('.css'));
 
   if (isAppCode) {
-    const isReloadRequest = event.request.cache === 'reload' || event.request.cache === 'no-cache';
+    const isReloadRequest = request.cache === 'reload' || request.cache === 'no-cache';
 
-    event.respondWith(
-      caches.open(CACHE_NAME).then(async cache => {
-        if (isReloadRequest) {
-          try {
-            const fresh = await fetch(event.request);
-            cache.put(event.request, fresh.clone());
-            return fresh;
-          } catch {
-            const cached = await cache.match(event.request);
-            if (cached) return cached;
-            throw new Error('Network unavailable and no cached asset for reload request');
-          }
+    return caches.open(CACHE_NAME).then(async cache => {
+      if (isReloadRequest) {
+        try {
+          const fresh = await fetch(request);
+          cache.put(request, fresh.clone());
+          return fresh;
+        } catch {
+          const cached = await cache.match(request);
+          if (cached) return cached;
+          throw new Error('Network unavailable and no cached asset for reload request');
         }
+      }
 
-        const cached = await cache.match(event.request);
-        const networkFetch = fetch(event.request)
-          .then(response => {
-            cache.put(event.request, response.clone());
-            return response;
-          })
-          .catch(() => null);
+      const cached = await cache.match(request);
+      const networkFetch = fetch(request)
+        .then(response => {
+          cache.put(request, response.clone());
+          return response;
+        })
+        .catch(() => null);
 
-        return cached || networkFetch;
-      })
-    );
-    return;
+      return cached || networkFetch;
+    });
   }
 
   // Tutto il resto (API, blockchain) va sempre alla rete
-});
\ No newline at end of file
+  return null;
+}
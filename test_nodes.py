@@ -2,12 +2,21 @@
 Steem Node Benchmark — 22 API calls x 10 nodes
 Usage: python test_nodes.py
 Results saved to test-nodes-results.txt
+
+Benchmark mode (nodes in parallel, requests to each node sequential):
+    python test_nodes.py --bench [--warmup 2] [--samples 10] [--json node-benchmark.json] [--csv node-benchmark.csv]
+    python test_nodes.py --mock              # offline, against local stand-in nodes (implies --bench)
+The JSON output lists "ranked_nodes" and can be used directly as STEEM_NODES_FILE.
 """
 
+import argparse
+import csv
 import requests
 import time
 import json
-from collections import OrderedDict
+from collections import OrderedDict, Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
 NODES = [
     "https://api.wherein.io",
@@ -65,91 +74,263 @@ CYAN   = "\033[96m"
 WHITE  = "\033[97m"
 RESET  = "\033[0m"
 
-results = {node: {} for node in NODES}
-plain_lines = []
-
-def log(text, plain=None):
-    print(text)
-    plain_lines.append(plain if plain is not None else text)
-
-# Header
-header_plain = f"{'TEST':<{PAD}}"
-header_color = f"{WHITE}{'TEST':<{PAD}}{RESET}"
-for node in NODES:
-    s = short_node(node)
-    header_plain += f"{s:>{COL_W}}"
-    header_color += f"{CYAN}{s:>{COL_W}}{RESET}"
-log(header_color, header_plain)
-sep = "-" * (PAD + len(NODES) * COL_W)
-log(sep)
-
-# Test loop
-for test_name, body in TESTS.items():
-    row_plain = f"{test_name:<{PAD}}"
-    row_color = f"{WHITE}{test_name:<{PAD}}{RESET}"
-    print(f"{WHITE}{test_name:<{PAD}}{RESET}", end="", flush=True)
-
-    for node in NODES:
-        try:
-            start = time.time()
-            r = requests.post(node, json=body, timeout=7)
-            ms = int((time.time() - start) * 1000)
-            data = r.json()
-
-            if data.get("result") is not None:
-                cell = f"OK {ms}ms"
-                row_color += f"{GREEN}{cell:>{COL_W}}{RESET}"
-                row_plain += f"{cell:>{COL_W}}"
-                results[node][test_name] = ms
-            else:
-                code = data.get("error", {}).get("code", "?")
-                cell = f"ERR {code}"
+
+def run_table(nodes):
+    results = {node: {} for node in nodes}
+    plain_lines = []
+
+    def log(text, plain=None):
+        print(text)
+        plain_lines.append(plain if plain is not None else text)
+
+    # Header
+    header_plain = f"{'TEST':<{PAD}}"
+    header_color = f"{WHITE}{'TEST':<{PAD}}{RESET}"
+    for node in nodes:
+        s = short_node(node)
+        header_plain += f"{s:>{COL_W}}"
+        header_color += f"{CYAN}{s:>{COL_W}}{RESET}"
+    log(header_color, header_plain)
+    sep = "-" * (PAD + len(nodes) * COL_W)
+    log(sep)
+
+    # Test loop
+    for test_name, body in TESTS.items():
+        row_plain = f"{test_name:<{PAD}}"
+        row_color = f"{WHITE}{test_name:<{PAD}}{RESET}"
+        print(f"{WHITE}{test_name:<{PAD}}{RESET}", end="", flush=True)
+
+        for node in nodes:
+            try:
+                start = time.time()
+                r = requests.post(node, json=body, timeout=7)
+                ms = int((time.time() - start) * 1000)
+                data = r.json()
+
+                if data.get("result") is not None:
+                    cell = f"OK {ms}ms"
+                    row_color += f"{GREEN}{cell:>{COL_W}}{RESET}"
+                    row_plain += f"{cell:>{COL_W}}"
+                    results[node][test_name] = ms
+                else:
+                    code = data.get("error", {}).get("code", "?")
+                    cell = f"ERR {code}"
+                    row_color += f"{RED}{cell:>{COL_W}}{RESET}"
+                    row_plain += f"{cell:>{COL_W}}"
+                    results[node][test_name] = -1
+
+            except Exception:
+                cell = "FAIL"
                 row_color += f"{RED}{cell:>{COL_W}}{RESET}"
                 row_plain += f"{cell:>{COL_W}}"
                 results[node][test_name] = -1
 
-        except Exception:
-            cell = "FAIL"
-            row_color += f"{RED}{cell:>{COL_W}}{RESET}"
-            row_plain += f"{cell:>{COL_W}}"
-            results[node][test_name] = -1
+            print(f"{GREEN if results[node].get(test_name, -1) >= 0 else RED}{cell:>{COL_W}}{RESET}", end="", flush=True)
+
+        print()
+        plain_lines.append(row_plain)
+
+    log(sep)
+
+    # Summary
+    log("")
+    log(f"{YELLOW}===== RIEPILOGO ====={RESET}", "===== RIEPILOGO =====")
+
+    score_plain = f"{'Chiamate OK / ' + str(len(TESTS)):<{PAD}}"
+    score_color = f"{WHITE}{'Chiamate OK / ' + str(len(TESTS)):<{PAD}}{RESET}"
+    lat_plain   = f"{'Latenza media (ms)':<{PAD}}"
+    lat_color   = f"{WHITE}{'Latenza media (ms)':<{PAD}}{RESET}"
+
+    for node in nodes:
+        ok = sum(1 for v in results[node].values() if v >= 0)
+        total = len(TESTS)
+        cell = f"{ok}/{total}"
+        color = GREEN if ok == total else (YELLOW if ok > total * 0.7 else RED)
+        score_color += f"{color}{cell:>{COL_W}}{RESET}"
+        score_plain += f"{cell:>{COL_W}}"
+
+        times = [v for v in results[node].values() if v >= 0]
+        avg = int(sum(times) / len(times)) if times else 0
+        lat_cell = f"{avg}ms"
+        lat_color += f"{CYAN}{lat_cell:>{COL_W}}{RESET}"
+        lat_plain += f"{lat_cell:>{COL_W}}"
+
+    log(score_color, score_plain)
+    log(lat_color, lat_plain)
+
+    # Save to file
+    out_path = "test-nodes-results.txt"
+    with open(out_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(plain_lines) + "\n")
+
+    print(f"\n{YELLOW}Risultati salvati in: {out_path}{RESET}")
+
+
+# ===== Benchmark mode =====
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def timed_call(session, node, body, timeout):
+    """Returns (ms, outcome): outcome is "ok", a JSON-RPC error code, "http_<status>" or "fail" """
+    start = time.perf_counter()
+    try:
+        r = session.post(node, json=body, timeout=timeout)
+        ms = (time.perf_counter() - start) * 1000
+        if r.status_code != 200:
+            return ms, f"http_{r.status_code}"
+        data = r.json()
+        if data.get("result") is not None:
+            return ms, "ok"
+        return ms, str(data.get("error", {}).get("code", "?"))
+    except requests.Timeout:
+        return (time.perf_counter() - start) * 1000, "timeout"
+    except Exception:
+        return (time.perf_counter() - start) * 1000, "fail"
+
+
+def bench_node(node, tests, warmup, samples, timeout):
+    """All tests against one node, strictly sequential so the node is not overloaded by us"""
+    session = requests.Session()
+    methods = {}
+    started = time.perf_counter()
+    for test_name, body in tests.items():
+        for _ in range(warmup):
+            timed_call(session, node, body, timeout)
+        latencies, outcomes = [], Counter()
+        for _ in range(samples):
+            ms, outcome = timed_call(session, node, body, timeout)
+            outcomes[outcome] += 1
+            if outcome == "ok":
+                latencies.append(ms)
+        methods[test_name] = {
+            "samples": samples,
+            "ok": outcomes["ok"],
+            "error_rate": round(1 - outcomes["ok"] / samples, 4),
+            "errors": {code: n for code, n in outcomes.items() if code != "ok"},
+            "p50": round(percentile(latencies, 50), 1) if latencies else None,
+            "p90": round(percentile(latencies, 90), 1) if latencies else None,
+            "p99": round(percentile(latencies, 99), 1) if latencies else None,
+            "latencies": latencies,
+        }
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [ms for m in methods.values() for ms in m.pop("latencies")]
+    total = sum(m["samples"] for m in methods.values())
+    ok = sum(m["ok"] for m in methods.values())
+    errors = Counter()
+    for m in methods.values():
+        errors.update(m["errors"])
+    return {
+        "requests": total,
+        "ok": ok,
+        "error_rate": round(1 - ok / total, 4) if total else 1.0,
+        "errors": dict(errors),
+        "p50": round(percentile(all_latencies, 50), 1) if all_latencies else None,
+        "p90": round(percentile(all_latencies, 90), 1) if all_latencies else None,
+        "p99": round(percentile(all_latencies, 99), 1) if all_latencies else None,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "seconds": round(elapsed, 1),
+        "methods": methods,
+    }
+
+
+def rank_nodes(nodes_report):
+    """Best nodes first: fewest errors, then lowest p90"""
+    return sorted(
+        nodes_report,
+        key=lambda node: (nodes_report[node]["error_rate"], nodes_report[node]["p90"] or float("inf"))
+    )
+
+
+def run_benchmark(nodes, tests, warmup, samples, timeout, concurrency):
+    print(f"Benchmarking {len(nodes)} nodes x {len(tests)} methods "
+          f"({warmup} warm-up + {samples} samples each, {concurrency} nodes in parallel)")
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        futures = {node: pool.submit(bench_node, node, tests, warmup, samples, timeout) for node in nodes}
+        nodes_report = {node: future.result() for node, future in futures.items()}
+
+    report = {
+        "generated_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "config": {"warmup": warmup, "samples": samples, "timeout": timeout, "methods": list(tests)},
+        "seconds": round(time.time() - started, 1),
+        "ranked_nodes": rank_nodes(nodes_report),
+        "nodes": nodes_report,
+    }
+
+    print(f"\n{'NODE':<32}{'OK':>8}{'ERR%':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'req/s':>8}  ERRORS")
+    for node in report["ranked_nodes"]:
+        n = nodes_report[node]
+        color = GREEN if n["error_rate"] == 0 else (YELLOW if n["error_rate"] < 0.3 else RED)
+        errors = ", ".join(f"{code}x{count}" for code, count in n["errors"].items())
+        print(f"{color}{node:<32}{n['ok']:>8}{n['error_rate'] * 100:>7.1f}%"
+              f"{n['p50'] or '-':>9}{n['p90'] or '-':>9}{n['p99'] or '-':>9}{n['throughput_rps']:>8}{RESET}  {errors}")
+    return report
 
-        print(f"{GREEN if results[node].get(test_name, -1) >= 0 else RED}{cell:>{COL_W}}{RESET}", end="", flush=True)
 
-    print()
-    plain_lines.append(row_plain)
+def write_csv(report, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["node", "method", "samples", "ok", "error_rate", "p50_ms", "p90_ms", "p99_ms", "errors"])
+        for node in report["ranked_nodes"]:
+            for method, m in report["nodes"][node]["methods"].items():
+                errors = ";".join(f"{code}:{count}" for code, count in m["errors"].items())
+                writer.writerow([node, method, m["samples"], m["ok"], m["error_rate"], m["p50"], m["p90"], m["p99"], errors])
 
-log(sep)
 
-# Summary
-log("")
-log(f"{YELLOW}===== RIEPILOGO ====={RESET}", "===== RIEPILOGO =====")
+def start_mock_nodes():
+    """Local stand-in nodes with different latency/error profiles"""
+    from python.mock_rpc import MockRpcServer, spiky_latency
+    profiles = [
+        (spiky_latency(0.03, 0.005, 0.01, 0.2, 0.5), 0.0),
+        (spiky_latency(0.06, 0.01, 0.05, 0.3, 0.9), 0.02),
+        (spiky_latency(0.12, 0.03, 0.10, 0.5, 1.5), 0.10),
+    ]
+    return [
+        MockRpcServer(latency=latency, error_rate=error_rate, default_result={"mock": True}, seed=n).start()
+        for n, (latency, error_rate) in enumerate(profiles)
+    ]
 
-score_plain = f"{'Chiamate OK / ' + str(len(TESTS)):<{PAD}}"
-score_color = f"{WHITE}{'Chiamate OK / ' + str(len(TESTS)):<{PAD}}{RESET}"
-lat_plain   = f"{'Latenza media (ms)':<{PAD}}"
-lat_color   = f"{WHITE}{'Latenza media (ms)':<{PAD}}{RESET}"
 
-for node in NODES:
-    ok = sum(1 for v in results[node].values() if v >= 0)
-    total = len(TESTS)
-    cell = f"{ok}/{total}"
-    color = GREEN if ok == total else (YELLOW if ok > total * 0.7 else RED)
-    score_color += f"{color}{cell:>{COL_W}}{RESET}"
-    score_plain += f"{cell:>{COL_W}}"
+def main():
+    parser = argparse.ArgumentParser(description="Steem node benchmark")
+    parser.add_argument("--bench", action="store_true", help="concurrent benchmark with percentiles")
+    parser.add_argument("--warmup", type=int, default=2, help="warm-up requests per method (not measured)")
+    parser.add_argument("--samples", type=int, default=10, help="measured requests per method")
+    parser.add_argument("--timeout", type=float, default=7)
+    parser.add_argument("--concurrency", type=int, default=len(NODES), help="nodes benchmarked in parallel")
+    parser.add_argument("--json", default="node-benchmark.json", help="JSON output path")
+    parser.add_argument("--csv", help="CSV output path")
+    parser.add_argument("--mock", action="store_true", help="run against local mock nodes (offline, implies --bench)")
+    parser.add_argument("--nodes", help="comma separated node list (default: built-in NODES)")
+    args = parser.parse_args()
+    if args.mock:
+        args.bench = True  # la tabella sovrascriverebbe test-nodes-results.txt con dati finti
 
-    times = [v for v in results[node].values() if v >= 0]
-    avg = int(sum(times) / len(times)) if times else 0
-    lat_cell = f"{avg}ms"
-    lat_color += f"{CYAN}{lat_cell:>{COL_W}}{RESET}"
-    lat_plain += f"{lat_cell:>{COL_W}}"
+    mock_servers = start_mock_nodes() if args.mock else []
+    nodes = [s.url for s in mock_servers] or (args.nodes.split(",") if args.nodes else NODES)
 
-log(score_color, score_plain)
-log(lat_color, lat_plain)
+    try:
+        if not args.bench:
+            run_table(nodes)
+            return
+        report = run_benchmark(nodes, TESTS, args.warmup, args.samples, args.timeout,
+                               max(1, min(args.concurrency, len(nodes))))
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n{YELLOW}JSON salvato in: {args.json}{RESET}")
+        if args.csv:
+            write_csv(report, args.csv)
+            print(f"{YELLOW}CSV salvato in: {args.csv}{RESET}")
+    finally:
+        for server in mock_servers:
+            server.stop()
 
-# Save to file
-out_path = "test-nodes-results.txt"
-with open(out_path, "w", encoding="utf-8") as f:
-    f.write("\n".join(plain_lines) + "\n")
 
-print(f"\n{YELLOW}Risultati salvati in: {out_path}{RESET}")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+import time
+
+from python.rpc_proxy import RpcProxy, CHAIN_STATE_TTL, IMMUTABLE_TTL
+
+
+class FakeClient:
+    """Nodo finto: get_block restituisce il blocco solo se esiste già"""
+
+    def __init__(self, head_block):
+        self.head_block = head_block
+        self.calls = 0
+
+    def call_raw(self, payload, timeout=10):
+        self.calls += 1
+        number = payload['params'][0]
+        block = {"block_id": f"{number:08x}"} if number <= self.head_block else None
+        return {"jsonrpc": "2.0", "result": block, "id": payload['id']}
+
+
+def get_block(proxy, number):
+    return proxy.handle({"jsonrpc": "2.0", "method": "condenser_api.get_block", "params": [number], "id": 1})
+
+
+def cached_ttl(proxy, number):
+    expires_at = next(entry[0] for key, entry in proxy._cache.items() if f"[{number}]" in key)
+    return expires_at - time.time()
+
+
+def test_existing_block_is_cached_as_immutable():
+    proxy = RpcProxy(client=FakeClient(head_block=100))
+    assert get_block(proxy, 100)['result'] == {"block_id": "00000064"}
+    assert cached_ttl(proxy, 100) > IMMUTABLE_TTL - 5
+
+
+def test_future_block_is_not_cached_for_a_day(monkeypatch):
+    client = FakeClient(head_block=100)
+    proxy = RpcProxy(client=client)
+    assert get_block(proxy, 101)['result'] is None
+    assert cached_ttl(proxy, 101) <= CHAIN_STATE_TTL
+
+    # Il blocco viene prodotto: scaduta la cache breve arriva il blocco vero
+    client.head_block = 101
+    later = time.time() + CHAIN_STATE_TTL + 1
+    monkeypatch.setattr('python.rpc_proxy.time.time', lambda: later)
+    assert get_block(proxy, 101)['result'] == {"block_id": "00000065"}
+    assert client.calls == 2
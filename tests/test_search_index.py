@@ -0,0 +1,56 @@
+from python import search_index as module
+from python.search_index import SearchIndex
+
+
+def make_rows(first, last):
+    return [
+        (f"author{i}", f"post-{i}", f"Post {i}", 'steem', 'steem', f"2024-01-01T00:00:{i % 60:02d}",
+         'common words' if i % 2 else 'common text')
+        for i in range(first, last + 1)
+    ]
+
+
+def all_pages(index, text, limit=7):
+    found, cursor = [], None
+    while True:
+        results, cursor = index.search(text, limit, cursor)
+        found += [row['permlink'] for row in results]
+        if not cursor:
+            return found
+
+
+def test_pages_cover_recent_and_older_posts_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, 'RECENT_WINDOW', 20)
+    monkeypatch.setattr(module, 'PRUNE_STEP', 5)
+    monkeypatch.setattr(module, 'MAX_CANDIDATES', 8)
+    index = SearchIndex(str(tmp_path / 'search.db'), result_ttl=0)
+    for first in range(1, 60, 10):
+        index.write_batch(make_rows(first, first + 9))
+
+    recent_from = index._fetch("SELECT value FROM search_meta WHERE key = 'recent_from'")[0][0]
+    assert 60 - recent_from + 1 < 20 + 5
+    assert index._fetch("SELECT count(*) FROM recent_fts WHERE recent_fts MATCH 'common'")[0][0] == 60 - recent_from + 1
+
+    found = all_pages(index, 'common')
+    assert sorted(found) == sorted(f"post-{i}" for i in range(1, 61))
+    words = all_pages(index, 'words')
+    assert sorted(words) == sorted(f"post-{i}" for i in range(1, 61, 2))
+
+    edited = [row[:6] + ('fresh body',) for row in make_rows(1, 60) if row[1] in ('post-5', 'post-55')]
+    index.write_batch(edited)
+    assert sorted(all_pages(index, 'fresh')) == ['post-5', 'post-55']
+    assert len(all_pages(index, 'common')) == 58
+
+
+def test_existing_index_gets_recent_segment(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, 'RECENT_WINDOW', 10)
+    path = str(tmp_path / 'search.db')
+    SearchIndex(path, result_ttl=0).write_batch(make_rows(1, 30))
+
+    conn = SearchIndex(path)._connect()
+    conn.execute('DELETE FROM search_meta')
+    conn.close()
+
+    index = SearchIndex(path, result_ttl=0)
+    assert index._fetch("SELECT value FROM search_meta WHERE key = 'recent_from'")[0][0] == 21
+    assert sorted(all_pages(index, 'text', limit=4)) == sorted(f"post-{i}" for i in range(2, 31, 2))
@@ -0,0 +1,52 @@
+import threading
+import time
+
+from python import steem_client as module
+from python.mock_rpc import MockRpcServer, fixed_latency
+from python.steem_client import SteemClient
+
+PAYLOAD = {"jsonrpc": "2.0", "method": "condenser_api.get_dynamic_global_properties", "params": [], "id": 1}
+
+
+def slow_client(monkeypatch, latency, concurrency):
+    monkeypatch.setattr(module, 'MAX_UPSTREAM_CONCURRENCY', concurrency)
+    monkeypatch.setattr(module, 'HEDGE_DEFAULT_DELAY', latency / 4)
+    mock = MockRpcServer(latency=fixed_latency(latency)).start()
+    # Due indirizzi dello stesso server: primario e hedge contano sullo stesso picco
+    client = SteemClient(api_urls=[mock.url, mock.url + '/'], hedging=True)
+    return mock, client
+
+
+def test_hedge_runs_when_a_slot_is_free(monkeypatch):
+    mock, client = slow_client(monkeypatch, latency=0.2, concurrency=4)
+    try:
+        assert 'result' in client.call_raw(PAYLOAD)
+        assert client.stats['hedged'] == 1
+        assert mock.max_in_flight == 2
+    finally:
+        mock.stop()
+
+
+def test_losing_hedges_count_against_upstream_concurrency(monkeypatch):
+    mock, client = slow_client(monkeypatch, latency=0.2, concurrency=4)
+    errors = []
+
+    def call():
+        try:
+            client.call_raw(PAYLOAD)
+        except Exception as e:
+            errors.append(e)
+
+    try:
+        threads = [threading.Thread(target=call) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors
+        assert mock.requests > 10           # qualche hedge è partito
+        assert mock.max_in_flight <= 4
+        time.sleep(0.3)                     # gli hedge perdenti finiscono dopo il chiamante
+        assert client.get_stats()['in_flight'] == 0
+    finally:
+        mock.stop()
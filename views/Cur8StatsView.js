@@ -93,34 +93,38 @@ class Cur8StatsView extends View {
     try {
       this.loading = true;
 
-      // Fetch CUR8 tagged posts
       console.log('Loading Cur8 statistics...');
-      
-      // Load multiple pages to get comprehensive data
-      const promises = [];
-      for (let page = 1; page <= 5; page++) {
-        promises.push(steemService.getPostsByTag('cur8', page, 20));
-      }
 
-      const results = await Promise.all(promises);
-      
-      // Combine all posts
-      this.posts = [];
-      results.forEach(result => {
-        if (result && Array.isArray(result.posts)) {
-          this.posts = [...this.posts, ...result.posts];
-        }
-      });
-
-      // Remove duplicates
-      this.posts = this.posts.filter((post, index, self) => 
-        index === self.findIndex(p => p.author === post.author && p.permlink === post.permlink)
-      );
+      // Precomputed statistics from the server (whole tag history, single request)
+      this.stats = await this.fetchServerStatistics();
 
-      console.log(`Loaded ${this.posts.length} Cur8 posts for analysis`);
+      if (!this.stats) {
+        // No backend (static hosting): compute locally from the latest 100 posts
+        const promises = [];
+        for (let page = 1; page <= 5; page++) {
+          promises.push(steemService.getPostsByTag('cur8', page, 20));
+        }
 
-      // Calculate statistics
-      this.stats = this.calculateStatistics(this.posts);
+        const results = await Promise.all(promises);
+
+        // Combine all posts, removing duplicates
+        const seen = new Set();
+        this.posts = [];
+        results.forEach(result => {
+          if (!result || !Array.isArray(result.posts)) return;
+          result.posts.forEach(post => {
+            const key = `${post.author}/${post.permlink}`;
+            if (seen.has(key)) return;
+            seen.add(key);
+            this.posts.push(post);
+          });
+        });
+
+        console.log(`Loaded ${this.posts.length} Cur8 posts for analysis`);
+
+        // Calculate statistics
+        this.stats = this.calculateStatistics(this.posts);
+      }
 
       // Render statistics
       this.renderStatistics(container);
@@ -134,6 +138,31 @@ class Cur8StatsView extends View {
     }
   }
 
+  async fetchServerStatistics() {
+    try {
+      const response = await fetch('/api/stats/cur8');
+      if (response.status === 503) {
+        // First import still running on the server: compute from the latest posts meanwhile
+        const body = await response.json().catch(() => ({}));
+        if (body.syncing) console.log('Cur8 statistics are still being imported, computing locally');
+        return null;
+      }
+      if (!response.ok) return null;
+      const stats = await response.json();
+      // Same fields the renderer uses for locally computed posts
+      const withTotals = post => ({ ...post, _calculatedPayout: post.payout, _voteCount: post.votes });
+      stats.topPosts = stats.topPosts.map(withTotals);
+      stats.recentPosts = stats.recentPosts.map(withTotals);
+      // JSON keys arrive sorted alphabetically: restore the range order
+      const ranges = ['0-1', '1-5', '5-10', '10-50', '50+'];
+      stats.payoutDistribution = Object.fromEntries(ranges.map(range => [range, stats.payoutDistribution[range] || 0]));
+      console.log(`Loaded Cur8 statistics for ${stats.totalPosts} posts from the server`);
+      return stats;
+    } catch (error) {
+      return null;
+    }
+  }
+
   calculateStatistics(posts) {
     if (!posts || posts.length === 0) {
       return {
@@ -388,6 +388,12 @@ class SearchView extends View {
             });
           }
         }, 0);
+      } else if (this.currentSearchMethod === 'posts' && searchService.lastSearchTimedOut) {
+        noResults.innerHTML = `
+          <div class="no-results-icon"><span class="material-icons" style="font-size:2.5rem">hourglass_empty</span></div>
+          <h3>Search took too long</h3>
+          <p>Try a more specific query, or add more letters to the last word.</p>
+        `;
       } else if (this.currentSearchMethod === 'posts') {
         noResults.innerHTML = `
           <div class="no-results-icon"><span class="material-icons" style="font-size:2.5rem">article</span></div>
@@ -0,0 +1,22 @@
+"""
+Entry point WSGI per la produzione
+
+    gunicorn --worker-class gevent --worker-connections 2000 --workers 4 --preload wsgi:app
+
+I worker gevent servono per gli stream SSE di /api/chain/stream: ogni client connesso
+è un greenlet invece di un thread. Il monkey patching va fatto prima di qualsiasi altro
+import (con --preload l'app viene importata nel master, prima del worker).
+
+L'app non apre il database né contatta i nodi finché non arriva una richiesta, quindi
+i worker si possono forkare dal master senza inizializzare nulla. Il publisher dei post
+schedulati non gira nei worker web: si avvia a parte con `python -m python.publisher`.
+"""
+try:
+    from gevent import monkey
+    monkey.patch_all()
+except ImportError:
+    pass
+
+from app import create_app  # noqa: E402
+
+app = create_app()